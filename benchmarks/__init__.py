@@ -0,0 +1,6 @@
+"""Benchmarks for the Logic Simulator.
+
+Used in the Logic Simulator project to measure the performance of the
+simulator on large, machine-generated circuits. Each module can be run as a
+script from the repository root, e.g. python -m benchmarks.bench_devices
+"""
@@ -0,0 +1,118 @@
+"""Benchmark device lookups in the devices.Devices() registry.
+
+Used in the Logic Simulator project to compare the hash-indexed device
+registry against a linear scan of the devices list, on random gate networks
+with many thousands of gates.
+
+Usage
+-----
+python -m benchmarks.bench_devices [-n <gates,...>] [-c <cycles>]
+"""
+import getopt
+import random
+import sys
+import time
+
+from names import Names
+from devices import Devices
+from network import Network
+
+
+class LinearScanDevices(Devices):
+
+    """Devices registry that finds devices by scanning the devices list.
+
+    This reproduces the original lookup behaviour, for comparison.
+    """
+
+    def get_device(self, device_id):
+        """Return the Device object corresponding to device_id."""
+        for device in self.devices_list:
+            if device.device_id == device_id:
+                return device
+        return None
+
+    def find_devices(self, device_kind=None):
+        """Return a list of device IDs of the specified device_kind."""
+        device_id_list = []
+        for device in self.devices_list:
+            if device_kind is None:
+                device_id_list.append(device.device_id)
+            elif device.device_kind == device_kind:
+                device_id_list.append(device.device_id)
+        return device_id_list
+
+
+def build_network(devices_class, no_of_gates, no_of_switches=16, seed=0):
+    """Return a network of randomly connected 2-input NAND gates.
+
+    Every gate input is connected to a switch or to an earlier gate, so the
+    network has no loops.
+    """
+    rng = random.Random(seed)
+    names = Names()
+    devices = devices_class(names)
+    network = Network(names, devices)
+    [I1, I2] = names.lookup(["I1", "I2"])
+
+    source_ids = []
+    for i in range(no_of_switches):
+        [switch_id] = names.lookup(["SW" + str(i)])
+        devices.make_device(switch_id, devices.SWITCH, rng.randrange(2))
+        source_ids.append(switch_id)
+    for i in range(no_of_gates):
+        [gate_id] = names.lookup(["G" + str(i)])
+        devices.make_device(gate_id, devices.NAND, 2)
+        for input_id in [I1, I2]:
+            network.make_connection(rng.choice(source_ids), None,
+                                    gate_id, input_id)
+        source_ids.append(gate_id)
+    return network
+
+
+def time_lookups(network):
+    """Return the time taken to look up every device once."""
+    devices = network.devices
+    device_ids = devices.find_devices()
+    start = time.perf_counter()
+    for device_id in device_ids:
+        devices.get_device(device_id)
+    return time.perf_counter() - start
+
+
+def time_cycles(network, cycles):
+    """Return the mean time taken by one execute_network() cycle."""
+    start = time.perf_counter()
+    for _ in range(cycles):
+        network.execute_network()
+    return (time.perf_counter() - start) / cycles
+
+
+def main(arg_list):
+    """Run the benchmark for each network size given on the command line."""
+    sizes = [1000, 10000]
+    cycles = 1
+    options, arguments = getopt.getopt(arg_list, "n:c:")
+    for option, value in options:
+        if option == "-n":
+            sizes = [int(size) for size in value.split(",")]
+        elif option == "-c":
+            cycles = int(value)
+
+    print("gates   registry  lookup_all/s  cycle/s")
+    for size in sizes:
+        results = {}
+        for label, devices_class in [("linear", LinearScanDevices),
+                                     ("indexed", Devices)]:
+            network = build_network(devices_class, size)
+            results[label] = (time_lookups(network),
+                              time_cycles(network, cycles))
+            print("{:<7} {:<9} {:<13.6f} {:.6f}".format(
+                size, label, *results[label]))
+        print("speed-up: lookups x{:.0f}, cycle x{:.0f}".format(
+            results["linear"][0] / results["indexed"][0],
+            results["linear"][1] / results["indexed"][1]))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,80 @@
+"""Benchmark the simulation engines of network.Network().
+
+Used in the Logic Simulator project to compare the time per simulation cycle
+of each engine, on a large network that is mostly idle: thousands of gates
+driven by switches that do not change, plus a short chain of gates driven by a
+clock. With -t, every switch is toggled before each cycle, so that the whole
+network has to settle again.
+
+Usage
+-----
+python -m benchmarks.bench_engines [-n <gates>] [-c <cycles>] [-t]
+"""
+import getopt
+import sys
+import time
+
+from devices import Devices
+from benchmarks.bench_devices import build_network
+
+
+def add_clocked_chain(network, length=10, half_period=1):
+    """Add a clock driving a chain of single-input NAND gates."""
+    names = network.names
+    devices = network.devices
+    [CLK_ID, I1] = names.lookup(["CLKB", "I1"])
+    devices.make_device(CLK_ID, devices.CLOCK, half_period)
+    previous_id = CLK_ID
+    for i in range(length):
+        [gate_id] = names.lookup(["CHAIN" + str(i)])
+        devices.make_device(gate_id, devices.NAND, 1)
+        network.make_connection(previous_id, None, gate_id, I1)
+        previous_id = gate_id
+
+
+def time_engine(engine_name, no_of_gates, cycles, toggle=False):
+    """Return the mean time per cycle of the named engine.
+
+    If toggle is True, every switch is toggled before each cycle.
+    """
+    network = build_network(Devices, no_of_gates)
+    add_clocked_chain(network)
+    devices = network.devices
+    switch_ids = devices.find_devices(devices.SWITCH)
+    network.set_engine(getattr(network, engine_name))
+    network.execute_network()  # settle the network before timing
+    start = time.perf_counter()
+    for _ in range(cycles):
+        if toggle:
+            for switch_id in switch_ids:
+                switch_state = devices.get_device(switch_id).switch_state
+                devices.set_switch(switch_id, 1 - switch_state)
+        if not network.execute_network():
+            raise RuntimeError(engine_name + " reported oscillation")
+    return (time.perf_counter() - start) / cycles
+
+
+def main(arg_list):
+    """Run the benchmark for every engine."""
+    no_of_gates = 10000
+    cycles = 20
+    toggle = False
+    options, arguments = getopt.getopt(arg_list, "n:c:t")
+    for option, value in options:
+        if option == "-n":
+            no_of_gates = int(value)
+        elif option == "-c":
+            cycles = int(value)
+        elif option == "-t":
+            toggle = True
+
+    print("engine           cycle/s")
+    for engine_name in ["OBJECT_ENGINE", "COMPILED_ENGINE", "EVENT_ENGINE",
+                        "VECTOR_ENGINE"]:
+        print("{:<16} {:.6f}".format(
+            engine_name, time_engine(engine_name, no_of_gates, cycles,
+                                     toggle)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,198 @@
+"""Benchmark each stage of a simulation on synthetic and example circuits.
+
+Used in the Logic Simulator project to time scanning, parsing, compiling,
+execute_network() and record_signals() separately, on circuits made by
+benchmarks.generators and on the example definition files, and to write the
+results to a JSON file, so that they can be compared across commits.
+
+Parsing is timed from the start of the file, so it includes scanning.
+Compiling is the time taken by Network.compile_network(), and the times of
+execute_network() and record_signals() are means per cycle. Each stage is
+timed repeats times, on a new network each time, and the fastest time is
+kept.
+
+Usage
+-----
+python -m benchmarks.bench_simulation [-c <circuit,...>] [-n <cycles>]
+                                      [-e <engine>] [-r <repeats>]
+                                      [-o <JSON file>]
+
+Circuits are definition file paths or generated circuits, given as
+kind:size or kind:size:levels, such as dag:10000:20 (see
+benchmarks.generators). Engines are OBJECT_ENGINE, COMPILED_ENGINE,
+EVENT_ENGINE and VECTOR_ENGINE.
+"""
+import contextlib
+import getopt
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from benchmarks.generators import generate
+
+CIRCUITS = ["main_def_files/combinational.txt",
+            "main_def_files/sequential.txt",
+            "adder:256", "xor:1024", "shift:512", "counter:64",
+            "dag:10000:20", "pipeline:64:16"]
+
+
+def write_circuit(circuit, directory):
+    """Return the path of the definition file of the circuit.
+
+    Generated circuits are written to the directory first.
+    """
+    if os.path.exists(circuit):
+        return circuit
+    fields = circuit.split(":")
+    levels = int(fields[2]) if len(fields) > 2 else None
+    path = os.path.join(directory, circuit.replace(":", "_") + ".txt")
+    with open(path, "w") as f:
+        f.write(generate(fields[0], int(fields[1]), levels))
+    return path
+
+
+def time_scan(path):
+    """Return the time taken to scan every symbol of the file at path."""
+    start = time.perf_counter()
+    scanner = Scanner(path, Names())
+    while scanner.get_symbol().type != scanner.EOF:
+        pass
+    return time.perf_counter() - start
+
+
+def time_parse(path):
+    """Return the time taken to parse the file at path, and the network.
+
+    Raise ValueError if the file has errors.
+    """
+    random.seed(0)  # the same cold start-up every time
+    start = time.perf_counter()
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    parser = Parser(names, devices, network, monitors, Scanner(path, names))
+    # The parser reports its progress and errors to stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        successful = parser.parse_network()
+    parse_time = time.perf_counter() - start
+    if not successful:
+        raise ValueError(path + " has errors")
+    return parse_time, (devices, network, monitors)
+
+
+def time_simulation(network, monitors, engine, cycles):
+    """Return the compile time and the mean times per cycle of the run.
+
+    The times per cycle are those of execute_network() and of
+    record_signals(). Raise RuntimeError if the network oscillates.
+    """
+    start = time.perf_counter()
+    network.compile_network()
+    compile_time = time.perf_counter() - start
+
+    network.set_engine(getattr(network, engine))
+    execute_network = network.execute_network
+    record_signals = monitors.record_signals
+    execute_time = 0
+    record_time = 0
+    for _ in range(cycles):
+        start = time.perf_counter()
+        if not execute_network():
+            raise RuntimeError("network oscillating")
+        middle = time.perf_counter()
+        record_signals()
+        execute_time += middle - start
+        record_time += time.perf_counter() - middle
+    return compile_time, execute_time / cycles, record_time / cycles
+
+
+def benchmark_circuit(path, engine, cycles, repeats):
+    """Return the fastest time of each stage on the file at path."""
+    result = {}
+    for _ in range(repeats):
+        scan_time = time_scan(path)
+        parse_time, (devices, network, monitors) = time_parse(path)
+        times = [scan_time, parse_time] + list(
+            time_simulation(network, monitors, engine, cycles))
+        for stage, stage_time in zip(["scan", "parse", "compile",
+                                      "execute_per_cycle",
+                                      "record_per_cycle"], times):
+            result[stage] = min(result.get(stage, stage_time), stage_time)
+    result["devices"] = len(devices.devices_list)
+    result["monitors"] = len(monitors.monitors_dictionary)
+    result["bytes"] = os.path.getsize(path)
+    return result
+
+
+def get_commit():
+    """Return the current git commit of the repository, or None."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], check=True,
+                              stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL,
+                              text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(arg_list):
+    """Run the benchmark for every circuit and write the results."""
+    circuits = CIRCUITS
+    cycles = 100
+    engine = "COMPILED_ENGINE"
+    repeats = 3
+    json_path = None
+    options, arguments = getopt.getopt(arg_list, "c:n:e:r:o:")
+    for option, value in options:
+        if option == "-c":
+            circuits = value.split(",")
+        elif option == "-n":
+            cycles = int(value)
+        elif option == "-e":
+            engine = value
+        elif option == "-r":
+            repeats = int(value)
+        elif option == "-o":
+            json_path = value
+
+    results = []
+    print("circuit                            devices  scan/s    parse/s   "
+          "compile/s execute/cycle record/cycle")
+    with tempfile.TemporaryDirectory() as directory:
+        for circuit in circuits:
+            path = write_circuit(circuit, directory)
+            result = {"circuit": circuit}
+            result.update(benchmark_circuit(path, engine, cycles, repeats))
+            results.append(result)
+            print("{:<34} {:<8} {:<9.5f} {:<9.5f} {:<9.5f} {:<13.7f} "
+                  "{:.7f}".format(circuit, result["devices"], result["scan"],
+                                  result["parse"], result["compile"],
+                                  result["execute_per_cycle"],
+                                  result["record_per_cycle"]))
+
+    if json_path is not None:
+        report = {"commit": get_commit(),
+                  "python": platform.python_version(),
+                  "platform": platform.platform(),
+                  "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "engine": engine, "cycles": cycles, "repeats": repeats,
+                  "results": results}
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
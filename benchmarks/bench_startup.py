@@ -0,0 +1,60 @@
+"""Benchmark the start-up time of the Logic Simulator.
+
+Used in the Logic Simulator project to measure how long short command line
+invocations take to start, by running each command in a fresh interpreter
+many times. The GUI stack is timed separately, to show what importing it
+would add to every invocation; it is reported as unavailable if wx or OpenGL
+is not installed.
+
+Usage
+-----
+python -m benchmarks.bench_startup [-r <runs>]
+"""
+import getopt
+import subprocess
+import sys
+import time
+
+# {description: arguments of the Python interpreter}
+COMMANDS = {
+    "python": ["-c", "pass"],
+    "core modules": ["-c", "import names, devices, network, monitors, "
+                           "scanner, parse"],
+    "logsim.py -h": ["logsim.py", "-h"],
+    "GUI stack": ["-c", "import app_base, gui"],
+}
+
+
+def time_command(arguments, runs):
+    """Return the mean time taken to run Python with the arguments.
+
+    Return None if the command fails.
+    """
+    start = time.perf_counter()
+    for _ in range(runs):
+        if subprocess.run([sys.executable] + arguments,
+                          stdout=subprocess.DEVNULL,
+                          stderr=subprocess.DEVNULL).returncode != 0:
+            return None
+    return (time.perf_counter() - start) / runs
+
+
+def main(arg_list):
+    """Run the benchmark for every command."""
+    runs = 20
+    options, arguments = getopt.getopt(arg_list, "r:")
+    for option, value in options:
+        if option == "-r":
+            runs = int(value)
+
+    print("command          seconds")
+    for description, command_arguments in COMMANDS.items():
+        mean_time = time_command(command_arguments, runs)
+        if mean_time is None:
+            print("{:<16} unavailable".format(description))
+        else:
+            print("{:<16} {:.4f}".format(description, mean_time))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,272 @@
+"""Generate synthetic circuit definition files of configurable size.
+
+Used in the Logic Simulator project to make large definition files for the
+benchmarks, in the syntax read by the scanner and the parser. Each generator
+returns the text of a definition file; size is the number of bits, gates or
+devices per level, depending on the circuit, and levels is the depth of the
+circuits that have one.
+
+Usage
+-----
+python -m benchmarks.generators -k <kind> -n <size> [-l <levels>]
+                                [-s <seed>] [-o <file path>]
+
+Kinds: adder, xor, shift, counter, dag, pipeline
+"""
+import getopt
+import random
+import sys
+
+
+def make_definition(devices, connections, monitors):
+    """Return the text of a definition file.
+
+    devices is a list of device definitions, such as "G1 = NAND, ip=2",
+    connections is a list of (output, input) pairs, such as ("G1", "G2.I1"),
+    and monitors is a list of outputs. The connections from each output are
+    written on one line, in the order in which they were first given.
+    """
+    inputs = {}
+    for output, device_input in connections:
+        inputs.setdefault(output, []).append(device_input)
+    lines = ["START DEVICES;"]
+    lines.extend(device + ";" for device in devices)
+    lines.extend(["END DEVICES;", "", "START CONNECTIONS;"])
+    lines.extend(output + " -> " + ", ".join(device_inputs) + ";"
+                 for output, device_inputs in inputs.items())
+    lines.extend(["END CONNECTIONS;", "", "START MONITORS;"])
+    lines.extend(monitor + ";" for monitor in monitors)
+    lines.append("END MONITORS;")
+    return "\n".join(lines) + "\n"
+
+
+def ripple_adder(size):
+    """Return a ripple-carry adder of size bits, driven by switches.
+
+    Every sum bit and the carry out are monitored.
+    """
+    devices = ["CIN = SWITCH, init=1"]
+    connections = []
+    monitors = []
+    carry = "CIN"
+    for i in range(size):
+        a, b = "A" + str(i), "B" + str(i)
+        half_sum, total = "H" + str(i), "S" + str(i)
+        both, propagate = "G" + str(i), "P" + str(i)
+        carry_out = "C" + str(i + 1)
+        devices.extend([a + " = SWITCH, init=" + str(i % 2),
+                        b + " = SWITCH, init=1",
+                        half_sum + " = XOR", total + " = XOR",
+                        both + " = AND, ip=2", propagate + " = AND, ip=2",
+                        carry_out + " = OR, ip=2"])
+        connections.extend([
+            (a, half_sum + ".I1"), (b, half_sum + ".I2"),
+            (half_sum, total + ".I1"), (carry, total + ".I2"),
+            (a, both + ".I1"), (b, both + ".I2"),
+            (half_sum, propagate + ".I1"), (carry, propagate + ".I2"),
+            (both, carry_out + ".I1"), (propagate, carry_out + ".I2")])
+        monitors.append(total)
+        carry = carry_out
+    monitors.append(carry)
+    return make_definition(devices, connections, monitors)
+
+
+def xor_tree(size):
+    """Return a tree of XOR gates computing the parity of size switches.
+
+    The root of the tree is monitored.
+    """
+    devices = []
+    connections = []
+    level = []
+    for i in range(max(size, 2)):
+        level.append("L" + str(i))
+        devices.append(level[-1] + " = SWITCH, init=" + str(i % 2))
+    gate_count = 0
+    while len(level) > 1:
+        next_level = []
+        for i in range(0, len(level) - 1, 2):
+            gate = "X" + str(gate_count)
+            gate_count += 1
+            devices.append(gate + " = XOR")
+            connections.extend([(level[i], gate + ".I1"),
+                                (level[i + 1], gate + ".I2")])
+            next_level.append(gate)
+        if len(level) % 2:
+            next_level.append(level[-1])
+        level = next_level
+    return make_definition(devices, connections, level)
+
+
+def shift_register(size):
+    """Return a shift register of size D-types, fed back as a Johnson counter.
+
+    The inverted output of the last D-type is fed back to the first, so that
+    the register keeps changing. The first and last outputs are monitored.
+    """
+    devices = ["CK1 = CLOCK, cycles=1", "SW0 = SWITCH, init=0"]
+    connections = []
+    registers = ["R" + str(i) for i in range(max(size, 1))]
+    for i, register in enumerate(registers):
+        devices.append(register + " = DTYPE")
+        connections.extend([("CK1", register + ".CLK"),
+                            ("SW0", register + ".SET"),
+                            ("SW0", register + ".CLEAR")])
+        if i > 0:
+            connections.append((registers[i - 1] + ".Q", register + ".DATA"))
+    connections.append((registers[-1] + ".QBAR", registers[0] + ".DATA"))
+    monitors = [registers[0] + ".Q"]
+    if len(registers) > 1:
+        monitors.append(registers[-1] + ".Q")
+    return make_definition(devices, connections, monitors)
+
+
+def counter(size):
+    """Return a synchronous binary counter of size bits.
+
+    Each D-type toggles when all the lower bits are HIGH, and every bit is
+    monitored.
+    """
+    devices = ["CK1 = CLOCK, cycles=1", "SW0 = SWITCH, init=0",
+               "SW1 = SWITCH, init=1"]
+    connections = []
+    monitors = []
+    carry = "SW1"
+    for i in range(max(size, 1)):
+        register, toggle = "R" + str(i), "T" + str(i)
+        devices.extend([register + " = DTYPE", toggle + " = XOR"])
+        connections.extend([
+            ("CK1", register + ".CLK"), ("SW0", register + ".SET"),
+            ("SW0", register + ".CLEAR"), (register + ".Q", toggle + ".I1"),
+            (carry, toggle + ".I2"), (toggle, register + ".DATA")])
+        if i < size - 1:
+            carry_out = "K" + str(i)
+            devices.append(carry_out + " = AND, ip=2")
+            connections.extend([(register + ".Q", carry_out + ".I1"),
+                                (carry, carry_out + ".I2")])
+            carry = carry_out
+        monitors.append(register + ".Q")
+    return make_definition(devices, connections, monitors)
+
+
+def random_dag(size, levels=10, seed=0):
+    """Return size random gates in levels levels, driven by switches.
+
+    Each gate is an AND, OR, NAND, NOR or XOR gate whose inputs are outputs
+    of the level before it, so the network has no loops. The gates of the
+    last level are monitored.
+    """
+    rng = random.Random(seed)
+    levels = max(levels, 1)
+    width = max(size // levels, 1)
+    gate_kinds = ["AND", "OR", "NAND", "NOR"]
+    devices = []
+    connections = []
+    level = []
+    for i in range(min(max(width, 2), 64)):
+        level.append("SW" + str(i))
+        devices.append(level[-1] + " = SWITCH, init=" + str(rng.randrange(2)))
+    for k in range(levels):
+        next_level = []
+        for i in range(width):
+            gate = "G" + str(k) + "N" + str(i)
+            if rng.randrange(len(gate_kinds) + 1) == len(gate_kinds):
+                devices.append(gate + " = XOR")
+                no_of_inputs = 2
+            else:
+                no_of_inputs = rng.randint(2, 4)
+                devices.append(gate + " = " + rng.choice(gate_kinds) +
+                               ", ip=" + str(no_of_inputs))
+            for input_number in range(1, no_of_inputs + 1):
+                connections.append((rng.choice(level),
+                                    gate + ".I" + str(input_number)))
+            next_level.append(gate)
+        level = next_level
+    return make_definition(devices, connections, level)
+
+
+def pipeline(size, levels=8):
+    """Return a clocked pipeline size bits wide with levels stages.
+
+    Each stage is a row of NAND gates, each combining two bits of the
+    previous row of D-types, followed by a row of D-types. The outputs of the
+    last row are monitored.
+    """
+    size = max(size, 1)
+    devices = ["CK1 = CLOCK, cycles=1", "SW0 = SWITCH, init=0"]
+    connections = []
+    row = []
+    for i in range(size):
+        row.append("IN" + str(i))
+        devices.append(row[-1] + " = SWITCH, init=" + str(i % 2))
+    for k in range(max(levels, 1)):
+        next_row = []
+        for i in range(size):
+            gate, register = "P" + str(k) + "N" + str(i), \
+                "R" + str(k) + "N" + str(i)
+            devices.extend([gate + " = NAND, ip=2", register + " = DTYPE"])
+            connections.extend([
+                (row[i], gate + ".I1"), (row[(i + 1) % size], gate + ".I2"),
+                (gate, register + ".DATA"), ("CK1", register + ".CLK"),
+                ("SW0", register + ".SET"), ("SW0", register + ".CLEAR")])
+            next_row.append(register + ".Q")
+        row = next_row
+    return make_definition(devices, connections, row)
+
+
+# {kind: (generator, True if it takes the number of levels)}
+GENERATORS = {
+    "adder": (ripple_adder, False),
+    "xor": (xor_tree, False),
+    "shift": (shift_register, False),
+    "counter": (counter, False),
+    "dag": (random_dag, True),
+    "pipeline": (pipeline, True),
+}
+
+
+def generate(kind, size, levels=None):
+    """Return the definition file of the circuit of the kind and size.
+
+    levels is only used by the circuits that have levels, and their default
+    is used if it is None. Raise KeyError if the kind is unknown.
+    """
+    generator, has_levels = GENERATORS[kind]
+    if has_levels and levels is not None:
+        return generator(size, levels)
+    return generator(size)
+
+
+def main(arg_list):
+    """Write the definition file of a circuit to a file or to stdout."""
+    kind = "dag"
+    size = 1000
+    levels = None
+    seed = 0
+    path = None
+    options, arguments = getopt.getopt(arg_list, "k:n:l:s:o:")
+    for option, value in options:
+        if option == "-k":
+            kind = value
+        elif option == "-n":
+            size = int(value)
+        elif option == "-l":
+            levels = int(value)
+        elif option == "-s":
+            seed = int(value)
+        elif option == "-o":
+            path = value
+
+    if kind == "dag":
+        definition = random_dag(size, 10 if levels is None else levels, seed)
+    else:
+        definition = generate(kind, size, levels)
+    if path is None:
+        sys.stdout.write(definition)
+    else:
+        with open(path, "w") as f:
+            f.write(definition)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
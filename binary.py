@@ -0,0 +1,298 @@
+"""Write and load networks in a compact binary format.
+
+Used in the Logic Simulator project to save a parsed network to a binary
+file, and to build the network from such a file directly, without the scanner
+and the parser, so that machine-generated circuits can be loaded quickly.
+
+Classes
+-------
+BinaryNetlist - writes and loads networks in the binary format.
+"""
+import array
+import struct
+import sys
+
+MAGIC = b"LOGSIMNL"
+FORMAT_VERSION = 1
+
+# Magic number, format version, then the number of names, devices,
+# connections, monitors and signal generator waveforms
+HEADER = struct.Struct("<8s6I")
+# Array typecodes of 1, 2, 4 and 8 byte integers
+TYPECODES = ["b", "h", "i", "q"]
+
+
+def is_binary_netlist(path):
+    """Return True if the file at path is a binary netlist."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except (OSError, TypeError):
+        return False
+
+
+class BinaryNetlist:
+
+    """Write and load networks in the binary format.
+
+    A binary netlist holds the names table, then one record per device, per
+    connection and per monitor, stored as arrays of little-endian integers.
+    Each array starts with its array typecode, "b", "h", "i" or "q", so it
+    takes 1, 2, 4 or 8 bytes per integer, whichever is the smallest that fits
+    them:
+
+    names: the length of each name string, then the UTF-8 name strings.
+    waveforms: the length of each signal generator waveform, then the
+               waveforms.
+    devices: the name, kind and property of each device. Kinds are indices
+             into the list of device kinds below. The property is the number
+             of inputs of a gate, the half period of a clock, the state of a
+             switch, the index of the waveform of a signal generator, or -1.
+    connections: the device index and input name of each connected input,
+                 then the device index and output name of the output driving
+                 it.
+    monitors: the device index and output name of each monitored output.
+
+    Names are indices into the names table, and -1 stands for None. The
+    loader builds the network with Devices.make_device(),
+    Network.make_connection() and Monitors.make_monitor(), so a binary
+    netlist is checked in the same way as a definition file, apart from its
+    syntax. The network is not compiled for the compiled engines until it is
+    first executed by one of them.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    write(self, path): Writes the network to a binary netlist file. Returns
+                       True if successful, or False if the file cannot be
+                       written or a number does not fit in 8 bytes.
+
+    load(self, path): Builds the network from a binary netlist file. Returns
+                      True if successful.
+    """
+
+    def __init__(self, names, devices, network, monitors):
+        """Initialise the network and the list of device kinds."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.offset = 0  # position in the file being loaded
+        d = devices
+        self.device_kinds = [d.AND, d.OR, d.NAND, d.NOR, d.XOR, d.CLOCK,
+                             d.SWITCH, d.D_TYPE, d.SIGGEN]
+
+    def write(self, path):
+        """Write the network to a binary netlist file at path.
+
+        Return True if successful.
+        """
+        devices = self.devices
+        device_list = devices.devices_list
+        device_indices = {device.device_id: index
+                          for index, device in enumerate(device_list)}
+        kind_indices = {kind: index
+                        for index, kind in enumerate(self.device_kinds)}
+
+        waveforms = []
+        device_names = []
+        device_kinds = []
+        device_properties = []
+        for device in device_list:
+            device_names.append(device.device_id)
+            device_kinds.append(kind_indices[device.device_kind])
+            if device.device_kind == devices.SWITCH:
+                device_properties.append(device.switch_state)
+            elif device.device_kind == devices.CLOCK:
+                device_properties.append(device.clock_half_period)
+            elif device.device_kind == devices.SIGGEN:
+                device_properties.append(len(waveforms))
+                waveforms.append(device.siggen_waveform)
+            elif device.device_kind in [devices.XOR, devices.D_TYPE]:
+                device_properties.append(-1)
+            else:
+                device_properties.append(len(device.inputs))
+
+        connections = [[] for _ in range(4)]
+        for index, device in enumerate(device_list):
+            for input_id, connection in device.inputs.items():
+                if connection is None:
+                    continue
+                output_device_id, output_id = connection
+                for column, value in zip(connections, [
+                        index, input_id, device_indices[output_device_id],
+                        output_id]):
+                    column.append(-1 if value is None else value)
+
+        monitors = [[] for _ in range(2)]
+        for device_id, output_id in self.monitors.monitors_dictionary:
+            monitors[0].append(device_indices[device_id])
+            monitors[1].append(-1 if output_id is None else output_id)
+
+        name_strings = [name.encode() for name in self.names.names]
+        waveform_strings = [waveform.encode() for waveform in waveforms]
+        blocks = [HEADER.pack(MAGIC, FORMAT_VERSION, len(name_strings),
+                              len(device_list), len(connections[0]),
+                              len(monitors[0]), len(waveform_strings))]
+        try:
+            for strings in [name_strings, waveform_strings]:
+                blocks.append(self._pack([len(string)
+                                          for string in strings]))
+                blocks.append(b"".join(strings))
+            for column in [device_names, device_kinds, device_properties] + \
+                    connections + monitors:
+                blocks.append(self._pack(column))
+        except OverflowError:  # a clock half period, for example
+            return False
+        try:
+            with open(path, "wb") as f:
+                f.writelines(blocks)
+        except OSError:
+            return False
+        return True
+
+    def load(self, path):
+        """Build the network from the binary netlist file at path.
+
+        The devices should not have been made yet. Print an
+        error message and return False if the file is not a valid binary
+        netlist, or the network it describes is not valid.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = memoryview(f.read())
+            (magic, version, name_count, device_count, connection_count,
+             monitor_count, waveform_count) = HEADER.unpack_from(data)
+            self.offset = HEADER.size
+            if magic != MAGIC or version != FORMAT_VERSION:
+                print("Error: not a binary netlist of this version")
+                return False
+
+            name_strings = self._read_strings(data, name_count)
+            waveforms = self._read_strings(data, waveform_count)
+            (device_names, device_kinds, device_properties) = [
+                self._read_array(data, device_count) for _ in range(3)]
+            connections = [self._read_array(data, connection_count)
+                           for _ in range(4)]
+            monitors = [self._read_array(data, monitor_count)
+                        for _ in range(2)]
+            # Names may be -1, but devices, kinds and indices may not
+            for integers, low, high in [
+                    (device_names, 0, name_count),
+                    (device_kinds, 0, len(self.device_kinds)),
+                    (connections[0], 0, device_count),
+                    (connections[1], -1, name_count),
+                    (connections[2], 0, device_count),
+                    (connections[3], -1, name_count),
+                    (monitors[0], 0, device_count),
+                    (monitors[1], -1, name_count)]:
+                if integers and (min(integers) < low or
+                                 max(integers) >= high):
+                    raise ValueError("index out of range")
+            return self._build(name_strings, waveforms, device_names,
+                               device_kinds, device_properties, connections,
+                               monitors)
+        except (OSError, TypeError, ValueError, IndexError, struct.error,
+                UnicodeDecodeError):
+            print("Error: could not read binary netlist")
+            return False
+
+    def _build(self, name_strings, waveforms, device_names, device_kinds,
+               device_properties, connections, monitors):
+        """Make the devices, connections and monitors that were read."""
+        devices = self.devices
+        # name_ids[i] is the ID in this names table of name i of the file,
+        # and name_ids[-1] is None
+        name_ids = self.names.lookup_many(name_strings) + [None]
+
+        device_ids = [name_ids[name] for name in device_names]
+        for device_id, kind, device_property in zip(
+                device_ids, device_kinds, device_properties):
+            device_kind = self.device_kinds[kind]
+            if device_kind == devices.SIGGEN:
+                if not 0 <= device_property < len(waveforms):
+                    raise ValueError("waveform out of range")
+                device_property = waveforms[device_property]
+            elif device_property == -1:
+                device_property = None
+            if devices.make_device(device_id, device_kind,
+                                   device_property) != devices.NO_ERROR:
+                print("Error: invalid device " +
+                      self.names.get_name_string(device_id))
+                return False
+
+        for input_index, input_name, output_index, output_name in \
+                zip(*connections):
+            if self.network.make_connection(
+                    device_ids[output_index], name_ids[output_name],
+                    device_ids[input_index], name_ids[input_name]) != \
+                    self.network.NO_ERROR:
+                print("Error: invalid connection to " +
+                      self.names.get_name_string(device_ids[input_index]))
+                return False
+        if not self.network.check_network():
+            print("Error: not all inputs are connected")
+            return False
+
+        for device_index, output_name in zip(*monitors):
+            if self.monitors.make_monitor(
+                    device_ids[device_index],
+                    name_ids[output_name]) != self.monitors.NO_ERROR:
+                print("Error: invalid monitor on " +
+                      self.names.get_name_string(device_ids[device_index]))
+                return False
+        return True
+
+    def _read_strings(self, data, count):
+        """Read count strings, after their lengths, at the current offset."""
+        lengths = self._read_array(data, count)
+        strings = []
+        offset = self.offset
+        for length in lengths:
+            if length < 0 or offset + length > len(data):
+                raise ValueError("string out of range")
+            strings.append(str(data[offset:offset + length], "utf-8"))
+            offset += length
+        self.offset = offset
+        return strings
+
+    def _read_array(self, data, count):
+        """Read an array of count integers at the current offset."""
+        typecode = str(data[self.offset:self.offset + 1], "ascii")
+        if typecode not in TYPECODES:
+            raise ValueError("invalid array typecode")
+        integers = array.array(typecode)
+        start = self.offset + 1
+        end = start + count * integers.itemsize
+        if end > len(data):
+            raise ValueError("array out of range")
+        integers.frombytes(data[start:end])
+        if sys.byteorder == "big":
+            integers.byteswap()
+        self.offset = end
+        return integers
+
+    def _pack(self, integers):
+        """Return the typecode and little-endian bytes of a list of integers.
+
+        The integers are stored with the smallest typecode that fits them.
+        Raise OverflowError if none of the typecodes fits them.
+        """
+        low = min(integers, default=0)
+        high = max(integers, default=0)
+        for typecode in TYPECODES:
+            bound = 1 << (8 * array.array(typecode).itemsize - 1)
+            if -bound <= low and high < bound:
+                break
+        else:
+            raise OverflowError("integers too large for a binary netlist")
+        packed = array.array(typecode, integers)
+        if sys.byteorder == "big":
+            packed.byteswap()
+        return typecode.encode("ascii") + packed.tobytes()
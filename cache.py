@@ -0,0 +1,189 @@
+"""Cache parsed networks so that definition files are parsed only once.
+
+Used in the Logic Simulator project to store the network built by the parser
+from a definition file in a cache directory, so that later runs on the same
+file can load it instead of scanning and parsing the file again.
+
+Classes
+-------
+NetlistCache - stores parsed networks in a cache directory.
+"""
+import gc
+import hashlib
+import os
+import tempfile
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from binary import BinaryNetlist, is_binary_netlist
+
+# Modules whose source code determines the parsed network and its classes
+SIMULATOR_MODULES = ["names", "devices", "network", "monitors", "netlist",
+                     "vectors", "traces", "stats", "scanner", "parse",
+                     "binary"]
+
+
+def get_simulator_version():
+    """Return a digest of the source code of the simulator modules."""
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for module in SIMULATOR_MODULES:
+        with open(os.path.join(directory, module + ".py"), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class NetlistCache:
+
+    """Store parsed networks in a cache directory.
+
+    Each entry is a binary netlist, as written by binary.BinaryNetlist(), of
+    the network built by the parser from one definition file. An entry is
+    found by a key made from a digest of the file's contents and of the
+    simulator's source code, so a changed file, or a changed simulator, is
+    parsed again automatically. Only networks parsed without errors are
+    stored.
+
+    Loading an entry builds the network again from its devices, connections
+    and monitors, so it is checked as a binary netlist is, and clocks and
+    D-types are given a new random cold start-up, as they would be by
+    parsing the file again. Entries are plain data, so a cache directory
+    cannot make the simulator run code.
+
+    Parameters
+    ----------
+    directory: path of the cache directory, or None to parse every time.
+
+    Public methods
+    --------------
+    get_key(self, path): Returns the cache key of a definition file, or None
+                         if it cannot be read.
+
+    load(self, key): Returns the (names, devices, network, monitors) of the
+                     entry with the key, or None if there is none.
+
+    store(self, key, names, devices, network, monitors): Stores a parsed
+                     network under the key. Returns True if successful.
+
+    parse_network(self, path): Returns the (names, devices, network,
+                     monitors) of a definition file or binary netlist,
+                     loading them from the cache if possible, or None if the
+                     file has errors.
+    """
+
+    simulator_version = None  # computed once, when first needed
+
+    def __init__(self, directory=None):
+        """Initialise the cache directory."""
+        self.directory = directory
+
+    def get_key(self, path):
+        """Return the cache key of the definition file at path.
+
+        Return None if the file cannot be read.
+        """
+        if NetlistCache.simulator_version is None:
+            NetlistCache.simulator_version = get_simulator_version()
+        digest = hashlib.sha256(NetlistCache.simulator_version.encode())
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        except (OSError, TypeError):
+            return None
+        return digest.hexdigest()
+
+    def get_entry_path(self, key):
+        """Return the path of the cache entry with the key."""
+        return os.path.join(self.directory, key + ".bin")
+
+    def load(self, key):
+        """Return the (names, devices, network, monitors) stored under key.
+
+        Return None if there is no such entry, or it cannot be read.
+        """
+        if self.directory is None or key is None:
+            return None
+        entry_path = self.get_entry_path(key)
+        if not is_binary_netlist(entry_path):
+            return None
+        names = Names()
+        devices = Devices(names)
+        network = Network(names, devices)
+        monitors = Monitors(names, devices, network)
+        # The garbage collector would otherwise run many times while the
+        # objects of a large network are made
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            loaded = BinaryNetlist(names, devices, network,
+                                   monitors).load(entry_path)
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if not loaded:
+            return None
+        return names, devices, network, monitors
+
+    def store(self, key, names, devices, network, monitors):
+        """Store the parsed network under key.
+
+        The entry is written to a temporary file first, so that it is never
+        read half-written. A network that cannot be stored, for whatever
+        reason, is only a cache miss, and the temporary file is removed.
+        Return True if successful.
+        """
+        if self.directory is None or key is None:
+            return False
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            handle, temporary_path = tempfile.mkstemp(dir=self.directory)
+            os.close(handle)
+        except OSError:
+            return False
+        try:
+            stored = BinaryNetlist(names, devices, network,
+                                   monitors).write(temporary_path)
+            if stored:
+                os.replace(temporary_path, self.get_entry_path(key))
+        except Exception:
+            stored = False
+        if not stored:
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+        return stored
+
+    def parse_network(self, path):
+        """Return the (names, devices, network, monitors) of the file at path.
+
+        A binary netlist is loaded directly. Otherwise, the network is loaded
+        from the cache if possible, or else the file is scanned and parsed,
+        and the network is stored in the cache if there are no errors.
+        Return None if the file has errors.
+        """
+        names = Names()
+        devices = Devices(names)
+        network = Network(names, devices)
+        monitors = Monitors(names, devices, network)
+        if is_binary_netlist(path):
+            if not BinaryNetlist(names, devices, network, monitors).load(path):
+                return None
+            return names, devices, network, monitors
+
+        key = self.get_key(path)
+        entry = self.load(key)
+        if entry is not None:
+            return entry
+
+        scanner = Scanner(path, names)
+        parser = Parser(names, devices, network, monitors, scanner)
+        if not parser.parse_network():
+            return None
+        self.store(key, names, devices, network, monitors)
+        return names, devices, network, monitors
@@ -0,0 +1,325 @@
+"""Save and restore the dynamic state of a simulation.
+
+Used in the Logic Simulator project to snapshot the signals, memories,
+counters, switch states and monitor traces of a network to a compact binary
+blob, and to restore them later, so that long runs can carry on from a
+warmed-up state instead of simulating it again.
+
+Classes
+-------
+Checkpoint - saves and restores the dynamic state of a network.
+"""
+import array
+import struct
+import sys
+import zlib
+
+from traces import ChangeTrace, RingTrace
+
+MAGIC = b"LOGSIMCP"
+FORMAT_VERSION = 2
+
+# Magic number, format version, fingerprint of the network, then the number
+# of simulation cycles completed
+HEADER = struct.Struct("<8sIIq")
+# Device ID, output ID, trace type, then two numbers depending on the trace
+# type: the length for an array, the length and the number of changes for a
+# change trace, or the capacity and the number of cycles ever appended for a
+# ring trace
+MONITOR = struct.Struct("<iibqq")
+
+
+class Checkpoint:
+
+    """Save and restore the dynamic state of a network.
+
+    A checkpoint holds everything that changes as the network is simulated:
+    the signal of every output, the memory of every D-type, the counter of
+    every clock and signal generator, the state of every switch, the signal
+    trace of every monitor and the number of simulation cycles completed.
+    After the header, the state is stored as arrays of little-endian
+    integers, compressed with zlib, in this order:
+
+    outputs: the signal of every output of every device, one byte each.
+    switches, D-types: one byte per switch state and per D-type memory.
+    clocks, signal generators: eight bytes per counter.
+    monitors: the number of monitors, then a record per monitor followed by
+              the signal levels (and change cycles) of its trace.
+
+    Devices are taken in the order in which they were made, so a checkpoint
+    can only be restored into the network it was saved from, or the same
+    network parsed again. The header holds a fingerprint of the devices,
+    their outputs and the connections to their inputs to check this.
+    Restoring replaces the monitors with those of the checkpoint, and makes
+    the compiled engines reload the state before their next cycle.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    get_fingerprint(self): Returns a checksum of the devices, outputs and
+                           connections.
+
+    save(self, cycles_completed): Returns the dynamic state as bytes.
+
+    restore(self, data): Restores the dynamic state from bytes. Returns the
+                         number of cycles completed, or None.
+
+    write(self, path, cycles_completed): Writes the dynamic state to a file.
+                                         Returns True if successful.
+
+    load(self, path): Restores the dynamic state from a file. Returns the
+                      number of cycles completed, or None.
+    """
+
+    def __init__(self, devices, monitors):
+        """Initialise the devices and monitors."""
+        self.devices = devices
+        self.monitors = monitors
+        self.offset = 0  # position in the checkpoint being restored
+
+    def get_fingerprint(self):
+        """Return a checksum of the devices, outputs and connections.
+
+        Each input is given with the device ID and output ID it is
+        connected to, or -1 if it is unconnected.
+        """
+        integers = []
+        for device in self.devices.devices_list:
+            integers.extend([device.device_id, device.device_kind,
+                             len(device.outputs), len(device.inputs)])
+            integers.extend(-1 if output_id is None else output_id
+                            for output_id in device.outputs)
+            for input_id, connection in device.inputs.items():
+                integers.append(input_id)
+                integers.extend([-1, -1] if connection is None else
+                                [-1 if port_id is None else port_id
+                                 for port_id in connection])
+        return zlib.crc32(self._pack("i", integers))
+
+    def save(self, cycles_completed):
+        """Return the dynamic state and cycles_completed as bytes."""
+        d = self.devices
+        device_list = d.devices_list
+        blocks = [
+            self._pack("b", [signal for device in device_list
+                             for signal in device.outputs.values()]),
+            self._pack("b", [device.switch_state for device in device_list
+                             if device.device_kind == d.SWITCH]),
+            self._pack("b", [device.dtype_memory for device in device_list
+                             if device.device_kind == d.D_TYPE]),
+            self._pack("q", [device.clock_counter for device in device_list
+                             if device.device_kind == d.CLOCK]),
+            self._pack("q", [device.siggen_counter for device in device_list
+                             if device.device_kind == d.SIGGEN]),
+            self._pack("i", [len(self.monitors.monitors_dictionary)])]
+        for (device_id, output_id), signal_list in \
+                self.monitors.monitors_dictionary.items():
+            blocks.extend(self._pack_trace(device_id, output_id,
+                                           signal_list))
+        return HEADER.pack(MAGIC, FORMAT_VERSION, self.get_fingerprint(),
+                           cycles_completed) + \
+            zlib.compress(b"".join(blocks))
+
+    def restore(self, data):
+        """Restore the dynamic state from the bytes in data.
+
+        Nothing is changed unless the whole checkpoint can be read. Print an
+        error message and return None if data is not a valid checkpoint of
+        this network, or return the number of cycles completed.
+        """
+        try:
+            magic, version, fingerprint, cycles_completed = \
+                HEADER.unpack_from(data)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                print("Error: not a checkpoint of this version")
+                return None
+            if fingerprint != self.get_fingerprint():
+                print("Error: checkpoint of a different network")
+                return None
+            decompressor = zlib.decompressobj()
+            state_data = decompressor.decompress(data[HEADER.size:])
+            if not decompressor.eof or decompressor.unused_data:
+                raise ValueError("incomplete or trailing data")
+            state = self._read_state(memoryview(state_data))
+        except (TypeError, ValueError, struct.error, zlib.error):
+            print("Error: could not read checkpoint")
+            return None
+        self._apply_state(*state)
+        return cycles_completed
+
+    def write(self, path, cycles_completed):
+        """Write the dynamic state and cycles_completed to a file at path.
+
+        Return True if successful.
+        """
+        try:
+            with open(path, "wb") as f:
+                f.write(self.save(cycles_completed))
+        except OSError:
+            return False
+        return True
+
+    def load(self, path):
+        """Restore the dynamic state from the checkpoint file at path.
+
+        Print an error message and return None if the file cannot be read or
+        is not a valid checkpoint of this network, or return the number of
+        cycles completed.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            print("Error: could not read checkpoint")
+            return None
+        return self.restore(data)
+
+    def _pack_trace(self, device_id, output_id, signal_list):
+        """Return the blocks of the monitor record and trace of a monitor."""
+        monitors = self.monitors
+        output_id = -1 if output_id is None else output_id
+        if isinstance(signal_list, ChangeTrace):
+            return [MONITOR.pack(device_id, output_id, monitors.CHANGE_TRACE,
+                                 signal_list.length,
+                                 len(signal_list.change_signals)),
+                    self._pack("q", signal_list.change_cycles),
+                    self._pack("b", signal_list.change_signals)]
+        if isinstance(signal_list, RingTrace):
+            return [MONITOR.pack(device_id, output_id, monitors.RING_TRACE,
+                                 signal_list.capacity, signal_list.total),
+                    self._pack("b", signal_list.buffer)]
+        return [MONITOR.pack(device_id, output_id, monitors.ARRAY_TRACE,
+                             len(signal_list), 0),
+                self._pack("b", signal_list)]
+
+    def _read_state(self, data):
+        """Read and check the dynamic state in the decompressed data.
+
+        Return the arrays of the state and the list of (monitor, trace) pairs.
+        Raise ValueError if the state does not fit this network.
+        """
+        d = self.devices
+        self.offset = 0
+        signals = self._read_array(data, "b", sum(
+            len(device.outputs) for device in d.devices_list))
+        switch_states, dtype_memories = [
+            self._read_array(data, "b", len(d.find_devices(kind)))
+            for kind in [d.SWITCH, d.D_TYPE]]
+        clock_counters, siggen_counters = [
+            self._read_array(data, "q", len(d.find_devices(kind)))
+            for kind in [d.CLOCK, d.SIGGEN]]
+        for integers, high in [(signals, len(d.signal_types)),
+                               (switch_states, 2), (dtype_memories, 2)]:
+            self._check_range(integers, high)
+
+        [monitor_count] = self._read_array(data, "i", 1)
+        traces = []
+        for _ in range(monitor_count):
+            (device_id, output_id, trace_type, first,
+             second) = MONITOR.unpack_from(data, self.offset)
+            self.offset += MONITOR.size
+            output_id = None if output_id == -1 else output_id
+            device = d.get_device(device_id)
+            if device is None or output_id not in device.outputs:
+                raise ValueError("monitor not in network")
+            traces.append(((device_id, output_id),
+                           self._read_trace(data, trace_type, first,
+                                            second)))
+        if self.offset != len(data):
+            raise ValueError("trailing data")
+        return (signals, switch_states, dtype_memories, clock_counters,
+                siggen_counters, traces)
+
+    def _read_trace(self, data, trace_type, first, second):
+        """Read the signal trace of a monitor at the current offset.
+
+        first and second are the numbers of the monitor record. Raise
+        ValueError if a signal is not a signal level, or the cycles of the
+        changes of a change trace are out of order or out of range.
+        """
+        monitors = self.monitors
+        signal_count = len(self.devices.signal_types)
+        if trace_type == monitors.ARRAY_TRACE:
+            trace = self._read_array(data, "b", first)
+            self._check_range(trace, signal_count)
+            return trace
+        if trace_type == monitors.CHANGE_TRACE:
+            trace = ChangeTrace()
+            trace.change_cycles = self._read_array(data, "q", second)
+            trace.change_signals = self._read_array(data, "b", second)
+            trace.length = first
+            self._check_range(trace.change_signals, signal_count)
+            self._check_range(trace.change_cycles, first)
+            if any(cycle >= next_cycle for cycle, next_cycle in
+                   zip(trace.change_cycles, trace.change_cycles[1:])):
+                raise ValueError("changes out of order")
+            return trace
+        if trace_type == monitors.RING_TRACE:
+            # The whole buffer is stored, so a capacity larger than the
+            # data left cannot be valid, and is not allocated
+            if first <= 0 or second < 0 or first > len(data) - self.offset:
+                raise ValueError("invalid ring trace")
+            trace = RingTrace(first)
+            trace.buffer = self._read_array(data, "b", first)
+            self._check_range(trace.buffer, signal_count)
+            trace.total = second
+            trace.first_cycle = max(0, second - first)
+            return trace
+        raise ValueError("invalid trace type")
+
+    def _apply_state(self, signals, switch_states, dtype_memories,
+                     clock_counters, siggen_counters, traces):
+        """Copy the state that was read into the devices and monitors."""
+        d = self.devices
+        device_list = d.devices_list
+        signal_iterator = iter(signals)
+        # The outputs dictionaries are updated in place, because the
+        # compiled netlists and the monitors refer to them
+        for device in device_list:
+            for output_id in device.outputs:
+                device.outputs[output_id] = next(signal_iterator)
+        for kind, attribute, values in [
+                (d.SWITCH, "switch_state", switch_states),
+                (d.D_TYPE, "dtype_memory", dtype_memories),
+                (d.CLOCK, "clock_counter", clock_counters),
+                (d.SIGGEN, "siggen_counter", siggen_counters)]:
+            for device_id, value in zip(d.find_devices(kind), values):
+                setattr(d.get_device(device_id), attribute, value)
+        d.state_version += 1
+        d.switch_version += 1
+
+        monitors = self.monitors
+        for device_id, output_id in list(monitors.monitors_dictionary):
+            monitors.remove_monitor(device_id, output_id)
+        for (device_id, output_id), trace in traces:
+            monitors.make_monitor(device_id, output_id)
+            monitors.monitors_dictionary[(device_id, output_id)] = trace
+
+    def _check_range(self, integers, high):
+        """Raise ValueError unless every integer is in range(high)."""
+        if integers and (min(integers) < 0 or max(integers) >= high):
+            raise ValueError("value out of range")
+
+    def _read_array(self, data, typecode, count):
+        """Read an array of count integers at the current offset."""
+        integers = array.array(typecode)
+        start = self.offset
+        end = start + count * integers.itemsize
+        if count < 0 or end > len(data):
+            raise ValueError("array out of range")
+        integers.frombytes(data[start:end])
+        if sys.byteorder == "big":
+            integers.byteswap()
+        self.offset = end
+        return integers
+
+    def _pack(self, typecode, integers):
+        """Return the little-endian bytes of the integers as typecode."""
+        packed = array.array(typecode, integers)
+        if sys.byteorder == "big":
+            packed.byteswap()
+        return packed.tobytes()
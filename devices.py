@@ -50,7 +50,8 @@ class Devices:
     """Make and store devices.
 
     This class contains many functions for making devices and ports.
-    It stores all the devices in a list.
+    It stores all the devices in a list, and indexes them by device ID and by
+    device kind so that lookups do not need to scan the list.
 
     Parameters
     ----------
@@ -98,6 +99,8 @@ class Devices:
 
     cold_startup(self): Simulates cold start-up of D-types and clocks.
 
+    cold_start_device(self, device): Simulates cold start-up of one device.
+
     make_device(self, device_id, device_kind, device_property=None): Creates
                        the specified device and returns errors if unsuccessful.
     """
@@ -109,6 +112,22 @@ class Devices:
 
         self.devices_list = []
 
+        # devices_dict stores {device_id: Device}
+        self.devices_dict = {}
+
+        # devices_by_kind stores {device_kind: [device_id, ...]}, in the order
+        # in which the devices were added
+        self.devices_by_kind = {}
+
+        # Counters that are incremented whenever devices, inputs or outputs
+        # are added (topology_version), when the network is cold started
+        # (state_version), or when switches are set (switch_version). A
+        # compiled netlist uses them to tell whether it is out of date, and
+        # reloads only the switches when just switch_version has changed.
+        self.topology_version = 0
+        self.state_version = 0
+        self.switch_version = 0
+
         gate_strings = ["AND", "OR", "NAND", "NOR", "XOR"]
         device_strings = ["CLOCK", "SWITCH", "DTYPE", "SIGGEN"]
         dtype_inputs = ["CLK", "SET", "CLEAR", "DATA"]
@@ -139,11 +158,11 @@ class Devices:
         self.max_gate_inputs = 16
 
     def get_device(self, device_id):
-        """Return the Device object corresponding to device_id."""
-        for device in self.devices_list:
-            if device.device_id == device_id:
-                return device
-        return None
+        """Return the Device object corresponding to device_id.
+
+        Return None if there is no such device.
+        """
+        return self.devices_dict.get(device_id)
 
     def find_devices(self, device_kind=None):
         """Return a list of device IDs of the specified device_kind.
@@ -151,19 +170,19 @@ class Devices:
         Return a list of all device IDs in the network if no device_kind is
         specified.
         """
-        device_id_list = []
-        for device in self.devices_list:
-            if device_kind is None:
-                device_id_list.append(device.device_id)
-            elif device.device_kind == device_kind:
-                device_id_list.append(device.device_id)
-        return device_id_list
+        if device_kind is None:
+            return [device.device_id for device in self.devices_list]
+        # Return a copy so that callers cannot corrupt the index
+        return list(self.devices_by_kind.get(device_kind, []))
 
     def add_device(self, device_id, device_kind):
         """Add the specified device to the network."""
         new_device = Device(device_id)
         new_device.device_kind = device_kind
         self.devices_list.append(new_device)
+        self.devices_dict[device_id] = new_device
+        self.devices_by_kind.setdefault(device_kind, []).append(device_id)
+        self.topology_version += 1
 
     def add_input(self, device_id, input_id):
         """Add the specified input to the specified device.
@@ -172,7 +191,9 @@ class Devices:
         """
         device = self.get_device(device_id)
         if device is not None:
-            device.inputs.setdefault(input_id)
+            if input_id not in device.inputs:
+                device.inputs[input_id] = None
+                self.topology_version += 1
             return True
         else:
             return False
@@ -184,6 +205,8 @@ class Devices:
         """
         device = self.get_device(device_id)
         if device is not None:
+            if output_id not in device.outputs:
+                self.topology_version += 1
             device.outputs[output_id] = signal
             return True
         else:
@@ -212,8 +235,7 @@ class Devices:
 
     def get_signal_ids(self, signal_name):
         """Return the device and output IDs of the specified signal."""
-        name_string_list = signal_name.split(".")
-        name_id_list = self.names.lookup(name_string_list)
+        name_id_list = self.names.lookup_many(signal_name.split("."))
         device_id = name_id_list[0]
         if len(name_id_list) == 2:
             output_id = name_id_list[1]
@@ -234,6 +256,7 @@ class Devices:
             return False
         else:
             device.switch_state = signal
+            self.switch_version += 1
             return True
 
     def make_switch(self, device_id, initial_state):
@@ -251,7 +274,8 @@ class Devices:
         self.add_device(device_id, self.CLOCK)
         device = self.get_device(device_id)
         device.clock_half_period = clock_half_period
-        self.cold_startup()  # clock initialised to a random point in its cycle
+        # clock initialised to a random point in its cycle
+        self.cold_start_device(device)
 
     def make_siggen(self, device_id, waveform):
         """Make a signal generator device with the specified signal.
@@ -269,9 +293,10 @@ class Devices:
         self.add_device(device_id, device_kind)
         self.add_output(device_id, output_id=None)
 
-        for input_number in range(1, no_of_inputs + 1):
-            input_name = "".join(["I", str(input_number)])
-            [input_id] = self.names.lookup([input_name])
+        input_ids = self.names.lookup_many(
+            "".join(["I", str(input_number)])
+            for input_number in range(1, no_of_inputs + 1))
+        for input_id in input_ids:
             self.add_input(device_id, input_id)
 
     def make_d_type(self, device_id):
@@ -281,7 +306,8 @@ class Devices:
             self.add_input(device_id, input_id)
         for output_id in self.dtype_output_ids:
             self.add_output(device_id, output_id)
-        self.cold_startup()  # D-type initialised to a random state
+        # D-type initialised to a random state
+        self.cold_start_device(self.get_device(device_id))
 
     def cold_startup(self):
         """Simulate cold start-up of D-types, signal generators and clocks.
@@ -290,21 +316,26 @@ class Devices:
         begin from a random point in their cycles. Make signal generator
         start from initial value
         """
+        self.state_version += 1
         for device in self.devices_list:
-            if device.device_kind == self.D_TYPE:
-                device.dtype_memory = random.choice([self.LOW, self.HIGH])
-
-            elif device.device_kind == self.CLOCK:
-                clock_signal = random.choice([self.LOW, self.HIGH])
-                self.add_output(device.device_id, output_id=None,
-                                signal=clock_signal)
-                # Initialise it to a random point in its cycle.
-                device.clock_counter = \
-                    random.randrange(device.clock_half_period)
-            elif device.device_kind == self.SIGGEN:
-                device.siggen_counter = 0
-                self.add_output(device.device_id, output_id=None,
-                                signal=int(device.siggen_waveform[0]))
+            self.cold_start_device(device)
+
+    def cold_start_device(self, device):
+        """Simulate cold start-up of one D-type, signal generator or clock."""
+        if device.device_kind == self.D_TYPE:
+            device.dtype_memory = random.choice([self.LOW, self.HIGH])
+
+        elif device.device_kind == self.CLOCK:
+            clock_signal = random.choice([self.LOW, self.HIGH])
+            self.add_output(device.device_id, output_id=None,
+                            signal=clock_signal)
+            # Initialise it to a random point in its cycle.
+            device.clock_counter = \
+                random.randrange(device.clock_half_period)
+        elif device.device_kind == self.SIGGEN:
+            device.siggen_counter = 0
+            self.add_output(device.device_id, output_id=None,
+                            signal=int(device.siggen_waveform[0]))
 
     def binary_checker(self, value):
         """Ensures that value only contains 0s or 1s."""
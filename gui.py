@@ -26,6 +26,7 @@ from network import Network
 from monitors import Monitors
 from scanner import Scanner
 from parse import Parser
+from checkpoint import Checkpoint
 
 global_cycles_completed = 0
 
@@ -116,12 +117,8 @@ class MyGLCanvas2D(wxcanvas.GLCanvas):
         # Draw specified text at position (10, 10)
         self.render_text(text, 10, 10)
 
-        for device_id, output_id in self.monitors.monitors_dictionary:
-            i = list(
-                self.monitors.monitors_dictionary.keys()).index(
-                (device_id, output_id))
-            signal_list = self.monitors.monitors_dictionary[(
-                device_id, output_id)]
+        for i, ((device_id, output_id), signal_list) in enumerate(
+                self.monitors.monitors_dictionary.items()):
             signal_name = self.devices.get_signal_name(device_id, output_id)
 
             GL.glBegin(GL.GL_LINE_STRIP)
@@ -144,6 +141,14 @@ class MyGLCanvas2D(wxcanvas.GLCanvas):
 
             self.labels_position(i, signal_name)
 
+        # Label a window of ring traces with its absolute cycle numbers
+        first_cycle = self.monitors.get_first_cycle()
+        if first_cycle:
+            length = max(len(signal_list) for signal_list in
+                         self.monitors.monitors_dictionary.values())
+            for j in range(0, length, 10):
+                self.render_text(str(first_cycle + j), (j * 20) + 60, 35)
+
         # We have been drawing to the back buffer, flush the graphics pipeline
         # and swap the back buffer to the front
         GL.glFlush()
@@ -396,16 +401,15 @@ class MyGLCanvas3D(wxcanvas.GLCanvas):
         # Clear everything
         GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
 
-        for device_id, output_id in self.monitors.monitors_dictionary:
-            i = list(
-                self.monitors.monitors_dictionary.keys()).index(
-                (device_id, output_id))
+        for i, ((device_id, output_id), signal_list) in enumerate(
+                self.monitors.monitors_dictionary.items()):
             GL.glColor3f(self.colours[i%8][0], self.colours[i%8][1], self.colours[i%8][2])
             x = (i - len(self.monitors.monitors_dictionary)/2)*20
-            signal_list = self.monitors.monitors_dictionary[(
-                device_id, output_id)]
 
             signal_name = self.devices.get_signal_name(device_id, output_id)
+            first_cycle = self.monitors.get_first_cycle()
+            if first_cycle:  # label the window with its first cycle number
+                signal_name += " (from cycle " + str(first_cycle) + ")"
 
             self.render_text(signal_name, x, 0, 10*len(signal_list)+10)
 
@@ -800,7 +804,8 @@ class Gui(wx.Frame):
     on_text_box(self, event): Event handler for when the user enters text.
     """
 
-    def __init__(self, title, path, names, devices, network, monitors):
+    def __init__(self, title, path, names, devices, network, monitors,
+                 vcd_path=None, engine=None):
         """Initialise widgets and layout."""
         super().__init__(parent=None, title=title, size=(800, 600))
 
@@ -809,10 +814,18 @@ class Gui(wx.Frame):
         self.devices = devices
         self.monitors = monitors
         self.network = network
+        # Engine to run the network on, or None to keep its current engine
+        if engine is not None:
+            network.set_engine(engine)
+        # VCD file to stream the monitored signals to on each run, or None
+        self.vcd_path = vcd_path
         # Setting up the file menu
         self.fileMenu = wx.Menu()
         self.fileMenu.Append(102, _(u"&About"))
         self.fileMenu.Append(wx.ID_OPEN, _(u"&Open"))
+        self.fileMenu.Append(104, _(u"&Statistics"))
+        self.fileMenu.Append(105, _(u"Save &checkpoint"))
+        self.fileMenu.Append(106, _(u"&Load checkpoint"))
         self.fileMenu.Append(103, _(u"&Quit"))
 
         # Create the menu bar
@@ -936,6 +949,9 @@ class Gui(wx.Frame):
         self.lblLogWindow.SetLabel(_(u"Console"))
         self.fileMenu.SetLabel(102, _(u"About"))
         self.fileMenu.SetLabel(103, _(u"Quit"))
+        self.fileMenu.SetLabel(104, _(u"Statistics"))
+        self.fileMenu.SetLabel(105, _(u"Save &checkpoint"))
+        self.fileMenu.SetLabel(106, _(u"&Load checkpoint"))
         self.menuBar.SetMenuLabel(0, _(u"File"))
         self.fileMenu.SetLabel(wx.ID_OPEN, _(u"&Open"))
 
@@ -973,12 +989,37 @@ class Gui(wx.Frame):
         if Id == 103:
             exitconf = self.exitconfirmation.ShowModal()
             if exitconf == wx.ID_YES:
+                self.monitors.stop_vcd()
                 self.Close(True)
         if Id == 102:
             wx.MessageBox(
                 _(u"Display the signal traces at different monitored outputs.  \nRed trace represents '1', blue trace represents '0'.\nOutputs to be monitored can be selected by clicking 'Monitor'.\nSwitches levels can be selected by clicking 'Set Switches'"),
                 _(u"About Logsim"),
                 wx.ICON_INFORMATION | wx.OK)
+        if Id == 104:
+            # Statistics are only collected once they have been asked for
+            stats = self.network.get_stats()
+            if stats is None:
+                self.network.enable_stats()
+                print(_(u"Collecting simulation statistics from now on."))
+            else:
+                wx.MessageBox("\n".join(stats.format_lines()),
+                              _(u"Simulation statistics"),
+                              wx.ICON_INFORMATION | wx.OK)
+        if Id == 105:
+            with wx.FileDialog(self, _(u"Save checkpoint"),
+                               style=wx.FD_SAVE |
+                               wx.FD_OVERWRITE_PROMPT) as fileDialog:
+                if fileDialog.ShowModal() == wx.ID_CANCEL:
+                    return
+                self.save_checkpoint(fileDialog.GetPath())
+        if Id == 106:
+            with wx.FileDialog(self, _(u"Load checkpoint"),
+                               style=wx.FD_OPEN |
+                               wx.FD_FILE_MUST_EXIST) as fileDialog:
+                if fileDialog.ShowModal() == wx.ID_CANCEL:
+                    return
+                self.load_checkpoint(fileDialog.GetPath())
 
         if Id == wx.ID_OPEN:
             with wx.FileDialog(self) as fileDialog:
@@ -990,6 +1031,8 @@ class Gui(wx.Frame):
                 app = wx.App()
                 error = ErrorFrame()
 
+                # The new network runs on the engine of the old one
+                engine = self.network.engine
                 names = Names()
                 devices = Devices(names)
                 network = Network(names, devices)
@@ -1019,7 +1062,8 @@ class Gui(wx.Frame):
                                 self.names,
                                 self.devices,
                                 self.network,
-                                self.monitors)
+                                self.monitors,
+                                engine=engine)
                     gui.Show(True)
                 except:
                     pass
@@ -1124,8 +1168,13 @@ class Gui(wx.Frame):
 
         if cycles is not None:  # if the number of cycles provided is valid
             self.monitors.reset_monitors()
+            if self.vcd_path is not None:  # start a new VCD file
+                if not self.monitors.start_vcd(self.vcd_path):
+                    print(_(u"Error! Could not write VCD file."))
             print("".join([_(u"Running for "), str(cycles), _(u" cycles")]))
             self.devices.cold_startup()
+            if self.network.get_stats() is not None:
+                self.network.get_stats().reset()
             if self.run_network(cycles):
                 global_cycles_completed += cycles
 
@@ -1148,6 +1197,36 @@ class Gui(wx.Frame):
                 print(" ".join([_(u"Continuing for"), str(cycles_cont), _(u"cycles."), _(u"Total:"), str(
                     global_cycles_completed)]))
 
+    def save_checkpoint(self, path):
+        """Save the state of the simulation to a checkpoint file."""
+        if Checkpoint(self.devices, self.monitors).write(
+                path, global_cycles_completed):
+            print(_(u"Saved checkpoint after"), global_cycles_completed,
+                  _(u"cycles."))
+        else:
+            print(_(u"Error! Could not write checkpoint."))
+
+    def load_checkpoint(self, path):
+        """Restore the state of the simulation from a checkpoint file."""
+        global global_cycles_completed
+        global hold
+        global hold_monitor
+        cycles_completed = Checkpoint(self.devices,
+                                      self.monitors).load(path)
+        if cycles_completed is None:
+            print(_(u"Error! Could not load checkpoint."))
+            return
+        global_cycles_completed = cycles_completed
+        # The dialogs show the restored switches and monitors
+        hold = {}
+        hold_monitor = {}
+        print(_(u"Loaded checkpoint after"), global_cycles_completed,
+              _(u"cycles."))
+        if self.state == 0:
+            self.canvas_2d.render(_(u"Checkpoint loaded"), True)
+        else:
+            self.canvas_3d.render()
+
     def run_network(self, cycles):
         """Run the network for the specified number of simulation cycles.
 
@@ -1158,7 +1237,12 @@ class Gui(wx.Frame):
                 self.monitors.record_signals()
             else:
                 print(_(u"Error! Network oscillating."))
+                message = self.network.get_oscillation_message()
+                if message is not None:
+                    print(message)
+                self.monitors.flush_vcd()
                 return False
+        self.monitors.flush_vcd()
         self.monitors.display_signals()
         text = "The signal trace is printed"
         if self.state == 0:
@@ -7,14 +7,41 @@ runs either the command line user interface or the graphical user interface.
 Usage
 -----
 Show help: logsim.py -h
-Command line user interface: logsim.py -c <file path>
-Graphical user interface: logsim.py <file path>
+Command line user interface: logsim.py -c <file path> [-o <VCD file>]
+                             [-d <cache directory>] [-l <iterations>]
+Switch sweep: logsim.py -s <cycles> [-j <processes>] [-d <cache directory>]
+              [-k <checkpoint file>] <file path> [<switch>=<state>,... ...]
+Graphical user interface: logsim.py [-o <VCD file>] [-d <cache directory>]
+                          [-l <iterations>] <file path>
+Write a binary netlist: logsim.py -b <binary file> [-d <cache directory>]
+                        <file path>
+Batch run: logsim.py -r <file path> -n <cycles> [-o <VCD file>]
+           [-d <cache directory>] [-l <iterations>] [-p]
+           [-k <checkpoint file>] [-w <checkpoint file>]
+
+With -d, parsed networks are cached in the directory, so that a definition
+file is only parsed again when it changes. A binary netlist can be given
+wherever a definition file can. With -l, each simulation cycle may take up
+to the given number of iterations to settle, instead of a limit derived from
+the logic depth of the network.
+
+A batch run simulates the network for the given number of cycles without any
+user interface, and writes the monitored signals to the VCD file, or displays
+them in the text console if there is none. It does not import wx or OpenGL,
+so it can run on machines without a display. With -p, it also prints
+statistics about the simulation cycles. With -k, the run carries on from the
+state saved in a checkpoint file, instead of a cold start-up, and with -w,
+the state at the end of the run is saved to a checkpoint file.
+
+A switch sweep runs the network once for each switch assignment, in a pool
+of processes, displays the traces of every run, and then compares each run
+with the first one. With -k, every run starts from the warm state saved in a
+checkpoint file, so that what-if changes to the switches can be explored
+without simulating the warm-up again.
 """
 import getopt
 import sys
 
-import wx
-
 from names import Names
 from devices import Devices
 from network import Network
@@ -22,12 +49,131 @@ from monitors import Monitors
 from scanner import Scanner
 from parse import Parser
 from userint import UserInterface
-from gui import Gui
-from gui import ErrorFrame
-import app_base as ab
+from cache import NetlistCache
+from binary import BinaryNetlist
+from checkpoint import Checkpoint
+from sweep import Sweep
 
 #from devices import Device
 
+def run_sweep(cycles, processes, arguments, cache_directory=None,
+              checkpoint_path=None):
+    """Run the definition file in arguments for each switch assignment.
+
+    The assignments follow the file path in arguments. If there are none,
+    every combination of switch states is run. Every run starts from the
+    checkpoint file at checkpoint_path, if any. The traces of the runs are
+    displayed, then compared with those of the first run. Return True if
+    successful.
+    """
+    if not cycles.isdigit() or (processes is not None and
+                                not processes.isdigit()):
+        print("Error: cycles and processes must be whole numbers\n")
+        return False
+    if processes is not None:
+        processes = int(processes)
+    if len(arguments) == 0:
+        print("Error: file path required\n")
+        return False
+    sweep = Sweep(arguments[0], int(cycles), processes,
+                  cache_directory=cache_directory,
+                  checkpoint_path=checkpoint_path)
+    if not sweep.load():
+        return False
+    if len(arguments) == 1:  # enumerate every combination of switch states
+        assignments = sweep.enumerate_assignments()
+    else:
+        assignments = []
+        for text in arguments[1:]:
+            assignment = sweep.read_assignment(text)
+            if assignment is None:
+                print("Error: invalid switch assignment " + text + "\n")
+                return False
+            assignments.append(assignment)
+    sweep.display_sweep(sweep.run(assignments))
+    return True
+
+
+def write_binary(binary_path, arguments, cache_directory=None):
+    """Write the network of the file in arguments as a binary netlist.
+
+    Return True if successful.
+    """
+    if len(arguments) != 1:
+        print("Error: one file path required\n")
+        return False
+    parsed = NetlistCache(cache_directory).parse_network(arguments[0])
+    if parsed is None:
+        return False
+    if not BinaryNetlist(*parsed).write(binary_path):
+        print("Error: could not write " + binary_path + "\n")
+        return False
+    return True
+
+
+def run_batch(path, cycles, vcd_path=None, cache_directory=None,
+              statistics=False, iteration_limit=None, checkpoint_path=None,
+              save_path=None):
+    """Run the definition file at path for the number of cycles in cycles.
+
+    The monitored signals are streamed to the VCD file at vcd_path without
+    being kept in memory, or displayed in the text console at the end of the
+    run if vcd_path is None. If statistics is True, statistics about the
+    simulation cycles are printed at the end. iteration_limit is the number
+    of iterations allowed for each cycle to settle, or None to derive it from
+    the network. The run starts from the checkpoint file at checkpoint_path,
+    if any, and its final state is saved to the checkpoint file at
+    save_path, if any, in which case the signal traces are kept in memory
+    even while streaming to a VCD file. Return True if successful.
+    """
+    if cycles is None or not cycles.isdigit():
+        print("Error: number of cycles required\n")
+        return False
+    parsed = NetlistCache(cache_directory).parse_network(path)
+    if parsed is None:
+        return False
+    names, devices, network, monitors = parsed
+    # The compiled engine gives the same results as the object engine faster
+    network.set_engine(network.COMPILED_ENGINE)
+    network.set_iteration_limit(iteration_limit)
+    if statistics:
+        network.enable_stats()
+    checkpoint = Checkpoint(devices, monitors)
+    cycles_completed = 0
+    if checkpoint_path is not None:
+        cycles_completed = checkpoint.load(checkpoint_path)
+        if cycles_completed is None:
+            return False
+    if vcd_path is not None and not monitors.start_vcd(
+            vcd_path, keep_traces=save_path is not None):
+        print("Error: could not write " + vcd_path + "\n")
+        return False
+
+    execute_network = network.execute_network
+    record_signals = monitors.record_signals
+    successful = True
+    for _ in range(int(cycles)):
+        if not execute_network():
+            print("Error! Network oscillating.")
+            message = network.get_oscillation_message()
+            if message is not None:
+                print(message)
+            successful = False
+            break
+        record_signals()
+    if vcd_path is not None:
+        monitors.stop_vcd()
+    elif successful:
+        monitors.display_signals()
+    if statistics:
+        print("\n".join(network.get_stats().format_lines()))
+    if successful and save_path is not None:
+        if not checkpoint.write(save_path, cycles_completed + int(cycles)):
+            print("Error: could not write " + save_path + "\n")
+            return False
+    return successful
+
+
 def main(arg_list):
     """Parse the command line options and arguments specified in arg_list.
 
@@ -36,10 +182,24 @@ def main(arg_list):
     """
     usage_message = ("Usage:\n"
                      "Show help: logsim.py -h\n"
-                     "Command line user interface: logsim.py -c <file path>\n"
-                     "Graphical user interface: logsim.py <file path> or logsim.py")
+                     "Command line user interface: logsim.py -c <file path> "
+                     "[-o <VCD file>] [-d <cache directory>] "
+                     "[-l <iterations>]\n"
+                     "Switch sweep: logsim.py -s <cycles> [-j <processes>] "
+                     "[-d <cache directory>] [-k <checkpoint file>] "
+                     "<file path> [<switch>=<state>,... ...]\n"
+                     "Graphical user interface: logsim.py [-o <VCD file>] "
+                     "[-d <cache directory>] [-l <iterations>] <file path> "
+                     "or logsim.py\n"
+                     "Write a binary netlist: logsim.py -b <binary file> "
+                     "[-d <cache directory>] <file path>\n"
+                     "Batch run: logsim.py -r <file path> -n <cycles> "
+                     "[-o <VCD file>] [-d <cache directory>] "
+                     "[-l <iterations>] [-p] [-k <checkpoint file>] "
+                     "[-w <checkpoint file>]")
     try:
-        options, arguments = getopt.getopt(arg_list, "hc:")
+        options, arguments = getopt.getopt(arg_list,
+                                           "hc:s:j:o:d:b:r:n:pl:k:w:")
     except getopt.GetoptError:
         print("Error: invalid command line arguments\n")
         print(usage_message)
@@ -50,6 +210,17 @@ def main(arg_list):
     devices = Devices(names)
     network = Network(names, devices)
     monitors = Monitors(names, devices, network)
+    # Parsed networks are cached in the directory given with -d, if any
+    cache = NetlistCache(dict(options).get("-d"))
+    # Iterations allowed for each cycle to settle, given with -l, or None to
+    # derive the limit from the network
+    iteration_limit = dict(options).get("-l")
+    if iteration_limit is not None:
+        if not iteration_limit.isdigit() or int(iteration_limit) == 0:
+            print("Error: iteration limit must be a positive number\n")
+            print(usage_message)
+            sys.exit()
+        iteration_limit = int(iteration_limit)
     #device = Device(self.names.lookup([names]))
     #names = None
     #devices = None
@@ -61,14 +232,47 @@ def main(arg_list):
             print(usage_message)
             sys.exit()
         elif option == "-c":  # use the command line user interface
-            scanner = Scanner(path, names)
-            parser = Parser(names, devices, network, monitors, scanner)
-            if parser.parse_network():
-                # Initialise an instance of the userint.UserInterface() class
-                userint = UserInterface(names, devices, network, monitors)
+            parsed = cache.parse_network(path)
+            if parsed is not None:
+                names, devices, network, monitors = parsed
+                network.set_iteration_limit(iteration_limit)
+                # Initialise an instance of the userint.UserInterface() class.
+                # After switches are set, the event-driven engine
+                # re-evaluates only the devices that the new switch signals
+                # reach.
+                userint = UserInterface(names, devices, network, monitors,
+                                        dict(options).get("-o"),
+                                        network.EVENT_ENGINE)
                 userint.command_interface()
+        elif option == "-s":  # run the file for many switch assignments
+            if not run_sweep(path, dict(options).get("-j"), arguments,
+                             dict(options).get("-d"),
+                             dict(options).get("-k")):
+                print(usage_message)
+            sys.exit()
+        elif option == "-b":  # write the network as a binary netlist
+            if not write_binary(path, arguments, dict(options).get("-d")):
+                print(usage_message)
+            sys.exit()
+        elif option == "-r":  # run the network without a user interface
+            if not run_batch(path, dict(options).get("-n"),
+                             dict(options).get("-o"), dict(options).get("-d"),
+                             "-p" in dict(options), iteration_limit,
+                             dict(options).get("-k"),
+                             dict(options).get("-w")):
+                sys.exit(1)  # so that scripts can tell the run failed
+            sys.exit()
+
+    # Use the graphical user interface if no option other than -o, -d or -l
+    # is given
+    if not [option for option, value in options
+            if option not in ["-o", "-d", "-l"]]:
+        # The GUI modules are only imported here, so that the other modes
+        # do not need wx or OpenGL
+        import app_base as ab
+        from gui import Gui
+        from gui import ErrorFrame
 
-    if not options:  # no option given, use the graphical user interface
         app = ab.BaseApp(redirect=False)
         error = ErrorFrame()
         
@@ -79,7 +283,7 @@ def main(arg_list):
             scanner = Scanner(path, names)
             parser = Parser(names, devices, network, monitors, scanner)
             gui = Gui("LogicSim", path, names, devices, network,
-                      monitors)
+                      monitors, engine=network.EVENT_ENGINE)
             gui.Show(True)
     
         elif len(arguments) != 0 and len(arguments) != 1:
@@ -89,15 +293,17 @@ def main(arg_list):
 
         else:
             [path] = arguments
-            scanner = Scanner(path, names)
-            parser = Parser(names, devices, network, monitors, scanner)
-            if parser.parse_network():
+            parsed = cache.parse_network(path)
+            if parsed is not None:
+                names, devices, network, monitors = parsed
+                network.set_iteration_limit(iteration_limit)
                 # Initialise an instance of the gui.Gui() class
                 #import app_base as ab
                 #app = ab.BaseApp(redirect=False)
                 #app = wx.App()
                 gui = Gui("LogicSim", path, names, devices, network,
-                      monitors)
+                          monitors, dict(options).get("-o"),
+                          network.EVENT_ENGINE)
                 gui.Show(True)
         
         error.ShowModal()
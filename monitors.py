@@ -8,8 +8,12 @@ Classes
 Monitors - records and displays specified output signals.
 
 """
+import array
 import collections
 
+from traces import ChangeTrace, RingTrace
+from vcd import VcdWriter
+
 
 class Monitors:
 
@@ -45,6 +49,22 @@ class Monitors:
     get_margin(self): Returns the length of the longest monitor's name.
 
     display_signals(self): Displays signal trace(s) in the text console.
+
+    set_trace_type(self, trace_type, capacity=None): Selects how the signal
+                                 traces of new monitors are stored.
+
+    make_trace(self, cycles_completed=0): Returns a new signal trace of the
+                                          selected type.
+
+    get_first_cycle(self): Returns the absolute cycle number of the first
+                           signal level retained in the traces.
+
+    start_vcd(self, path, flush_interval=1000, keep_traces=True): Starts
+                  streaming the monitored signals to a VCD file.
+
+    flush_vcd(self): Writes the buffered VCD lines to the file.
+
+    stop_vcd(self): Stops streaming to the VCD file and closes it.
     """
 
     def __init__(self, names, devices, network):
@@ -54,12 +74,37 @@ class Monitors:
         self.devices = devices
 
         # monitors_dictionary stores
-        # {(device_id, output_id): [signal_list]}
+        # {(device_id, output_id): signal_list}, where each signal_list is a
+        # compact array with one signed byte per simulation cycle, a
+        # traces.ChangeTrace() storing only the cycles at which it changes,
+        # or a traces.RingTrace() retaining only the last ring_capacity cycles
         self.monitors_dictionary = collections.OrderedDict()
+        self.trace_types = [self.ARRAY_TRACE, self.CHANGE_TRACE,
+                            self.RING_TRACE] = range(3)
+        self.trace_type = self.ARRAY_TRACE
+        self.ring_capacity = None
+
+        # monitor_refs stores {(device_id, output_id): (outputs, output_id)},
+        # where outputs is the outputs dictionary of the device, so that
+        # signals are read without looking the device up every cycle
+        self.monitor_refs = {}
+        # (append method of the trace, outputs, output_id) of every monitor,
+        # in order, or None if the monitors have changed since it was built
+        self.recorders = None
+
+        # vcd.VcdWriter() streaming the monitored signals, if any, and
+        # whether the signal traces are still recorded in memory as well
+        self.vcd_writer = None
+        self.keep_traces = True
 
         [self.NO_ERROR, self.NOT_OUTPUT,
          self.MONITOR_PRESENT] = self.names.unique_error_codes(3)
 
+        # Symbol used by display_signals for each signal level
+        self.symbols = {devices.HIGH: "-", devices.LOW: "_",
+                        devices.RISING: "/", devices.FALLING: "\\",
+                        devices.BLANK: " "}
+
     def make_monitor(self, device_id, output_id, cycles_completed=0):
         """Add the specified signal to the monitors dictionary.
 
@@ -74,13 +119,92 @@ class Monitors:
             return self.MONITOR_PRESENT
         else:
             # If n simulation cycles have been completed before making this
-            # monitor, then initialise the signal trace with an n-length list
-            # of BLANK signals. Otherwise, initialise the trace with an empty
-            # list.
-            self.monitors_dictionary[(device_id, output_id)] = [
-                self.devices.BLANK] * cycles_completed
+            # monitor, then initialise the signal trace with n BLANK signals.
+            # Otherwise, initialise the trace empty.
+            self.monitors_dictionary[(device_id, output_id)] = \
+                self.make_trace(cycles_completed)
+            self.monitor_refs[(device_id, output_id)] = (
+                monitor_device.outputs, output_id)
+            self.recorders = None
             return self.NO_ERROR
 
+    def set_trace_type(self, trace_type, capacity=None):
+        """Select how the signal traces of new monitors are stored.
+
+        ARRAY_TRACE stores one byte per simulation cycle. CHANGE_TRACE stores
+        only the cycles at which the signal changes, which uses much less
+        memory for signals that rarely change. RING_TRACE retains only the
+        last capacity cycles, in a buffer of fixed size. Traces already
+        recorded keep their type until the monitors are reset. Return True
+        if successful.
+        """
+        if trace_type not in self.trace_types:
+            return False
+        if trace_type == self.RING_TRACE:
+            if not isinstance(capacity, int) or capacity <= 0:
+                return False
+        elif capacity is not None:
+            return False
+        self.trace_type = trace_type
+        self.ring_capacity = capacity
+        return True
+
+    def make_trace(self, cycles_completed=0):
+        """Return a new signal trace of cycles_completed BLANK signals."""
+        if self.trace_type == self.CHANGE_TRACE:
+            trace = ChangeTrace()
+            trace.append(self.devices.BLANK, cycles_completed)
+            return trace
+        if self.trace_type == self.RING_TRACE:
+            trace = RingTrace(self.ring_capacity, self.devices.BLANK)
+            trace.append(self.devices.BLANK, cycles_completed)
+            return trace
+        return array.array("b", [self.devices.BLANK]) * cycles_completed
+
+    def get_first_cycle(self):
+        """Return the absolute cycle number of the first signal retained.
+
+        This is 0 unless ring traces have dropped their oldest cycles.
+        """
+        first_cycle = 0
+        for signal_list in self.monitors_dictionary.values():
+            if isinstance(signal_list, RingTrace):
+                first_cycle = max(first_cycle, signal_list.first_cycle)
+        return first_cycle
+
+    def start_vcd(self, path, flush_interval=1000, keep_traces=True):
+        """Start streaming the monitored signals to a VCD file at path.
+
+        The file is written every flush_interval simulation cycles, and the
+        time steps count the cycles recorded from now on. The signals written
+        are those monitored now. If keep_traces is False, the signal traces
+        are no longer recorded in memory, so that long runs use no memory for
+        them. Any previous VCD file is closed. Return True if successful.
+        """
+        if not isinstance(flush_interval, int) or flush_interval <= 0:
+            return False
+        self.stop_vcd()
+        try:
+            self.vcd_writer = VcdWriter(path, self.devices,
+                                        self.monitors_dictionary,
+                                        flush_interval)
+        except OSError:
+            return False
+        self.keep_traces = keep_traces
+        return True
+
+    def flush_vcd(self):
+        """Write the buffered VCD lines to the file, if streaming."""
+        if self.vcd_writer is not None:
+            self.vcd_writer.flush()
+
+    def stop_vcd(self):
+        """Stop streaming to the VCD file and close it."""
+        if self.vcd_writer is not None:
+            self.vcd_writer.close()
+            self.vcd_writer = None
+        self.keep_traces = True
+
     def remove_monitor(self, device_id, output_id):
         """Remove the specified signal from the monitors dictionary.
 
@@ -90,6 +214,8 @@ class Monitors:
             return False
         else:
             del self.monitors_dictionary[(device_id, output_id)]
+            del self.monitor_refs[(device_id, output_id)]
+            self.recorders = None
             return True
 
     def get_monitor_signal(self, device_id, output_id):
@@ -97,20 +223,30 @@ class Monitors:
 
         If the monitor does not exist, return None.
         """
-        if (device_id, output_id) in self.monitors_dictionary:
-            return self.network.get_output_signal(device_id, output_id)
+        if (device_id, output_id) in self.monitor_refs:
+            outputs, output_id = self.monitor_refs[(device_id, output_id)]
+            return outputs[output_id]
         else:
             return None
 
     def record_signals(self):
         """Record the current signal level for every monitor.
 
-        This function is called at every simulation cycle.
+        This function is called at every simulation cycle. The output of each
+        monitor is resolved once, when the monitor is made, so recording only
+        copies the signal levels into the traces.
         """
-        for device_id, output_id in self.monitors_dictionary:
-            signal_level = self.get_monitor_signal(device_id, output_id)
-            self.monitors_dictionary[(device_id,
-                                      output_id)].append(signal_level)
+        if self.recorders is None:
+            self.recorders = [(signal_list.append,) + self.monitor_refs[key]
+                              for key, signal_list in
+                              self.monitors_dictionary.items()]
+        if self.keep_traces:
+            for append, outputs, output_id in self.recorders:
+                append(outputs[output_id])
+        if self.vcd_writer is not None:
+            self.vcd_writer.write_signals(
+                [outputs[output_id]
+                 for outputs, output_id in self.vcd_writer.refs])
 
     def get_signal_names(self):
         """Return two signal name lists: monitored and not monitored."""
@@ -136,7 +272,9 @@ class Monitors:
         The list of stored signal levels for each monitor is deleted.
         """
         for device_id, output_id in self.monitors_dictionary:
-            self.monitors_dictionary[(device_id, output_id)] = []
+            self.monitors_dictionary[(device_id, output_id)] = \
+                self.make_trace()
+        self.recorders = None
 
     def get_margin(self):
         """Return the length of the longest monitor's name.
@@ -156,22 +294,19 @@ class Monitors:
             return None
 
     def display_signals(self):
-        """Display the signal trace(s) in the text console."""
+        """Display the signal trace(s) in the text console.
+
+        If the oldest cycles are no longer retained, the traces are preceded
+        by the absolute cycle number of their first signal.
+        """
         margin = self.get_margin()
+        first_cycle = self.get_first_cycle()
+        if first_cycle:
+            print(margin * " " + ": cycle " + str(first_cycle))
         for device_id, output_id in self.monitors_dictionary:
             monitor_name = self.devices.get_signal_name(device_id, output_id)
             name_length = len(monitor_name)
             signal_list = self.monitors_dictionary[(device_id, output_id)]
             print(monitor_name + (margin - name_length) * " ", end=": ")
-            for signal in signal_list:
-                if signal == self.devices.HIGH:
-                    print("-", end="")
-                if signal == self.devices.LOW:
-                    print("_", end="")
-                if signal == self.devices.RISING:
-                    print("/", end="")
-                if signal == self.devices.FALLING:
-                    print("\\", end="")
-                if signal == self.devices.BLANK:
-                    print(" ", end="")
-            print("\n", end="")
+            print("".join([self.symbols.get(signal, "")
+                           for signal in signal_list]))
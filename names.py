@@ -34,15 +34,22 @@ class Names:
     lookup(self, name_string_list): Returns a list of name IDs for each
                         name string. Adds a name if not already present.
 
+    lookup_many(self, name_strings): Returns a list of name IDs for every name
+                        string in any iterable. Adds names not already present.
+
     get_name_string(self, name_id): Returns the corresponding name string for
                         the name ID. Returns None if the ID is not present.
     """
 
     def __init__(self):
-        """Initialise names list."""
+        """Initialise names list and the name ID dictionary."""
         self.error_code_count = 0  # how many error codes have been declared
         self.names = []
 
+        # name_ids stores {name_string: name_id}, so that the ID of a name
+        # string can be found without searching the names list
+        self.name_ids = {}
+
     def unique_error_codes(self, num_error_codes):
         """Return a list of unique integer error codes."""
         if not isinstance(num_error_codes, int):
@@ -57,8 +64,8 @@ class Names:
         If the name string is not present in the names list, return None.
         """
         try:
-            return self.names.index(name_string)
-        except BaseException:
+            return self.name_ids.get(name_string)
+        except TypeError:  # unhashable name_string
             return None
 
     def lookup(self, name_string_list):
@@ -66,14 +73,25 @@ class Names:
 
         If the name string is not present in the names list, add it.
         """
+        return self.lookup_many(name_string_list)
+
+    def lookup_many(self, name_strings):
+        """Return a list of name IDs for each name string in name_strings.
+
+        name_strings can be any iterable, such as a generator. If a name string
+        is not present in the names list, add it. New names are given the next
+        free ID, so IDs are numbered in the order in which names are added.
+        """
+        names = self.names
+        name_ids = self.name_ids
         ID_list = []
-        for name_string in name_string_list:
-            ID = self.query(name_string)
+        for name_string in name_strings:
+            ID = name_ids.get(name_string)
             if ID is None:
-                self.names.append(name_string)
-                ID_list.append(self.names.index(name_string))
-            else:
-                ID_list.append(ID)
+                ID = len(names)
+                names.append(name_string)
+                name_ids[name_string] = ID
+            ID_list.append(ID)
         return ID_list
 
     def get_name_string(self, name_id):
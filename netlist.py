@@ -0,0 +1,590 @@
+"""Compile the network into flat arrays and execute it quickly.
+
+Used in the Logic Simulator project to flatten the devices and connections
+built by the parser into integer-indexed arrays, and to execute simulation
+cycles on those arrays instead of on the Device objects.
+
+Classes
+-------
+Netlist - stores the compiled network and executes it.
+"""
+import heapq
+
+from oscillation import OscillationDetector
+
+
+class Netlist:
+
+    """Store the compiled network and execute it.
+
+    Every device is given an index and every output port is given a signal
+    slot. For each device index, the netlist stores the device kind, the slots
+    its inputs are connected to and the slots of its outputs. Executing the
+    netlist gives the same results as Network.execute_network() on the Device
+    objects, which remain the authoritative copy of the network between
+    cycles: the dynamic state is loaded from them when it has been changed
+    from outside (by cold_startup, for example) and stored back into them
+    after every cycle. When only switches have been set, only their states
+    are loaded, and the event-driven engine re-evaluates just the switches
+    that changed and the devices that their new signals reach.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    is_stale(self): Returns True if devices or connections have been added
+                    since the netlist was compiled.
+
+    load_state(self): Copies the dynamic state of the devices into the arrays.
+
+    load_switches(self): Copies the switch states that have been set since
+                         they were loaded. Returns the indices of the
+                         switches whose state changed.
+
+    update_generators(self): Sets clock and siggen signals to RISING or
+                             FALLING, as needed. Returns the indices of the
+                             generators whose signal changed.
+
+    store_state(self): Copies the dynamic state in the arrays back into the
+                       devices.
+
+    execute(self): Executes all the devices in the netlist for one
+                   simulation cycle.
+
+    execute_events(self): Executes one simulation cycle, re-evaluating only
+                          the devices whose inputs or outputs have changed.
+
+    get_state(self): Returns the output signals and D-type memories as bytes.
+    """
+
+    def __init__(self, devices, network):
+        """Flatten the devices and connections into arrays."""
+        self.devices = devices
+        self.network = network
+        self.topology_version = devices.topology_version
+        self.state_version = None  # dynamic state has not been loaded yet
+        self.switch_version = None
+
+        # Signal slots: one for every output port in the network
+        self.slot_ports = []  # slot -> (device_id, output_id)
+        self.slot_ids = {}  # (device_id, output_id) -> slot
+        self.slot_refs = []  # slot -> (device.outputs, output_id)
+        self.slot_indices = []  # slot -> index of the device it belongs to
+        self.signals = []  # slot -> signal level
+
+        # Device tables, indexed by the position of the device in the
+        # execution order
+        self.device_ids = []
+        self.device_refs = []
+        self.device_kinds = []
+        # D-type inputs are in CLK, SET, CLEAR, DATA order and D-type
+        # outputs are in Q, QBAR order
+        self.input_slots = []
+        self.output_slots = []
+        self.gate_rules = []  # (x, y) pair of each gate, see execute_gate
+        self.switch_targets = []
+        self.dtype_memories = []
+        self.counters = []  # clock_counter or siggen_counter
+        self.half_periods = []
+        self.waveforms = []
+
+        # True if any input in the network is unconnected
+        self.unconnected = False
+
+        # Device indices that the event-driven engine must evaluate in the
+        # next cycle. None means that every device must be evaluated.
+        self.pending = None
+
+        # UPDATE[signal][target] is the result of Network.update_signal() for
+        # target LOW (0) and HIGH (1), or None if the update is unsuccessful
+        d = devices
+        self.UPDATE = [None] * len(d.signal_types)
+        for signal in d.signal_types:
+            if signal in [d.LOW, d.FALLING]:
+                self.UPDATE[signal] = (d.LOW, d.RISING)
+            elif signal in [d.HIGH, d.RISING]:
+                self.UPDATE[signal] = (d.FALLING, d.HIGH)
+            else:
+                self.UPDATE[signal] = (None, None)
+
+        for device_id in devices.find_devices():
+            device = devices.get_device(device_id)
+            for output_id in device.outputs:
+                self.slot_ids[(device_id, output_id)] = len(self.slot_ports)
+                self.slot_ports.append((device_id, output_id))
+                self.slot_refs.append((device.outputs, output_id))
+                self.signals.append(device.outputs[output_id])
+                self.slot_indices.append(None)
+
+        # Devices are executed in the same order as execute_network(), with
+        # the gates in topological order
+        self.switch_indices = self._add_devices(d.find_devices(d.SWITCH))
+        self.dtype_indices = self._add_devices(d.find_devices(d.D_TYPE))
+        self.clock_indices = self._add_devices(d.find_devices(d.CLOCK))
+        self.siggen_indices = self._add_devices(d.find_devices(d.SIGGEN))
+        self.generator_indices = self.clock_indices + self.siggen_indices
+        gate_order, self.depth = network.levelize()
+        self.gate_indices = self._add_devices(gate_order)
+        for index in self.gate_indices:
+            self.gate_rules[index] = network.gate_rules[
+                self.device_kinds[index]]
+
+        # Devices are indexed in execution order. executors[index] is the
+        # method that executes the device with that index.
+        self.order = range(len(self.device_ids))
+        self.executors = [None] * len(self.device_ids)
+        for index in self.switch_indices:
+            self.executors[index] = self._execute_switch
+        for index in self.dtype_indices:
+            self.executors[index] = self._execute_d_type
+        for index in self.generator_indices:
+            self.executors[index] = self._execute_generator
+        for index in self.gate_indices:
+            self.executors[index] = self._execute_gate
+
+        # Device ID of each byte of get_state()
+        self.state_devices = [device_id for device_id, output_id
+                              in self.slot_ports] + \
+            [self.device_ids[index] for index in self.dtype_indices]
+
+        # fanout[slot] is the list of device indices with an input connected
+        # to that slot
+        self.fanout = [[] for slot in self.slot_ports]
+        for index in self.order:
+            for slot in set(self.input_slots[index]):
+                if slot is not None:
+                    self.fanout[slot].append(index)
+
+    def _add_devices(self, device_ids):
+        """Add the devices in device_ids to the tables, in order.
+
+        Return the list of their indices.
+        """
+        d = self.devices
+        indices = []
+        for device_id in device_ids:
+            device = d.get_device(device_id)
+            device_kind = device.device_kind
+            if device_kind == d.D_TYPE:
+                input_ids = [d.CLK_ID, d.SET_ID, d.CLEAR_ID, d.DATA_ID]
+                output_ids = [d.Q_ID, d.QBAR_ID]
+            else:
+                input_ids = list(device.inputs)
+                output_ids = list(device.outputs)
+
+            input_slots = []
+            for input_id in input_ids:
+                connected_output = device.inputs.get(input_id)
+                if connected_output is None:
+                    self.unconnected = True
+                    input_slots.append(None)
+                else:
+                    input_slots.append(self.slot_ids[connected_output])
+
+            indices.append(len(self.device_ids))
+            for output_id in output_ids:
+                self.slot_indices[self.slot_ids[(device_id, output_id)]] = \
+                    len(self.device_ids)
+            self.device_ids.append(device_id)
+            self.device_refs.append(device)
+            self.device_kinds.append(device_kind)
+            self.input_slots.append(tuple(input_slots))
+            self.output_slots.append(tuple(self.slot_ids[(device_id,
+                                                          output_id)]
+                                           for output_id in output_ids))
+            self.gate_rules.append(None)
+            self.switch_targets.append(None)
+            self.dtype_memories.append(None)
+            self.counters.append(None)
+            self.half_periods.append(device.clock_half_period)
+            self.waveforms.append(device.siggen_waveform)
+        return indices
+
+    def is_stale(self):
+        """Return True if the network has changed since it was compiled."""
+        return self.topology_version != self.devices.topology_version
+
+    def load_state(self):
+        """Copy the dynamic state of the devices into the arrays."""
+        d = self.devices
+        signals = self.signals
+        for slot, (outputs, output_id) in enumerate(self.slot_refs):
+            signals[slot] = outputs[output_id]
+        for index in self.switch_indices:
+            switch_state = self.device_refs[index].switch_state
+            self.switch_targets[index] = 0 if switch_state == d.LOW else 1
+        for index in self.dtype_indices:
+            self.dtype_memories[index] = self.device_refs[index].dtype_memory
+        for index in self.clock_indices:
+            self.counters[index] = self.device_refs[index].clock_counter
+        for index in self.siggen_indices:
+            self.counters[index] = self.device_refs[index].siggen_counter
+        self.state_version = d.state_version
+        self.switch_version = d.switch_version
+        self.pending = None
+
+    def load_switches(self):
+        """Copy the switch states that have been set since they were loaded.
+
+        Return the list of indices of the switches whose state changed.
+        """
+        d = self.devices
+        if self.switch_version == d.switch_version:
+            return []
+        changed_indices = []
+        for index in self.switch_indices:
+            switch_state = self.device_refs[index].switch_state
+            target = 0 if switch_state == d.LOW else 1
+            if self.switch_targets[index] != target:
+                self.switch_targets[index] = target
+                changed_indices.append(index)
+        self.switch_version = d.switch_version
+        return changed_indices
+
+    def store_state(self):
+        """Copy the dynamic state in the arrays back into the devices."""
+        signals = self.signals
+        for slot, (outputs, output_id) in enumerate(self.slot_refs):
+            outputs[output_id] = signals[slot]
+        for index in self.dtype_indices:
+            self.device_refs[index].dtype_memory = self.dtype_memories[index]
+        for index in self.clock_indices:
+            self.device_refs[index].clock_counter = self.counters[index]
+        for index in self.siggen_indices:
+            self.device_refs[index].siggen_counter = self.counters[index]
+
+    def update_clocks(self):
+        """If it is time to do so, set clock signals to RISING or FALLING.
+
+        Return the list of indices of the clocks whose signal changed.
+        """
+        d = self.devices
+        signals = self.signals
+        counters = self.counters
+        changed_indices = []
+        for index in self.clock_indices:
+            if counters[index] == self.half_periods[index]:
+                counters[index] = 0
+                [slot] = self.output_slots[index]
+                if signals[slot] == d.HIGH:
+                    signals[slot] = d.FALLING
+                    changed_indices.append(index)
+                elif signals[slot] == d.LOW:
+                    signals[slot] = d.RISING
+                    changed_indices.append(index)
+            counters[index] += 1
+        return changed_indices
+
+    def update_siggens(self):
+        """If it is time to do so, set siggen signals to RISING or FALLING.
+
+        Return the list of indices of the siggens whose signal changed.
+        """
+        d = self.devices
+        signals = self.signals
+        counters = self.counters
+        changed_indices = []
+        for index in self.siggen_indices:
+            waveform = self.waveforms[index]
+            if counters[index] == len(waveform):
+                counters[index] = 0
+            [slot] = self.output_slots[index]
+            signal = signals[slot]
+            if waveform[counters[index]] == "0":
+                signals[slot] = d.FALLING
+            elif waveform[counters[index]] == "1":
+                signals[slot] = d.RISING
+            if signals[slot] != signal:
+                changed_indices.append(index)
+            counters[index] += 1
+        return changed_indices
+
+    def update_generators(self):
+        """Set clock and siggen signals to RISING or FALLING, as needed.
+
+        Return the list of indices of the generators whose signal changed.
+        The time taken is added to the statistics, if they are enabled.
+        """
+        stats = self.network.stats
+        if stats is None:
+            return self.update_clocks() + self.update_siggens()
+        return stats.timed(self.update_clocks, "update_clocks") + \
+            stats.timed(self.update_siggens, "update_siggens")
+
+    def execute(self):
+        """Execute all the devices in the netlist for one simulation cycle.
+
+        Return True if successful and the network does not oscillate.
+        """
+        if self.state_version != self.devices.state_version:
+            self.load_state()
+        self.load_switches()
+        if self.unconnected:
+            return False
+
+        self.update_generators()
+
+        # Number of iterations to wait for the signals to settle before
+        # declaring the network unstable
+        iteration_limit = self.network.get_iteration_limit()
+        detector = OscillationDetector(self.state_devices)
+
+        steady_state = False
+        iterations = 0
+        while iterations < iteration_limit:
+            iterations += 1
+            changed = self._sweep()
+            if changed is None:  # a signal update was unsuccessful
+                steady_state = False
+                break
+            if not changed:
+                steady_state = True
+                break
+            if detector.add_state(self.get_state()):
+                break
+
+        self.store_state()
+        self.pending = None  # the event-driven engine must start afresh
+        self.network.steady_state = steady_state
+        self.network.iterations = iterations
+        self.network.oscillation = detector.get_oscillation()
+        return steady_state
+
+    def execute_events(self):
+        """Execute one simulation cycle, evaluating only devices with events.
+
+        A device is evaluated in a sweep only if one of its inputs has changed
+        since it was last evaluated, or if its own outputs changed when it was
+        last evaluated (a RISING signal still has to become HIGH, for
+        example). Any other device would leave its outputs unchanged, so the
+        sweeps give exactly the same signals as execute(), and the network
+        settles or oscillates after the same number of sweeps. Return True if
+        successful and the network does not oscillate.
+        """
+        if self.state_version != self.devices.state_version:
+            self.load_state()
+        switched_indices = self.load_switches()
+        if self.unconnected:
+            return False
+
+        fanout = self.fanout
+        executors = self.executors
+        output_slots = self.output_slots
+        device_kinds = self.device_kinds
+        stats = self.network.stats
+
+        if self.pending is None:
+            pending = set(self.order)
+        else:
+            pending = self.pending
+            # Only the devices reached by the new switch signals can change,
+            # and the sweeps below find them through the fan-out
+            pending.update(switched_indices)
+        changed_slots = set()
+        for index in self.update_generators():
+            [slot] = output_slots[index]
+            changed_slots.add(slot)
+            pending.add(index)
+            pending.update(fanout[slot])
+
+        # Number of iterations to wait for the signals to settle before
+        # declaring the network unstable
+        iteration_limit = self.network.get_iteration_limit()
+        detector = OscillationDetector(self.state_devices)
+
+        steady_state = False
+        iterations = 0
+        while iterations < iteration_limit:
+            iterations += 1
+            # Devices are evaluated in index order. A device whose input
+            # changes later in the sweep is evaluated in this sweep, and one
+            # whose input changes earlier in the sweep waits for the next.
+            sweep = list(pending)
+            heapq.heapify(sweep)
+            queued = pending
+            pending = set()
+            changed = False
+            while sweep:
+                index = heapq.heappop(sweep)
+                result = executors[index](index)
+                if stats is not None:
+                    stats.count_evaluation(device_kinds[index], result)
+                if result is None:  # a signal update was unsuccessful
+                    sweep = None
+                    break
+                if result:
+                    changed = True
+                    pending.add(index)
+                    for slot in output_slots[index]:
+                        changed_slots.add(slot)
+                        for reader in fanout[slot]:
+                            if reader <= index:
+                                pending.add(reader)
+                            elif reader not in queued:
+                                queued.add(reader)
+                                heapq.heappush(sweep, reader)
+            if sweep is None:
+                pending = None
+                break
+            if not changed:
+                steady_state = True
+                break
+            if detector.add_state(self.get_state()):
+                break
+
+        if steady_state:
+            self._store_changes(changed_slots)
+        else:
+            self.store_state()
+        self.pending = pending
+        self.network.steady_state = steady_state
+        self.network.iterations = iterations
+        self.network.oscillation = detector.get_oscillation()
+        return steady_state
+
+    def get_state(self):
+        """Return the output signals and D-type memories as bytes.
+
+        There is one byte for each signal slot, followed by one for the
+        memory of each D-type.
+        """
+        return bytes(self.signals) + bytes(map(self.dtype_memories.__getitem__,
+                                               self.dtype_indices))
+
+    def _store_changes(self, changed_slots):
+        """Copy the changed signals and the device states into the devices."""
+        signals = self.signals
+        slot_refs = self.slot_refs
+        memories = self.dtype_memories
+        for slot in changed_slots:
+            outputs, output_id = slot_refs[slot]
+            outputs[output_id] = signals[slot]
+            # A settled D-type output always follows its memory, so the memory
+            # can only have changed if an output has
+            index = self.slot_indices[slot]
+            if memories[index] is not None:
+                self.device_refs[index].dtype_memory = memories[index]
+        for index in self.clock_indices:
+            self.device_refs[index].clock_counter = self.counters[index]
+        for index in self.siggen_indices:
+            self.device_refs[index].siggen_counter = self.counters[index]
+
+    def _sweep(self):
+        """Execute every device once, in order.
+
+        Return True if any output signal changed, False if none did, or None
+        if a signal update was unsuccessful.
+        """
+        executors = self.executors
+        device_kinds = self.device_kinds
+        stats = self.network.stats
+        changed = False
+        for index in self.order:
+            result = executors[index](index)
+            if stats is not None:
+                stats.count_evaluation(device_kinds[index], result)
+            if result:
+                changed = True
+            elif result is None:
+                return None
+        return changed
+
+    def _execute_switch(self, index):
+        """Update the switch output towards its switch state.
+
+        Return True if the output changed, False if it did not, or None if
+        the update was unsuccessful.
+        """
+        signals = self.signals
+        [slot] = self.output_slots[index]
+        signal = signals[slot]
+        new_signal = self.UPDATE[signal][self.switch_targets[index]]
+        if new_signal is None:
+            return None
+        signals[slot] = new_signal
+        return new_signal != signal
+
+    def _execute_d_type(self, index):
+        """Update the D-type memory and outputs from its inputs.
+
+        Return True if an output changed, False if none did, or None if the
+        update was unsuccessful.
+        """
+        d = self.devices
+        signals = self.signals
+        clk_slot, set_slot, clear_slot, data_slot = self.input_slots[index]
+        memory = self.dtype_memories[index]
+        if signals[clk_slot] == d.RISING:
+            data_signal = signals[data_slot]
+            if data_signal == d.HIGH or data_signal == d.FALLING:
+                memory = d.HIGH
+            elif data_signal == d.LOW or data_signal == d.RISING:
+                memory = d.LOW
+        if signals[set_slot] == d.HIGH:
+            memory = d.HIGH
+        if signals[clear_slot] == d.HIGH:
+            memory = d.LOW
+        self.dtype_memories[index] = memory
+
+        q_slot, qbar_slot = self.output_slots[index]
+        q_signal = signals[q_slot]
+        qbar_signal = signals[qbar_slot]
+        new_q = self.UPDATE[q_signal][memory != d.LOW]
+        new_qbar = self.UPDATE[qbar_signal][memory == d.LOW]
+        if new_q is None or new_qbar is None:
+            return None
+        signals[q_slot] = new_q
+        signals[qbar_slot] = new_qbar
+        return new_q != q_signal or new_qbar != qbar_signal
+
+    def _execute_generator(self, index):
+        """Complete a RISING or FALLING clock or signal generator transition.
+
+        Return True if the output changed, False if it did not, or None if
+        the output signal is invalid.
+        """
+        d = self.devices
+        signals = self.signals
+        [slot] = self.output_slots[index]
+        signal = signals[slot]
+        if signal == d.RISING:
+            signals[slot] = d.HIGH
+            return True
+        elif signal == d.FALLING:
+            signals[slot] = d.LOW
+            return True
+        elif signal == d.HIGH or signal == d.LOW:
+            return False
+        else:
+            return None
+
+    def _execute_gate(self, index):
+        """Update the gate output from its inputs, as in execute_gate.
+
+        Return True if the output changed, False if it did not, or None if
+        the update was unsuccessful.
+        """
+        signals = self.signals
+        x, y = self.gate_rules[index]
+        if x is None:  # XOR: output is high only if both inputs differ
+            first_slot, second_slot = self.input_slots[index]
+            if signals[first_slot] == signals[second_slot]:
+                target = 0
+            else:
+                target = 1
+        else:  # if all inputs are x, output is y, else the inverse of y
+            target = y
+            for slot in self.input_slots[index]:
+                if signals[slot] != x:
+                    target = 1 - y
+                    break
+        [slot] = self.output_slots[index]
+        signal = signals[slot]
+        new_signal = self.UPDATE[signal][target]
+        if new_signal is None:
+            return None
+        signals[slot] = new_signal
+        return new_signal != signal
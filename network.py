@@ -6,6 +6,11 @@ Classes
 --------
 Network - builds and executes the network.
 """
+import time
+
+from netlist import Netlist
+from oscillation import OscillationDetector
+from stats import SimulationStats
 
 
 class Network:
@@ -63,8 +68,32 @@ class Network:
     update_siggens(self): If it is time to do so, sets siggen signals to RISING
                          or FALLING.
 
+    set_engine(self, engine): Selects the engine used by execute_network.
+
+    compile_network(self): Compiles the network into a netlist of flat arrays.
+
+    levelize(self): Returns the gate IDs in topological order and the logic
+                    depth of the network.
+
+    set_iteration_limit(self, iteration_limit=None): Sets the number of
+                         iterations allowed for signals to settle.
+
+    get_iteration_limit(self): Returns the number of iterations allowed for
+                               signals to settle.
+
     execute_network(self): Executes all the devices in the network for one
                            simulation cycle.
+
+    get_oscillation(self): Returns the loop length and the toggling devices
+                           of an oscillation found in the last cycle, or None.
+
+    get_oscillation_message(self): Returns a message saying why the last
+                                   cycle did not settle, or None.
+
+    enable_stats(self, enabled=True): Turns the collection of simulation
+                                      statistics on or off.
+
+    get_stats(self): Returns the statistics collected, or None.
     """
 
     def __init__(self, names, devices):
@@ -77,6 +106,41 @@ class Network:
          self.DEVICE_ABSENT] = self.names.unique_error_codes(6)
         self.steady_state = True  # for checking if signals have settled
 
+        # The object engine executes the Device objects directly. The compiled
+        # engine executes a netlist.Netlist() compiled from them, which gives
+        # the same results faster. The event engine executes the same netlist,
+        # but only re-evaluates devices whose inputs or outputs have changed.
+        # The vector engine executes it with vectorised NumPy operations,
+        # which is fastest for very large networks.
+        self.engine_types = [self.OBJECT_ENGINE, self.COMPILED_ENGINE,
+                             self.EVENT_ENGINE, self.VECTOR_ENGINE] = range(4)
+        self.engine = self.OBJECT_ENGINE
+        self.netlist = None
+        self.vector_netlist = None
+
+        # (x, y) pairs of each gate kind, see execute_gate
+        self.gate_rules = {devices.AND: (devices.HIGH, devices.HIGH),
+                           devices.OR: (devices.LOW, devices.LOW),
+                           devices.NAND: (devices.HIGH, devices.LOW),
+                           devices.NOR: (devices.LOW, devices.HIGH),
+                           devices.XOR: (None, None)}
+
+        # Cached result of levelize(), with the topology_version it is for
+        self.levelized = None
+
+        # Number of iterations allowed for signals to settle, or None to
+        # derive it from the logic depth of the network
+        self.iteration_limit = None
+        # Number of iterations the last cycle took to settle, and the
+        # (loop length, toggling device IDs) of the oscillation that stopped
+        # it, if any, set by every engine
+        self.iterations = 0
+        self.oscillation = None
+
+        # stats.SimulationStats() instance, or None if statistics are not
+        # being collected
+        self.stats = None
+
     def get_connected_output(self, device_id, input_id):
         """Return the output connected to the given input.
 
@@ -137,6 +201,7 @@ class Network:
                 # Make connection
                 first_device.inputs[first_port_id] = (second_device_id,
                                                       second_port_id)
+                self.devices.topology_version += 1
                 error_type = self.NO_ERROR
             else:  # second_port_id is not a valid input or output port
                 error_type = self.PORT_ABSENT
@@ -152,6 +217,7 @@ class Network:
                 else:
                     second_device.inputs[second_port_id] = (first_device_id,
                                                             first_port_id)
+                    self.devices.topology_version += 1
                     error_type = self.NO_ERROR
             else:
                 error_type = self.PORT_ABSENT
@@ -392,35 +458,226 @@ class Network:
                 device.outputs[None] = self.devices.RISING
             device.siggen_counter += 1
 
+    def set_engine(self, engine):
+        """Select the engine used by execute_network.
+
+        Return True if successful.
+        """
+        if engine not in self.engine_types:
+            return False
+        self.engine = engine
+        if self.netlist is not None:
+            # The other engine may have changed the devices, so reload them
+            self.netlist.state_version = None
+        if self.vector_netlist is not None:
+            self.vector_netlist.state_version = None
+        return True
+
+    def compile_network(self):
+        """Compile the network into a netlist of flat arrays.
+
+        Return the netlist.Netlist() instance.
+        """
+        self.netlist = Netlist(self.devices, self)
+        return self.netlist
+
+    def levelize(self):
+        """Return the gate IDs in evaluation order, and the logic depth.
+
+        Gates are sorted topologically, so that each gate comes after the
+        gates driving its inputs. The network is cut at the outputs of
+        switches, clocks, signal generators and D-types, which only change
+        at the start of a sweep. Gates in a combinational loop stay together
+        in their original order, and count the size of the loop towards the
+        depth. Otherwise gates keep the order in which they were added. The
+        result is cached until the network changes.
+        """
+        if self.levelized is not None and \
+                self.levelized[0] == self.devices.topology_version:
+            return self.levelized[1:]
+
+        gate_ids = []
+        for gate_kind in self.devices.gate_types:
+            gate_ids.extend(self.devices.find_devices(gate_kind))
+        position = {device_id: i for i, device_id in enumerate(gate_ids)}
+
+        # drivers[i] lists the gates driving the inputs of gate i
+        drivers = []
+        for device_id in gate_ids:
+            device = self.devices.get_device(device_id)
+            gate_drivers = set()
+            for connected_output in device.inputs.values():
+                if connected_output is not None and \
+                        connected_output[0] in position:
+                    gate_drivers.add(position[connected_output[0]])
+            drivers.append(sorted(gate_drivers))
+
+        # Find the strongly connected components (loops) with Tarjan's
+        # algorithm, iteratively. Components are found drivers first.
+        index_of = [None] * len(gate_ids)
+        low_link = [0] * len(gate_ids)
+        on_stack = [False] * len(gate_ids)
+        stack = []
+        components = []
+        next_index = 0
+        for root in range(len(gate_ids)):
+            if index_of[root] is not None:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, child = work.pop()
+                if child == 0:
+                    index_of[node] = low_link[node] = next_index
+                    next_index += 1
+                    stack.append(node)
+                    on_stack[node] = True
+                if child < len(drivers[node]):
+                    work.append((node, child + 1))
+                    driver = drivers[node][child]
+                    if index_of[driver] is None:
+                        work.append((driver, 0))
+                    elif on_stack[driver]:
+                        low_link[node] = min(low_link[node], index_of[driver])
+                    continue
+                if low_link[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(sorted(component))
+                if work:
+                    parent = work[-1][0]
+                    low_link[parent] = min(low_link[parent], low_link[node])
+
+        # Each component is one level deeper than its deepest driver, or as
+        # many levels deeper as it has gates if it is a loop
+        level = [0] * len(gate_ids)
+        gate_order = []
+        depth = 0
+        for component in components:
+            members = set(component)
+            component_level = 0
+            for member in component:
+                for driver in drivers[member]:
+                    if driver not in members:
+                        component_level = max(component_level, level[driver])
+            component_level += len(component)
+            for member in component:
+                level[member] = component_level
+                gate_order.append(gate_ids[member])
+            depth = max(depth, component_level)
+
+        self.levelized = (self.devices.topology_version, gate_order, depth)
+        return self.levelized[1:]
+
+    def set_iteration_limit(self, iteration_limit=None):
+        """Set the number of iterations allowed for signals to settle.
+
+        If iteration_limit is None, the limit is derived from the logic depth
+        of the network. Return True if successful.
+        """
+        if iteration_limit is not None:
+            if not isinstance(iteration_limit, int) or iteration_limit <= 0:
+                return False
+        self.iteration_limit = iteration_limit
+        return True
+
+    def get_iteration_limit(self):
+        """Return the number of iterations allowed for signals to settle.
+
+        Unless a limit has been set, this is at least 20, and enough for
+        twice the logic depth of the network: every level of gates needs one
+        sweep to see its new inputs and one for its output to settle from
+        RISING or FALLING. Networks that oscillate are usually stopped well
+        before the limit, as soon as their signals repeat.
+        """
+        if self.iteration_limit is not None:
+            return self.iteration_limit
+        depth = self.levelize()[1]
+        return max(20, 2 * (depth + 2))
+
     def execute_network(self):
         """Execute all the devices in the network for one simulation cycle.
 
+        Return True if successful and the network does not oscillate. The
+        sweeps stop early if the output signals and D-type memories return to
+        a state they have been in before, since the network would then loop
+        forever; get_oscillation() describes the loop.
+        """
+        stats = self.stats
+        if stats is None:
+            return self._execute_cycle()
+        iteration_limit = self.get_iteration_limit()
+        self.iterations = 0  # in case the cycle fails before settling
+        start = time.perf_counter()
+        successful = self._execute_cycle()
+        stats.record_cycle(self.iterations, iteration_limit, successful,
+                           time.perf_counter() - start)
+        return successful
+
+    def _execute_cycle(self):
+        """Execute one simulation cycle on the current engine.
+
         Return True if successful and the network does not oscillate.
         """
+        self.oscillation = None
+        if self.engine != self.OBJECT_ENGINE:
+            if self.netlist is None or self.netlist.is_stale():
+                self.compile_network()
+            if self.engine == self.EVENT_ENGINE:
+                return self.netlist.execute_events()
+            if self.engine == self.VECTOR_ENGINE:
+                if self.vector_netlist is None or \
+                        self.vector_netlist.netlist is not self.netlist:
+                    # NumPy is only imported when the vector engine is used
+                    from vectors import VectorNetlist
+                    self.vector_netlist = VectorNetlist(self.devices, self,
+                                                        self.netlist)
+                return self.vector_netlist.execute()
+            return self.netlist.execute()
+
         clock_devices = self.devices.find_devices(self.devices.CLOCK)
         siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
         switch_devices = self.devices.find_devices(self.devices.SWITCH)
         d_type_devices = self.devices.find_devices(self.devices.D_TYPE)
-        and_devices = self.devices.find_devices(self.devices.AND)
-        or_devices = self.devices.find_devices(self.devices.OR)
-        nand_devices = self.devices.find_devices(self.devices.NAND)
-        nor_devices = self.devices.find_devices(self.devices.NOR)
-        xor_devices = self.devices.find_devices(self.devices.XOR)
-
-        # This sets clock signals to RISING or FALLING, where necessary
-        self.update_clocks()
-
-        # This sets siggen signals to RISING or FALLING, where necessary
-        self.update_siggens()
+        # Gates are executed in topological order, with their (x, y) pairs
+        gate_devices = [(device_id, self.gate_rules[
+            self.devices.get_device(device_id).device_kind])
+            for device_id in self.levelize()[0]]
+
+        stats = self.stats
+        if stats is None:
+            # This sets clock signals to RISING or FALLING, where necessary
+            self.update_clocks()
+
+            # This sets siggen signals to RISING or FALLING, where necessary
+            self.update_siggens()
+        else:
+            stats.timed(self.update_clocks, "update_clocks")
+            stats.timed(self.update_siggens, "update_siggens")
 
         # Number of iterations to wait for the signals to settle before
         # declaring the network unstable
-        iteration_limit = 20
+        iteration_limit = self.get_iteration_limit()
+        # The states are laid out as in netlist.Netlist.get_state()
+        device_list = [self.devices.get_device(device_id)
+                       for device_id in self.devices.find_devices()]
+        d_type_list = [self.devices.get_device(device_id)
+                       for device_id in d_type_devices]
+        detector = OscillationDetector(
+            [device.device_id for device in device_list
+             for output_id in device.outputs] + d_type_devices)
 
         iterations = 0
         while iterations < iteration_limit:
             iterations += 1
             self.steady_state = True
+            if stats is not None:
+                # Devices only change their own outputs in a sweep
+                old_signals = self._get_state(device_list, [])
 
             for device_id in switch_devices:  # execute switch devices
                 if not self.execute_switch(device_id):
@@ -436,25 +693,62 @@ class Network:
             for device_id in siggen_devices:
                 if not self.execute_siggen(device_id):
                     return False
-            for device_id in and_devices:  # execute AND gate devices
-                if not self.execute_gate(device_id, self.devices.HIGH,
-                                         self.devices.HIGH):
-                    return False
-            for device_id in or_devices:  # execute OR gate devices
-                if not self.execute_gate(device_id, self.devices.LOW,
-                                         self.devices.LOW):
-                    return False
-            for device_id in nand_devices:  # execute NAND gate devices
-                if not self.execute_gate(device_id, self.devices.HIGH,
-                                         self.devices.LOW):
-                    return False
-            for device_id in nor_devices:  # execute NOR gate devices
-                if not self.execute_gate(device_id, self.devices.LOW,
-                                         self.devices.HIGH):
-                    return False
-            for device_id in xor_devices:  # execute XOR devices
-                if not self.execute_gate(device_id, None, None):
+            for device_id, (x, y) in gate_devices:  # execute gate devices
+                if not self.execute_gate(device_id, x, y):
                     return False
+            if stats is not None:
+                stats.count_device_sweep(device_list, old_signals)
             if self.steady_state:
                 break
+            if detector.add_state(self._get_state(device_list, d_type_list)):
+                break
+        self.iterations = iterations
+        self.oscillation = detector.get_oscillation()
         return self.steady_state
+
+    def get_oscillation(self):
+        """Return the oscillation found in the last cycle.
+
+        Return (loop length in sweeps, list of the IDs of the toggling
+        devices), or None if the last cycle did not stop because its signals
+        repeated.
+        """
+        return self.oscillation
+
+    def get_oscillation_message(self):
+        """Return a message saying why the last cycle did not settle.
+
+        Return None if it settled, or failed for another reason, such as an
+        unconnected input.
+        """
+        if self.oscillation is not None:
+            loop_length, device_ids = self.oscillation
+            return "".join([
+                "Signals repeat every ", str(loop_length), " iterations. ",
+                "Toggling devices: ",
+                ", ".join(self.names.get_name_string(device_id)
+                          for device_id in device_ids)])
+        if not self.steady_state and \
+                self.iterations >= self.get_iteration_limit():
+            return "".join(["Signals did not settle within ",
+                            str(self.iterations), " iterations."])
+        return None
+
+    def _get_state(self, device_list, d_type_list):
+        """Return the output signals and D-type memories as bytes."""
+        return bytes([signal for device in device_list
+                      for signal in device.outputs.values()] +
+                     [device.dtype_memory for device in d_type_list])
+
+    def enable_stats(self, enabled=True):
+        """Turn the collection of simulation statistics on or off.
+
+        Turning it on starts with empty statistics. Return the
+        stats.SimulationStats() instance, or None if it is turned off.
+        """
+        self.stats = SimulationStats(self.names) if enabled else None
+        return self.stats
+
+    def get_stats(self):
+        """Return the stats.SimulationStats() instance, or None."""
+        return self.stats
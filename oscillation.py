@@ -0,0 +1,96 @@
+"""Detect oscillations from the repeated states of a simulation cycle.
+
+Used in the Logic Simulator project to stop executing a network as soon as
+the signals of a cycle start repeating, instead of sweeping until the
+iteration limit, and to find which devices are toggling.
+
+Classes
+-------
+OscillationDetector - finds repeated states in the sweeps of a cycle.
+"""
+
+
+class OscillationDetector:
+
+    """Find repeated states in the sweeps of a simulation cycle.
+
+    Within a cycle, each sweep of the devices is a function of the output
+    signals and D-type memories left by the previous sweep, so once this
+    state repeats, the sweeps loop forever and the network oscillates. The
+    engines give the detector the state after every sweep that changed a
+    signal, as a bytes object with one byte per output signal and D-type
+    memory.
+
+    The hash of each state is stored with the number of its sweep. When a
+    hash is seen again, the state is kept as a candidate, and the loop is
+    confirmed only if exactly the same state comes back after the same number
+    of sweeps, so a hash collision cannot stop a network that would settle.
+    The states in between are kept to find the toggling devices.
+
+    Parameters
+    ----------
+    state_devices: list of the device ID of each byte of the states.
+
+    Public methods
+    --------------
+    add_state(self, state): Adds the state after a sweep. Returns True if an
+                            oscillation has been confirmed.
+
+    get_oscillation(self): Returns the loop length and the IDs of the
+                           toggling devices, or None.
+    """
+
+    def __init__(self, state_devices):
+        """Initialise the history of states."""
+        self.state_devices = state_devices
+        self.sweeps = {}  # {hash of a state: number of its last sweep}
+        self.sweep = 0
+        self.candidate = None  # states of a possible loop, first one first
+        self.candidate_length = None  # length of the possible loop
+        self.loop_length = None  # length of the confirmed loop
+
+    def add_state(self, state):
+        """Add the state after a sweep.
+
+        Return True if the state repeats the candidate loop, which makes the
+        oscillation certain.
+        """
+        self.sweep += 1
+        if self.candidate is not None:
+            if len(self.candidate) < self.candidate_length:
+                self.candidate.append(state)
+                return False
+            if state == self.candidate[0]:
+                self.loop_length = self.candidate_length
+                return True
+            self.candidate = None  # the hashes of two states collided
+
+        key = hash(state)
+        earlier_sweep = self.sweeps.get(key)
+        self.sweeps[key] = self.sweep
+        if earlier_sweep is not None:
+            self.candidate = [state]
+            self.candidate_length = self.sweep - earlier_sweep
+        return False
+
+    def get_oscillation(self):
+        """Return the loop length and the IDs of the toggling devices.
+
+        A device is toggling if any of its bytes changes within the loop.
+        Device IDs are in the order of the states. Return None if no
+        oscillation has been confirmed.
+        """
+        if self.loop_length is None:
+            return None
+        first_state = self.candidate[0]
+        device_ids = []
+        for state in self.candidate[1:]:
+            for position, (first, value) in enumerate(zip(first_state,
+                                                          state)):
+                if first != value:
+                    device_ids.append(self.state_devices[position])
+        # A device can toggle several bytes in several states
+        toggling_ids = set(device_ids)
+        return self.loop_length, [
+            device_id for device_id in dict.fromkeys(self.state_devices)
+            if device_id in toggling_ids]
@@ -121,7 +121,9 @@ class Parser:
         if len(
                 self.syntax_errors_list) == 0 and len(
                 self.semantic_errors_list) == 0:
-            # No errors in definition file
+            # No errors in definition file, so compile the network for the
+            # compiled engine
+            self.network.compile_network()
             return True
         else:
             # Either semantic or syntax error(s) in file
@@ -8,6 +8,46 @@ Classes
 Scanner - reads definition file and translates characters into symbols.
 Symbol - encapsulates a symbol and stores its properties.
 """
+import mmap
+import os
+import re
+
+# Files larger than this are memory-mapped rather than read into a string
+MMAP_SIZE = 1 << 24
+
+
+def compile_patterns(pattern):
+    """Return the str and bytes versions of a regular expression.
+
+    Both match ASCII letters, digits and spaces only, as in the grammar, so
+    that a file gives the same symbols as a string and as bytes.
+    """
+    flags = re.ASCII | re.DOTALL | re.VERBOSE
+    return {str: re.compile(pattern, flags),
+            bytes: re.compile(pattern.encode("ascii"), flags)}
+
+
+# Matches the spaces before the next symbol, then the symbol itself in the
+# group named after its kind. BREAK is the last line break in the spaces, and
+# a comment is matched by its first /.
+TOKEN_PATTERNS = compile_patterns(r"""
+    (?:[^\S\r\n]*(?P<BREAK>\r\n?|\n))*[^\S\r\n]*
+    (?:(?:(?P<NAME>[^\W\d_][^\W_]*)|(?P<NUMBER>\d+))(?:\r(?=\n))?
+    |(?P<ARROW>->)
+    |(?P<DASH>-(?:\r\n|.)?)
+    |(?P<COMMENT>/)
+    |(?P<EQUALS>=)
+    |(?P<COMMA>,)
+    |(?P<SEMICOLON>;)
+    |(?P<PERIOD>\.)
+    |(?P<INVALID>.)
+    |(?P<EOF>\Z))""")
+LINE_BREAK_PATTERNS = compile_patterns(r"\r\n?|\n")
+# The character after /* is skipped, then the comment ends at the next */, or
+# straight away if that character is followed by /
+BLOCK_COMMENT_PATTERNS = compile_patterns(r"""
+    /\*(?:\r\n|.)?(?P<BODY>/|.*?\*/|.*(?P<UNCLOSED>))""")
+NON_ASCII_PATTERN = re.compile(rb"[^\x00-\x7f]")
 
 
 class Symbol:
@@ -43,9 +83,21 @@ class Scanner:
     that the parser can use. It also skips over comments and irrelevant
     formatting characters, such as spaces and line breaks.
 
+    The whole file is read into one buffer when the scanner is made, and each
+    symbol is found with a single match of TOKEN_PATTERNS, so that large
+    generated definition files are read quickly. Comments are skipped in a
+    loop, so any number of them can follow one another.
+
+    Files larger than MMAP_SIZE are memory-mapped rather than read, and a map
+    of the file can also be given instead of its path. A map is scanned as
+    ASCII bytes without being copied into a string; each distinct name is
+    decoded once, when it is added to the names list. A map holding any
+    non-ASCII character is decoded into a string instead, so that its
+    characters and positions are the same as in a file read into a string.
+
     Parameters
     ----------
-    path: path to the circuit definition file.
+    path: path to the circuit definition file, or an mmap.mmap of it.
     names: instance of the names.Names() class.
 
     Public methods
@@ -56,11 +108,28 @@ class Scanner:
 
     def __init__(self, path, names):
         """Open specified file and initialise reserved words and IDs."""
-        try:
-            f = open(path, "r")
-            self.file = f
-        except BaseException:
-            print("Path does not exist")
+        # The whole file is read into one buffer, or memory-mapped if it is
+        # large, which is then split into symbols by TOKEN_PATTERNS
+        if isinstance(path, mmap.mmap):
+            self.text = path
+        else:
+            try:
+                with open(path, "r", newline="") as f:
+                    if os.fstat(f.fileno()).st_size > MMAP_SIZE:
+                        self.text = mmap.mmap(f.fileno(), 0,
+                                              access=mmap.ACCESS_READ)
+                    else:
+                        self.text = f.read()
+            except BaseException:
+                print("Path does not exist")
+                self.text = ""
+        if not isinstance(self.text, str) and \
+                NON_ASCII_PATTERN.search(self.text):
+            self.text = self.text[:].decode(errors="replace")
+        text_type = str if isinstance(self.text, str) else bytes
+        self.token_pattern = TOKEN_PATTERNS[text_type]
+        self.line_break_pattern = LINE_BREAK_PATTERNS[text_type]
+        self.block_comment_pattern = BLOCK_COMMENT_PATTERNS[text_type]
         self.names = names
         self.symbol_type_list = [
             self.NAME,
@@ -122,7 +191,20 @@ class Scanner:
          self.CLEAR_ID,
          self.SIGGEN_ID,
          self.sig_ID] = self.names.lookup(self.keywords_list)
-        self.current_character = ""
+        self.keywords = set(self.keywords_list)
+        # {kind of symbol in TOKEN_PATTERNS: (symbol type, symbol value)}
+        self.symbol_kinds = {
+            "ARROW": (self.ARROW, "->"),
+            "DASH": (self.INVALID, 'invalid'),
+            "EQUALS": (self.EQUALS, "="),
+            "COMMA": (self.COMMA, ","),
+            "SEMICOLON": (self.SEMICOLON, ";"),
+            "PERIOD": (self.PERIOD, "."),
+            "INVALID": (self.INVALID, 'invalid'),
+            "EOF": (self.EOF, "end")}
+        # {name as found in the file: (symbol type, name ID, name string)}, so
+        # that each name is decoded and looked up only once
+        self.name_symbols = {}
         # Position indicators of each symbol are w.r.t to the definition file
         # and so are initialised when scanner is called
         self.line = 0
@@ -132,204 +214,123 @@ class Scanner:
     def get_symbol(self):
         """Translate the next sequence of characters into a symbol."""
         symbol = Symbol(None, None)
-        self.skip_spaces()
-
-        # Find the type of the file and gives an ID to relevant symbols
-
-        if self.current_character.isalpha():
-            name_string = self.get_name()
-            if name_string in self.keywords_list:
-                symbol.type = self.KEYWORD
-            else:
-                symbol.type = self.NAME
-            # if symbol is a name, add name to names list and get ID
-            [symbol.id] = self.names.lookup([name_string])
-            symbol.value = name_string
-
-        elif self.current_character.isdigit():
-            symbol.type = self.NUMBER
-            # Assign actual number as symbol ID if symbol type is a number
-            symbol.value = self.get_number()
-            symbol.id = int(symbol.value)
-
-        elif self.current_character == "/":
-            '''Checking for comment by looking for /. Can either be a block comment
-            or a line comment so look at the next character as well for * which signals
-            a block comment'''
-            self.current_character = self.file.read(1)
-            if self.current_character == "*":
-                '''if a block comment is received, get next character, then go into
-                block comment method and then immediately perform checks on current character'''
-                self.ccurrent_character = self.file.read(1)
+        text = self.text
+
+        # Skip spaces and comments until the start of the next symbol
+        while True:
+            position = self.position
+            match = self.token_pattern.match(text, position)
+            kind = match.lastgroup
+            if match.start("BREAK") != -1:
+                self.count_lines(position, match.start(kind))
+            if kind != "COMMENT":
+                break
+            self.position = match.start(kind)
+            if text[self.position + 1:self.position + 2] in ("*", b"*"):
                 self.skip_comments_block()
-
             else:
-                '''if a line comment then current character already relevant comment line
-                Perform checks immediately on current character'''
                 self.skip_comments_line()
-            '''Once exits from comment, self call get_symbol to get the next immediate symbol
-            after the comment along with relevant attributes and return it directly'''
-            symbol = self.get_symbol()
-            return symbol
-
-        # Check punctuations
-        elif self.current_character == "=":
-            symbol.type = self.EQUALS
-            symbol.value = "="
-
-        elif self.current_character == ",":
-            symbol.type = self.COMMA
-            symbol.value = ","
-
-        elif self.current_character == ";":
-            symbol.type = self.SEMICOLON
-            symbol.value = ";"
-
-        elif self.current_character == ".":
-            symbol.type = self.PERIOD
-            symbol.value = "."
-
-        elif self.current_character == "-":
-            self.current_character = self.file.read(1)
-            if self.current_character == ">":
-                symbol.type = self.ARROW
-                symbol.value = "->"
-            else:
-                symbol.type = self.INVALID
-                symbol.value = 'invalid'
-
-        elif self.current_character == "":
-            symbol.type = self.EOF
-            symbol.value = "end"
+        # A name or number followed by a carriage return and a line feed ends
+        # after the carriage return
+        self.position = match.end()
+
+        # Find the type of the symbol and give an ID to relevant symbols
+        if kind == "NAME":
+            name = match.group(kind)
+            name_symbol = self.name_symbols.get(name)
+            if name_symbol is None:
+                name_string = name if isinstance(name, str) else name.decode()
+                if name_string in self.keywords:
+                    symbol_type = self.KEYWORD
+                else:
+                    symbol_type = self.NAME
+                # if symbol is a name, add name to names list and get ID
+                [name_id] = self.names.lookup([name_string])
+                name_symbol = (symbol_type, name_id, name_string)
+                self.name_symbols[name] = name_symbol
+            symbol.type, symbol.id, symbol.value = name_symbol
+
+        elif kind == "NUMBER":
+            symbol.type = self.NUMBER
+            # Assign actual number as symbol ID if symbol type is a number
+            number = match.group(kind)
+            symbol.value = number if isinstance(number, str) else \
+                number.decode()
+            symbol.id = int(number)
 
         else:
-            symbol.type = self.INVALID
-            symbol.value = 'invalid'
+            # The character after a dash is part of the symbol, even if it
+            # does not make an arrow
+            symbol.type, symbol.value = self.symbol_kinds[kind]
 
         symbol.prev_pos = self.prev_pos
-        symbol.position = self.file.tell()
+        symbol.position = self.position
         symbol.line = self.line + 1
         symbol.line_pos = symbol.position - symbol.prev_pos
 
         return symbol
 
-    def skip_spaces(self):
-        '''Skip all the spaces in the file between symbols'''
-        self.current_character = self.file.read(1)
-        while self.current_character.isspace():
-            # Finds the position of new line
-            if self.current_character == "\n" or self.current_character == "\r":
-                self.line += 1
-                self.prev_pos = self.file.tell() + 1
-            self.current_character = self.file.read(1)
-        return
-
-    def get_name(self):
-        """Seek the next name string in input_file. Return the name string.
-        """
-        name = ''
-        # name contains all adjacent alphanumeric symbol
-        while self.current_character.isalnum():
-            name += self.current_character
-            self.current_character = self.file.read(1)
-        self.file.seek(self.file.tell() - 1, 0)
-        character = self.file.read(1)
-        if character.isalnum():
-            pass
-        else:
-            self.file.seek(self.file.tell() - 1, 0)
-        return name
+    def count_lines(self, start, end):
+        """Count the line breaks between start and end in the file.
 
-    def get_number(self):
-        """Seek the next number in input_file. Returns the number
+        A carriage return, a line feed, or a carriage return followed by a
+        line feed is one line break.
         """
-        number = ''
-        while self.current_character.isdigit():
-            number += self.current_character
-            self.current_character = self.file.read(1)
-        self.file.seek(self.file.tell() - 1, 0)
-        character = self.file.read(1)
-        if character.isdigit():
-            pass
-        else:
-            self.file.seek(self.file.tell() - 1, 0)
-        return number
+        for line_break in self.line_break_pattern.finditer(self.text, start,
+                                                           end):
+            self.line += 1
+            # prev_pos is one past the position after the line break
+            self.prev_pos = line_break.end() + 1
 
     def print_error(self, current_symbol, error_symbol_1, error_symbol_2=None):
         """Print line where error occurs and indicate position where error occurs
         """
-        # return to beginning of the line
-        current_loc = current_symbol.position
         print('Error occured in line ', error_symbol_1.line)
-        self.file.seek(error_symbol_1.prev_pos - 1, 0)
-        # print the complete line character by character until the end of the
-        # line (semicolon)
-        next_char = self.file.read(1)
-        while next_char != "\n" and next_char != "\r" and next_char != "":
-            print(next_char, end='')
-            next_char = self.file.read(1)
-        print('')
+        # print the complete line until the line break or the end of the file
+        line_start = error_symbol_1.prev_pos - 1
+        line_break = self.line_break_pattern.search(self.text, line_start)
+        line_end = line_break.start() if line_break else len(self.text)
+        line = self.text[line_start:line_end]
+        print(line if isinstance(line, str) else
+              line.decode(errors="replace"))
         # print first carrot at the position of the first error in the line
-        for i in range(error_symbol_1.line_pos):
-            print(' ', end='')
-            i += 1
-        print('^', end='')
+        print(' ' * error_symbol_1.line_pos + '^', end='')
         # print second carrot at the position of second error in line
         if error_symbol_2 is not None:
-            for i in range(
-                    error_symbol_2.line_pos -
-                    error_symbol_1.line_pos -
-                    1):
-                print(' ', end='')
-                i += 1
-            print('^')
+            print(' ' * (error_symbol_2.line_pos -
+                         error_symbol_1.line_pos - 1) + '^')
         else:
             print('')
-        # Return to original position
-        self.file.seek(current_loc, 0)
+        # Continue scanning from the symbol after current_symbol
+        self.position = current_symbol.position
         return
 
     def skip_comments_line(self):
-        '''Line comments end in line breaks so check current character, and then fetch next character
-        '''
-        while self.current_character != "\n" and self.current_character != "\r":
-            # if line comment at the end, will encounter EOF character,
-            # automatically break out and send EOF to parser
-            if self.current_character == '':
-                return
-            self.current_character = self.file.read(1)
+        """Skip the line comment that starts at the current position.
+
+        Line comments start with a single / and end in line breaks.
+        """
+        line_break = self.line_break_pattern.search(self.text,
+                                                    self.position + 1)
+        if line_break is None:
+            # if line comment at the end, send EOF to parser
+            self.position = len(self.text)
+            return
         # Line breaks affect the line and line_pos attributes
-        self.line += 1
-        self.prev_pos = self.file.tell() + 1
-        #print('end line comment')
-        return
+        self.count_lines(line_break.start(), line_break.end())
+        self.position = line_break.end()
 
     def skip_comments_block(self):
-        '''Block comments enclosed by /* and */, must check for both *
-        and / adjacently in order to exit block comment
-        '''
-        while self.current_character != "*":
-            # if new line, must update line and line_pos accordingly
-            if self.current_character == "\n" or self.current_character == "\r":
-                self.line += 1
-                self.prev_pos = self.file.tell() + 1
-            # if EOF encountered before comments closed, exit function and send
-            # EOF to parser
-            if self.current_character == '':
-                print("Error occured")
-                print("Comment has not been closed!")
-                return
-            self.current_character = self.file.read(1)
-        # check next character to see if actually end of block comment
-        self.current_character = self.file.read(1)
-        if self.current_character == "/":
-            #print('end block comment')
-            return
-        elif self.current_character == '':
+        """Skip the block comment that starts at the current position.
+
+        Block comments are enclosed by /* and */. The character after /* is
+        skipped, so /*X/ is also a complete comment.
+        """
+        match = self.block_comment_pattern.match(self.text, self.position)
+        if match.start("UNCLOSED") != -1:
+            # if EOF encountered before comments closed, send EOF to parser
             print("Error occured")
             print("Comment has not been closed!")
-            return
-        else:
-            # if not end of block comment, loop back into function, rechecking
-            # for * first again
-            self.skip_comments_block()
+        # if new lines, must update line and line_pos accordingly
+        self.count_lines(match.start("BODY"), match.end())
+        self.position = match.end()
@@ -0,0 +1,332 @@
+"""Simulate many switch scenarios at once, one per bit of a machine word.
+
+Used in the Logic Simulator project to run the same network under many
+different switch settings in a single pass, instead of setting the switches
+and running the network once for every setting.
+
+Classes
+-------
+Scenarios - simulates many switch scenarios in parallel.
+"""
+from monitors import Monitors
+
+
+class Scenarios:
+
+    """Simulate many switch scenarios in parallel.
+
+    Each scenario is given one bit (lane) of a word, and every signal is held
+    as two words, so that each gate is evaluated for all scenarios with a few
+    bitwise operations. Python integers have no fixed width, so any number of
+    scenarios fits in one word. A signal is encoded in each lane by two bits:
+    its level (1 for HIGH or RISING) and whether it is in transition (1 for
+    RISING or FALLING). Updating a signal towards a target t then gives the
+    level t and the transition bit (old level XOR t), just as update_signal()
+    does.
+
+    All scenarios start from the current state of the devices, and the
+    devices themselves are left unchanged. The clocks and signal generators
+    are shared by all scenarios. The monitored signals of each scenario are
+    recorded in a Monitors() instance of their own.
+
+    A scenario added after the others have started running only has its own
+    lane initialised, so the running scenarios carry on undisturbed. Its
+    clocks and signal generators are in the same phase as theirs, and its
+    traces are padded with BLANK signals for the cycles it missed.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class, whose monitors are
+              recorded for every scenario.
+
+    Public methods
+    --------------
+    add_scenario(self, switch_states): Adds a scenario with the specified
+                                       switch states and returns its index.
+
+    run_network(self, cycles): Runs all scenarios for the specified number of
+                               simulation cycles.
+
+    get_monitors(self, scenario): Returns the Monitors() instance recording
+                                  the specified scenario.
+    """
+
+    def __init__(self, names, devices, network, monitors):
+        """Compile the network and initialise the scenario lists."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        if network.netlist is None or network.netlist.is_stale():
+            network.compile_network()
+        self.netlist = network.netlist
+
+        self.switch_states_list = []  # {switch_id: state} for each scenario
+        self.monitors_list = []  # Monitors() instance for each scenario
+        self.mask = 0  # one bit set for each scenario
+
+        # levels[slot] and transitions[slot] are the two words of each signal
+        self.levels = None
+        self.transitions = None
+        self.switch_targets = None
+        self.dtype_memories = None
+        self.counters = None
+
+        # Scenarios that were still changing when the limit was reached
+        self.oscillating = []
+        self.cycles_completed = 0  # cycles run since the lanes were loaded
+
+    def add_scenario(self, switch_states):
+        """Add a scenario with the specified switch states.
+
+        switch_states is a dictionary of {switch_id: signal}. Switches not in
+        the dictionary keep their current state. Return the index of the new
+        scenario, or None if a switch ID or signal is invalid, or if the
+        scenarios are running and the devices have no valid state to start
+        the new one from.
+        """
+        for switch_id, signal in switch_states.items():
+            device = self.devices.get_device(switch_id)
+            if device is None or device.device_kind != self.devices.SWITCH:
+                return None
+            if signal not in [self.devices.LOW, self.devices.HIGH]:
+                return None
+
+        lane = len(self.switch_states_list)
+        if self.levels is not None and not self._add_lane(lane,
+                                                          switch_states):
+            return None
+
+        scenario_monitors = Monitors(self.names, self.devices, self.network)
+        scenario_monitors.set_trace_type(self.monitors.trace_type,
+                                         self.monitors.ring_capacity)
+        for (device_id, output_id), signal_list in \
+                self.monitors.monitors_dictionary.items():
+            scenario_monitors.make_monitor(device_id, output_id)
+            signal_list_copy = scenario_monitors.monitors_dictionary[
+                (device_id, output_id)]
+            signal_list_copy.extend(signal_list)
+            signal_list_copy.extend([self.devices.BLANK] *
+                                    self.cycles_completed)
+
+        self.switch_states_list.append(dict(switch_states))
+        self.monitors_list.append(scenario_monitors)
+        return lane
+
+    def get_monitors(self, scenario):
+        """Return the Monitors() instance recording the specified scenario."""
+        return self.monitors_list[scenario]
+
+    def _load_state(self):
+        """Broadcast the current device state to every scenario's lane."""
+        netlist = self.netlist
+        self.mask = 0
+        self.levels = [0] * len(netlist.signals)
+        self.transitions = [0] * len(netlist.signals)
+        self.switch_targets = dict.fromkeys(netlist.switch_indices, 0)
+        self.dtype_memories = dict.fromkeys(netlist.dtype_indices, 0)
+        self.cycles_completed = 0
+        for lane, switch_states in enumerate(self.switch_states_list):
+            if not self._add_lane(lane, switch_states):
+                self.levels = None
+                return False
+        self.counters = list(netlist.counters)
+        return True
+
+    def _add_lane(self, lane, switch_states):
+        """Set the bits of one lane from the current device state.
+
+        The clocks and signal generators of the lane are given the signals
+        of lane 0, if it is already running, so that they stay shared. Leave
+        every word unchanged and return False if a signal is not valid.
+        """
+        d = self.devices
+        netlist = self.netlist
+        netlist.load_state()
+        if any(signal not in [d.LOW, d.HIGH, d.RISING, d.FALLING]
+               for signal in netlist.signals):
+            return False
+        bit = 1 << lane
+        levels = self.levels
+        transitions = self.transitions
+
+        generator_slots = set()
+        if self.mask:
+            for index in netlist.generator_indices:
+                generator_slots.update(netlist.output_slots[index])
+        for slot, signal in enumerate(netlist.signals):
+            if slot in generator_slots:
+                level = levels[slot] & 1
+                transition = transitions[slot] & 1
+            else:
+                level = signal in [d.HIGH, d.RISING]
+                transition = signal in [d.RISING, d.FALLING]
+            if level:
+                levels[slot] |= bit
+            if transition:
+                transitions[slot] |= bit
+
+        for index in netlist.switch_indices:
+            signal = switch_states.get(netlist.device_ids[index],
+                                       netlist.switch_targets[index])
+            if signal != d.LOW:
+                self.switch_targets[index] |= bit
+        for index in netlist.dtype_indices:
+            if netlist.dtype_memories[index] == d.HIGH:
+                self.dtype_memories[index] |= bit
+        self.mask |= bit
+        return True
+
+    def _update_generators(self):
+        """Set clock and siggen signals to RISING or FALLING, as needed."""
+        netlist = self.netlist
+        levels = self.levels
+        transitions = self.transitions
+        mask = self.mask
+        counters = self.counters
+        for index in netlist.clock_indices:
+            if counters[index] == netlist.half_periods[index]:
+                counters[index] = 0
+                [slot] = netlist.output_slots[index]
+                # HIGH lanes become FALLING and LOW lanes become RISING
+                settled = mask & ~transitions[slot]
+                levels[slot] = (levels[slot] & ~settled) | \
+                    (~levels[slot] & settled)
+                transitions[slot] |= settled
+            counters[index] += 1
+        for index in netlist.siggen_indices:
+            waveform = netlist.waveforms[index]
+            if counters[index] == len(waveform):
+                counters[index] = 0
+            [slot] = netlist.output_slots[index]
+            if waveform[counters[index]] == "0":
+                levels[slot] = 0
+                transitions[slot] = mask
+            elif waveform[counters[index]] == "1":
+                levels[slot] = mask
+                transitions[slot] = mask
+            counters[index] += 1
+
+    def _sweep(self):
+        """Execute every device once, in order, in every lane.
+
+        Return a word with the bits set of the lanes in which any output
+        signal changed.
+        """
+        d = self.devices
+        netlist = self.netlist
+        levels = self.levels
+        transitions = self.transitions
+        input_slots = netlist.input_slots
+        output_slots = netlist.output_slots
+        mask = self.mask
+        changed = 0
+
+        for index in netlist.switch_indices:
+            [slot] = output_slots[index]
+            target = self.switch_targets[index]
+            level = levels[slot]
+            transition = level ^ target
+            changed |= (level ^ target) | (transitions[slot] ^ transition)
+            levels[slot] = target
+            transitions[slot] = transition
+
+        # Execute D-type devices before clocks to catch the rising edge of the
+        # clock
+        for index in netlist.dtype_indices:
+            clk_slot, set_slot, clear_slot, data_slot = input_slots[index]
+            memory = self.dtype_memories[index]
+            rising = levels[clk_slot] & transitions[clk_slot]
+            # Data is HIGH or FALLING exactly when level XOR transition is 1
+            data = levels[data_slot] ^ transitions[data_slot]
+            memory = (memory & ~rising) | (data & rising)
+            memory |= levels[set_slot] & ~transitions[set_slot]
+            memory &= ~(levels[clear_slot] & ~transitions[clear_slot])
+            memory &= mask
+            self.dtype_memories[index] = memory
+
+            for slot, target in zip(output_slots[index],
+                                    [memory, mask & ~memory]):
+                level = levels[slot]
+                transition = level ^ target
+                changed |= (level ^ target) | (transitions[slot] ^ transition)
+                levels[slot] = target
+                transitions[slot] = transition
+
+        # Complete clock and signal generator transitions
+        for index in netlist.generator_indices:
+            [slot] = output_slots[index]
+            changed |= transitions[slot]
+            transitions[slot] = 0
+
+        for index in netlist.gate_indices:
+            x, y = netlist.gate_rules[index]
+            if x is None:  # XOR: output is high only if both inputs differ
+                first_slot, second_slot = input_slots[index]
+                target = (levels[first_slot] ^ levels[second_slot]) | \
+                    (transitions[first_slot] ^ transitions[second_slot])
+            else:  # if all inputs are x, output is y, else the inverse of y
+                all_x = mask
+                for slot in input_slots[index]:
+                    if x == d.HIGH:
+                        all_x &= levels[slot] & ~transitions[slot]
+                    else:
+                        all_x &= ~(levels[slot] | transitions[slot])
+                target = all_x if y == d.HIGH else mask & ~all_x
+            [slot] = output_slots[index]
+            level = levels[slot]
+            transition = level ^ target
+            changed |= (level ^ target) | (transitions[slot] ^ transition)
+            levels[slot] = target
+            transitions[slot] = transition
+
+        return changed
+
+    def _record_signals(self):
+        """Record the monitored signals of every scenario."""
+        d = self.devices
+        slot_ids = self.netlist.slot_ids
+        for (device_id, output_id) in self.monitors.monitors_dictionary:
+            slot = slot_ids[(device_id, output_id)]
+            level = self.levels[slot]
+            transition = self.transitions[slot]
+            for lane, scenario_monitors in enumerate(self.monitors_list):
+                if transition >> lane & 1:
+                    signal = d.RISING if level >> lane & 1 else d.FALLING
+                else:
+                    signal = d.HIGH if level >> lane & 1 else d.LOW
+                scenario_monitors.monitors_dictionary[
+                    (device_id, output_id)].append(signal)
+
+    def run_network(self, cycles):
+        """Run all scenarios for the specified number of simulation cycles.
+
+        Return True if successful. If any scenario oscillates, return False
+        and store the indices of the oscillating scenarios.
+        """
+        self.oscillating = []
+        if not self.switch_states_list or self.netlist.unconnected:
+            return False
+        if self.netlist.is_stale():
+            return False
+        if self.levels is None and not self._load_state():
+            return False
+
+        iteration_limit = self.network.get_iteration_limit()
+        for _ in range(cycles):
+            self._update_generators()
+            for _ in range(iteration_limit):
+                changed = self._sweep()
+                if not changed:
+                    break
+            if changed:
+                self.oscillating = [lane for lane in range(
+                    len(self.switch_states_list)) if changed >> lane & 1]
+                return False
+            self._record_signals()
+            self.cycles_completed += 1
+        return True
@@ -0,0 +1,175 @@
+"""Collect statistics about the simulation cycles of a network.
+
+Used in the Logic Simulator project to count the settling iterations of each
+cycle, the device evaluations and signal transitions of each device kind, and
+the time spent updating clocks and signal generators, so that users can see
+where the time of a cycle goes and how close a network is to its iteration
+limit.
+
+Classes
+-------
+SimulationStats - counts and times what happens in simulation cycles.
+"""
+import collections
+import time
+
+
+class SimulationStats:
+
+    """Count and time what happens in simulation cycles.
+
+    An instance is made by Network.enable_stats(). While it is enabled,
+    Network.execute_network() times each cycle, and each engine reports its
+    device evaluations and the time it spends updating the clocks and signal
+    generators to this instance. The engines check once per device or sweep
+    whether statistics are enabled, and do nothing more when they are not.
+
+    A device evaluation is one execution of a device in a settling
+    iteration, and a transition is an evaluation that changed one of its
+    outputs. The vector engine evaluates every device in every iteration and
+    does not report transitions.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+
+    Public methods
+    --------------
+    reset(self): Clears all the statistics.
+
+    record_cycle(self, iterations, iteration_limit, successful, cycle_time):
+                 Records the outcome of one simulation cycle.
+
+    count_evaluation(self, device_kind, changed): Counts one device
+                     evaluation of the device kind.
+
+    count_sweeps(self, device_kinds, iterations): Counts an evaluation of
+                 every device in device_kinds for each iteration.
+
+    count_device_sweep(self, device_list, old_signals): Counts an
+                       evaluation of every device in device_list.
+
+    timed(self, function, phase): Calls function and adds its run time to
+                                  the time of the phase. Returns the result.
+
+    get_summary(self): Returns the statistics as a dictionary.
+
+    format_lines(self): Returns the statistics as lines of text.
+    """
+
+    def __init__(self, names):
+        """Initialise the names table and clear the statistics."""
+        self.names = names
+        self.reset()
+
+    def reset(self):
+        """Clear all the statistics."""
+        self.cycles = 0
+        self.failed_cycles = 0
+        # {settling iterations: number of cycles that needed them}
+        self.iteration_counts = collections.Counter()
+        self.iteration_limit = None  # limit of the most recent cycle
+        self.evaluations = collections.Counter()  # {device kind: count}
+        self.transitions = collections.Counter()  # {device kind: count}
+        # False once a cycle has been run on the vector engine
+        self.transitions_counted = True
+        # {phase: total time in seconds}
+        self.phase_times = {"cycle": 0.0, "update_clocks": 0.0,
+                            "update_siggens": 0.0}
+
+    def record_cycle(self, iterations, iteration_limit, successful,
+                     cycle_time):
+        """Record the outcome of one simulation cycle."""
+        self.cycles += 1
+        if not successful:
+            self.failed_cycles += 1
+        self.iteration_counts[iterations] += 1
+        self.iteration_limit = iteration_limit
+        self.phase_times["cycle"] += cycle_time
+
+    def count_evaluation(self, device_kind, changed):
+        """Count one evaluation of a device of the kind.
+
+        changed is True if the evaluation changed an output of the device.
+        """
+        self.evaluations[device_kind] += 1
+        if changed:
+            self.transitions[device_kind] += 1
+
+    def count_sweeps(self, device_kinds, iterations):
+        """Count an evaluation of every device in each of the iterations.
+
+        device_kinds lists the device kind of every device.
+        """
+        for device_kind, count in collections.Counter(device_kinds).items():
+            self.evaluations[device_kind] += count * iterations
+        self.transitions_counted = False
+
+    def count_device_sweep(self, device_list, old_signals):
+        """Count an evaluation of every device in device_list.
+
+        old_signals holds the output signals of the devices, in order, as
+        bytes from before the sweep. A device whose outputs are no longer
+        the same has made a transition.
+        """
+        position = 0
+        for device in device_list:
+            end = position + len(device.outputs)
+            self.count_evaluation(device.device_kind, bytes(
+                device.outputs.values()) != old_signals[position:end])
+            position = end
+
+    def timed(self, function, phase):
+        """Call function, add its run time to phase and return its result."""
+        start = time.perf_counter()
+        result = function()
+        self.phase_times[phase] += time.perf_counter() - start
+        return result
+
+    def get_summary(self):
+        """Return the statistics as a dictionary of plain values.
+
+        Device kinds are given by their names. The transitions are None if
+        they have not been counted in every cycle.
+        """
+        get_name_string = self.names.get_name_string
+        transitions = {get_name_string(kind): count for kind, count
+                       in sorted(self.transitions.items())}
+        return {
+            "cycles": self.cycles,
+            "failed_cycles": self.failed_cycles,
+            "iteration_counts": dict(sorted(self.iteration_counts.items())),
+            "max_iterations": max(self.iteration_counts, default=0),
+            "iteration_limit": self.iteration_limit,
+            "evaluations": {get_name_string(kind): count for kind, count
+                            in sorted(self.evaluations.items())},
+            "transitions": transitions if self.transitions_counted else None,
+            "phase_times": dict(self.phase_times)}
+
+    def format_lines(self):
+        """Return the statistics as a list of lines of text."""
+        summary = self.get_summary()
+        cycles = summary["cycles"]
+        if not cycles:
+            return ["No cycles have been run."]
+        iterations = sum(count * number for count, number
+                         in self.iteration_counts.items())
+        lines = [
+            "Cycles: {} ({} failed)".format(cycles,
+                                            summary["failed_cycles"]),
+            "Settling iterations per cycle: mean {:.2f}, max {} of limit "
+            "{}".format(iterations / cycles, summary["max_iterations"],
+                        summary["iteration_limit"]),
+            "Time per cycle: {:.6f} s, of which update_clocks {:.6f} s and "
+            "update_siggens {:.6f} s".format(
+                *[summary["phase_times"][phase] / cycles for phase in
+                  ["cycle", "update_clocks", "update_siggens"]]),
+            "Device kind  evaluations  transitions"]
+        for kind, evaluations in summary["evaluations"].items():
+            if summary["transitions"] is None:
+                transitions = "-"
+            else:
+                transitions = summary["transitions"].get(kind, 0)
+            lines.append("{:<12} {:<12} {}".format(kind, evaluations,
+                                                   transitions))
+        return lines
@@ -0,0 +1,419 @@
+"""Run a definition file under many switch assignments in parallel.
+
+Used in the Logic Simulator project to simulate the same network for many
+different switch settings, such as every combination of switches for a truth
+table, or what-if changes to a warmed-up state saved in a checkpoint, sharing
+the runs between several processes and comparing their traces.
+
+Classes
+-------
+Sweep - runs a definition file under many switch assignments.
+"""
+import itertools
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+
+from cache import NetlistCache
+from checkpoint import Checkpoint
+
+# Sweep() instance of each worker process, made once by _start_worker
+_worker_sweep = None
+
+
+def _start_worker(path, cycles, engine, seed, cache_directory,
+                  checkpoint_path):
+    """Parse the definition file once for this worker process."""
+    global _worker_sweep
+    _worker_sweep = Sweep(path, cycles, processes=1, engine=engine, seed=seed,
+                          cache_directory=cache_directory,
+                          checkpoint_path=checkpoint_path)
+    if not _worker_sweep.load():
+        raise RuntimeError("could not parse " + path)
+
+
+def _inherit_worker(sweep):
+    """Use the loaded sweep of the parent process in this forked worker."""
+    global _worker_sweep
+    _worker_sweep = sweep
+
+
+# Number of chunks per process of assignments given to the pool at a time
+CHUNKS_PER_BATCH = 4
+
+
+def _run_in_worker(assignment):
+    """Run one switch assignment on this worker's network."""
+    return _worker_sweep.run_assignment(assignment)
+
+
+class Sweep:
+
+    """Run a definition file under many switch assignments.
+
+    An assignment is a dictionary of {switch name: switch state}. Switches
+    not in an assignment keep the state given in the definition file. Every
+    run starts from the state the network was in just after parsing, and the
+    random cold start-up of clocks and D-types is seeded with the same seed,
+    so the result of a run does not depend on which process executes it, or
+    on which runs came before it.
+
+    If a checkpoint file is given, every run starts from the warm state
+    saved in it instead, with no cold start-up, and switches not in an
+    assignment keep their state in the checkpoint. The traces of each run
+    only hold its own cycles.
+
+    The runs are shared between a pool of processes. On Linux, the workers
+    are forked and share the network loaded by this process, copy on write,
+    so it is neither copied nor parsed again. Forking is not used on other
+    platforms, where it is unsafe or unavailable, and instead each process
+    parses the definition file once, or loads it from the cache directory if
+    one is given, and restores the checkpoint, if any. Each process reuses
+    its Names, Devices, Network and Monitors instances for all of its runs.
+    Only the monitored traces are sent back, one bytes object per monitor,
+    with one byte per simulation cycle.
+
+    Parameters
+    ----------
+    path: path to the definition file.
+    cycles: number of simulation cycles in each run.
+    processes: number of worker processes; None uses one per CPU, and 1 runs
+               everything in this process.
+    engine: engine used by Network.execute_network, or None for the default.
+    seed: seed for the random cold start-up at the start of every run.
+    cache_directory: directory of the cache.NetlistCache() used to load the
+                     parsed network, or None to parse the file.
+    checkpoint_path: path to a checkpoint.Checkpoint() file of the warm state
+                     every run starts from, or None to start from a cold
+                     start-up.
+
+    Public methods
+    --------------
+    load(self): Parses the definition file. Returns True if successful.
+
+    get_switch_names(self): Returns the names of the switches in the network.
+
+    get_monitor_names(self): Returns the names of the monitored signals.
+
+    enumerate_assignments(self, switch_names=None): Returns an iterator over
+                                 every combination of states of the switches.
+
+    check_assignment(self, assignment): Returns True if the assignment names
+                                        valid switches and switch states.
+
+    run_assignment(self, assignment): Runs the network for one assignment and
+                                      returns the monitored traces.
+
+    run(self, assignments, chunk_size=64): Runs every assignment, returning
+                                           an iterator over their traces.
+
+    read_assignment(self, text): Returns the assignment written as text, in
+                                 the form "SW1=0,SW2=1".
+
+    format_results(self, results): Returns an iterator over the lines
+                                   showing the traces of every run.
+
+    display_results(self, results): Displays the traces of every run in the
+                                    text console, one run per line.
+
+    compare_results(self, results): Returns an iterator over the first cycle
+                                    at which each trace of every run differs
+                                    from the first run.
+
+    format_comparison(self, results): Returns an iterator over the lines
+                                      showing the comparison of every run
+                                      with the first run.
+
+    display_comparison(self, results): Displays the comparison of every run
+                                       with the first run in the text
+                                       console.
+
+    display_sweep(self, results): Displays the traces of every run, then
+                                  their comparison with the first run.
+    """
+
+    def __init__(self, path, cycles, processes=None, engine=None, seed=0,
+                 cache_directory=None, checkpoint_path=None):
+        """Initialise the sweep settings."""
+        self.path = path
+        self.cycles = cycles
+        self.processes = processes
+        self.engine = engine
+        self.seed = seed
+        self.cache_directory = cache_directory
+        self.checkpoint_path = checkpoint_path
+
+        self.names = None
+        self.devices = None
+        self.network = None
+        self.monitors = None
+        # [(device.outputs, outputs just after parsing)] for every device
+        self.initial_outputs = []
+        # {switch_id: switch state given in the definition file}
+        self.parsed_switch_states = {}
+        # Checkpoint of the warm state, without monitor traces, or None
+        self.warm_state = None
+
+    def load(self):
+        """Parse the definition file.
+
+        Return True if successful.
+        """
+        parsed = NetlistCache(self.cache_directory).parse_network(self.path)
+        if parsed is None:
+            return False
+        self.names, self.devices, self.network, self.monitors = parsed
+        if self.engine is not None:
+            self.network.set_engine(self.engine)
+        self.initial_outputs = [(device.outputs, dict(device.outputs))
+                                for device in self.devices.devices_list]
+        self.parsed_switch_states = {
+            switch_id: self.devices.get_device(switch_id).switch_state
+            for switch_id in self.devices.find_devices(self.devices.SWITCH)}
+        if self.checkpoint_path is not None:
+            checkpoint = Checkpoint(self.devices, self.monitors)
+            if checkpoint.load(self.checkpoint_path) is None:
+                return False
+            # The traces of the warm-up are not needed by the runs
+            self.monitors.reset_monitors()
+            self.warm_state = checkpoint.save(0)
+        return True
+
+    def get_switch_names(self):
+        """Return the names of the switches in the network."""
+        return [self.names.get_name_string(switch_id) for switch_id in
+                self.devices.find_devices(self.devices.SWITCH)]
+
+    def get_monitor_names(self):
+        """Return the names of the monitored signals."""
+        return self.monitors.get_signal_names()[0]
+
+    def enumerate_assignments(self, switch_names=None):
+        """Return an iterator over every combination of switch states.
+
+        If switch_names is None, every switch in the network is enumerated.
+        The first switch changes slowest, as in a truth table.
+        """
+        if switch_names is None:
+            switch_names = self.get_switch_names()
+        for states in itertools.product([self.devices.LOW, self.devices.HIGH],
+                                        repeat=len(switch_names)):
+            yield dict(zip(switch_names, states))
+
+    def check_assignment(self, assignment):
+        """Return True if the assignment names valid switches and states."""
+        for switch_name, switch_state in assignment.items():
+            switch_id = self.names.query(switch_name)
+            if switch_id is None:
+                return False
+            device = self.devices.get_device(switch_id)
+            if device is None or device.device_kind != self.devices.SWITCH:
+                return False
+            if switch_state not in [self.devices.LOW, self.devices.HIGH]:
+                return False
+        return True
+
+    def run_assignment(self, assignment):
+        """Run the network for one switch assignment.
+
+        Return the list of monitored traces, in the order of
+        get_monitor_names(), or None if the network oscillates.
+        """
+        devices = self.devices
+        if self.warm_state is not None:
+            Checkpoint(devices, self.monitors).restore(self.warm_state)
+            for switch_name, switch_state in assignment.items():
+                devices.set_switch(self.names.query(switch_name),
+                                   switch_state)
+        else:
+            for outputs, initial_outputs in self.initial_outputs:
+                outputs.update(initial_outputs)
+            for switch_id, switch_state in \
+                    self.parsed_switch_states.items():
+                devices.set_switch(switch_id, switch_state)
+            for switch_name, switch_state in assignment.items():
+                devices.set_switch(self.names.query(switch_name),
+                                   switch_state)
+            random.seed(self.seed)
+            devices.cold_startup()
+
+        self.monitors.reset_monitors()
+        for _ in range(self.cycles):
+            if not self.network.execute_network():
+                return None
+            self.monitors.record_signals()
+        return [bytes(signal_list) for signal_list in
+                self.monitors.monitors_dictionary.values()]
+
+    def run(self, assignments, chunk_size=64):
+        """Run the network for every assignment.
+
+        Return an iterator over (assignment, traces) pairs, in the order of
+        the assignments, where traces is as returned by run_assignment().
+        Assignments are taken from the iterable as they are run, so only a
+        few chunks of them and of their traces are held at once. The
+        iterator raises ValueError when it reaches an invalid assignment.
+        """
+        return self._run_all(self._check_all(assignments), chunk_size)
+
+    def _check_all(self, assignments):
+        """Yield every assignment, raising ValueError if one is invalid."""
+        for assignment in assignments:
+            if not self.check_assignment(assignment):
+                raise ValueError("invalid switch assignment: " +
+                                 str(assignment))
+            yield assignment
+
+    def _run_all(self, assignments, chunk_size):
+        """Yield the (assignment, traces) pair of every assignment."""
+        if self.processes == 1:
+            for assignment in assignments:
+                yield assignment, self.run_assignment(assignment)
+            return
+
+        if sys.platform.startswith("linux"):
+            # The workers are given this sweep when they are forked, so
+            # nothing is pickled or parsed. Forking is not safe on macOS,
+            # where system libraries may have started threads.
+            pool = multiprocessing.get_context("fork").Pool(
+                self.processes, _inherit_worker, (self,))
+        else:
+            pool = multiprocessing.Pool(
+                self.processes, _start_worker,
+                (self.path, self.cycles, self.engine, self.seed,
+                 self.cache_directory, self.checkpoint_path))
+        # The pool would take every assignment at once, so they are given
+        # to it in batches of a few chunks per process
+        batch_size = chunk_size * CHUNKS_PER_BATCH * (
+            self.processes or os.cpu_count() or 1)
+        with pool:
+            while True:
+                batch = list(itertools.islice(assignments, batch_size))
+                if not batch:
+                    break
+                yield from zip(batch, pool.imap(_run_in_worker, batch,
+                                                chunk_size))
+
+    def read_assignment(self, text):
+        """Return the assignment written as text, in the form "SW1=0,SW2=1".
+
+        Return None if the text is not a valid assignment.
+        """
+        assignment = {}
+        for item in text.split(","):
+            switch_name, equals, switch_state = item.strip().partition("=")
+            if not equals or switch_state.strip() not in ["0", "1"]:
+                return None
+            assignment[switch_name.strip()] = int(switch_state)
+        if not self.check_assignment(assignment):
+            return None
+        return assignment
+
+    def _format_assignment(self, assignment, switch_names):
+        """Return the switch states of an assignment, aligned with names."""
+        return " ".join(str(assignment[switch_name]).rjust(len(switch_name))
+                        for switch_name in switch_names) + " : "
+
+    def format_results(self, results):
+        """Return an iterator over the lines showing the traces of every run.
+
+        After a heading, each line shows the switch states of one run,
+        followed by the traces of the monitored signals, in the same symbols
+        as Monitors.display_signals().
+        """
+        symbols = self.monitors.symbols
+        switch_names = None
+        for assignment, traces in results:
+            if switch_names is None:
+                switch_names = list(assignment)
+                yield " ".join(switch_names) + " : " + \
+                    " ".join(self.get_monitor_names())
+            line = self._format_assignment(assignment, switch_names)
+            if traces is None:
+                yield line + "Error! Network oscillating."
+            else:
+                yield line + " ".join("".join(symbols[signal]
+                                              for signal in trace)
+                                      for trace in traces)
+
+    def display_results(self, results):
+        """Display the traces of every run in the text console."""
+        for line in self.format_results(results):
+            print(line)
+
+    def compare_results(self, results):
+        """Compare the traces of every run with those of the first run.
+
+        The first run that does not oscillate is compared with, and only its
+        traces are kept. Return an iterator over (assignment, cycles) pairs,
+        one per run, where cycles lists, for each monitored signal, the first
+        cycle at which the trace differs from the trace of the first run, or
+        None if they are the same. cycles is None for runs that oscillate.
+        """
+        first_traces = None
+        for assignment, traces in results:
+            if traces is None:
+                yield assignment, None
+                continue
+            if first_traces is None:
+                first_traces = traces
+            cycles = []
+            for trace, first_trace in zip(traces, first_traces):
+                first_cycle = None
+                for cycle, (signal, first_signal) in enumerate(
+                        zip(trace, first_trace)):
+                    if signal != first_signal:
+                        first_cycle = cycle
+                        break
+                cycles.append(first_cycle)
+            yield assignment, cycles
+
+    def format_comparison(self, results):
+        """Return an iterator over the lines comparing the runs with the first.
+
+        After a heading, each line shows the switch states of one run,
+        followed by "=" for every monitored signal whose trace is the same as
+        in the first run, or the first cycle at which it differs.
+        """
+        switch_names = None
+        monitor_names = self.get_monitor_names()
+        for assignment, cycles in self.compare_results(results):
+            if switch_names is None:
+                switch_names = list(assignment)
+                yield " ".join(switch_names) + " : " + " ".join(monitor_names)
+            line = self._format_assignment(assignment, switch_names)
+            if cycles is None:
+                yield line + "Error! Network oscillating."
+            else:
+                yield line + " ".join(
+                    ("=" if cycle is None else str(cycle)).rjust(
+                        len(monitor_name))
+                    for cycle, monitor_name in zip(cycles, monitor_names))
+
+    def display_comparison(self, results):
+        """Display the comparison of every run with the first run."""
+        for line in self.format_comparison(results):
+            print(line)
+
+    def display_sweep(self, results):
+        """Display the traces of every run, then their comparison.
+
+        The results are iterated only once, as they are displayed. The lines
+        of the comparison are kept in a temporary file until all the traces
+        have been displayed.
+        """
+        results, compared_results = itertools.tee(results)
+        with tempfile.TemporaryFile("w+") as comparison_file:
+            # Both iterators give a heading, then a line per run, so the tee
+            # only holds one result at a time
+            for line, comparison_line in zip(
+                    self.format_results(results),
+                    self.format_comparison(compared_results)):
+                print(line)
+                comparison_file.write(comparison_line + "\n")
+            comparison_file.seek(0)
+            print("\nFirst cycle differing from the first run (= if none):")
+            for comparison_line in comparison_file:
+                print(comparison_line, end="")
@@ -0,0 +1,106 @@
+"""Test the binary module."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from cache import NetlistCache
+from binary import BinaryNetlist, is_binary_netlist
+
+
+def new_network():
+    """Return new, empty Names, Devices, Network and Monitors instances."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    return names, devices, network, monitors
+
+
+def describe(parsed):
+    """Return the devices, connections and monitors of a network by name."""
+    names, devices, network, monitors = parsed
+    device_list = []
+    for device in devices.devices_list:
+        device_list.append((
+            names.get_name_string(device.device_id),
+            names.get_name_string(device.device_kind),
+            device.switch_state, device.clock_half_period,
+            device.siggen_waveform,
+            sorted((names.get_name_string(input_id),
+                    devices.get_signal_name(*connection))
+                   for input_id, connection in device.inputs.items()),
+            sorted(devices.get_signal_name(device.device_id, output_id)
+                   for output_id in device.outputs)))
+    return device_list, monitors.get_signal_names()[0]
+
+
+def run_traces(parsed, cycles=20):
+    """Run a network from a seeded cold start-up and return its traces."""
+    names, devices, network, monitors = parsed
+    random.seed(0)
+    devices.cold_startup()
+    for _ in range(cycles):
+        network.execute_network()
+        monitors.record_signals()
+    return [list(signal_list)
+            for signal_list in monitors.monitors_dictionary.values()]
+
+
+@pytest.mark.parametrize("path", ["main_def_files/sequential.txt",
+                                  "main_def_files/combinational.txt"])
+def test_write_and_load(tmp_path, path):
+    """Test if a written binary netlist loads into the same network."""
+    parsed = NetlistCache().parse_network(path)
+    binary_path = str(tmp_path / "network.bin")
+    assert BinaryNetlist(*parsed).write(binary_path)
+    assert is_binary_netlist(binary_path)
+    assert not is_binary_netlist(path)
+
+    loaded = new_network()
+    assert BinaryNetlist(*loaded).load(binary_path)
+    assert describe(loaded) == describe(parsed)
+    assert run_traces(loaded) == run_traces(parsed)
+    # Binary netlists can be given wherever definition files can
+    assert describe(NetlistCache().parse_network(binary_path)) == \
+        describe(parsed)
+
+
+def test_load_gives_errors(tmp_path, capsys):
+    """Test if damaged binary netlists are not loaded."""
+    parsed = NetlistCache().parse_network("main_def_files/sequential.txt")
+    binary_path = tmp_path / "network.bin"
+    assert BinaryNetlist(*parsed).write(str(binary_path))
+    data = binary_path.read_bytes()
+    capsys.readouterr()
+
+    damaged_path = tmp_path / "damaged.bin"
+    for damaged in [data[:len(data) // 2],  # truncated
+                    b"NOTALOGSIMFILE" + data[14:],  # wrong magic number
+                    data[:-1] + b"\x7f"]:  # monitor name out of range
+        damaged_path.write_bytes(damaged)
+        assert not BinaryNetlist(*new_network()).load(str(damaged_path))
+        assert capsys.readouterr()[0].startswith("Error")
+    assert not BinaryNetlist(*new_network()).load(str(tmp_path / "none"))
+
+
+@pytest.mark.parametrize("half_period, written", [(99999999999, True),
+                                                  (10 ** 20, False)])
+def test_large_clock_half_period(tmp_path, half_period, written):
+    """Test if large numbers are written with 8 bytes, or not at all."""
+    definition_path = tmp_path / "clock.txt"
+    definition_path.write_text(
+        "START DEVICES;\nCK = CLOCK, cycles=" + str(half_period) +
+        ";\nEND DEVICES;\n\nSTART CONNECTIONS;\nEND CONNECTIONS;\n\n"
+        "START MONITORS;\nCK;\nEND MONITORS;\n")
+    parsed = NetlistCache().parse_network(str(definition_path))
+    assert parsed[1].devices_list[0].clock_half_period == half_period
+    binary_path = str(tmp_path / "clock.bin")
+    assert BinaryNetlist(*parsed).write(binary_path) == written
+    if written:
+        loaded = new_network()
+        assert BinaryNetlist(*loaded).load(binary_path)
+        assert describe(loaded) == describe(parsed)
@@ -0,0 +1,130 @@
+"""Test the cache module."""
+import os
+import random
+import shutil
+
+import pytest
+
+from binary import BinaryNetlist, is_binary_netlist
+from cache import NetlistCache
+from parse import Parser
+
+
+@pytest.fixture
+def definition_path(tmp_path):
+    """Return the path of a copy of a sequential definition file."""
+    path = str(tmp_path / "sequential.txt")
+    shutil.copy("test_def_files/sequential.txt", path)
+    return path
+
+
+@pytest.fixture
+def new_cache(tmp_path):
+    """Return a NetlistCache instance with an empty cache directory."""
+    return NetlistCache(str(tmp_path / "cache"))
+
+
+def run_traces(parsed, cycles=20):
+    """Run a parsed network from a seeded cold start-up and return traces."""
+    names, devices, network, monitors = parsed
+    random.seed(0)
+    devices.cold_startup()
+    for _ in range(cycles):
+        network.execute_network()
+        monitors.record_signals()
+    return {monitors.devices.get_signal_name(*key): list(signal_list)
+            for key, signal_list in monitors.monitors_dictionary.items()}
+
+
+def test_parse_network_loads_from_cache(monkeypatch, new_cache,
+                                        definition_path):
+    """Test if a cached network is loaded without parsing the file."""
+    parsed = new_cache.parse_network(definition_path)
+    assert parsed is not None
+    assert len(os.listdir(new_cache.directory)) == 1
+    assert is_binary_netlist(new_cache.get_entry_path(
+        new_cache.get_key(definition_path)))
+
+    def fail(parser):
+        raise AssertionError("definition file parsed again")
+    monkeypatch.setattr(Parser, "parse_network", fail)
+    loaded = new_cache.parse_network(definition_path)
+
+    names, devices, network, monitors = loaded
+    assert names.names == parsed[0].names
+    assert devices.devices_list is not parsed[1].devices_list
+    assert [device.device_kind for device in devices.devices_list] == \
+        [device.device_kind for device in parsed[1].devices_list]
+    # The instances still refer to one another
+    assert network.devices is devices and monitors.network is network
+    assert run_traces(loaded) == run_traces(parsed)
+
+
+def test_changed_file_is_parsed_again(new_cache, definition_path):
+    """Test if a changed definition file gets a new key and is parsed."""
+    key = new_cache.get_key(definition_path)
+    new_cache.parse_network(definition_path)
+    with open(definition_path, "a") as f:
+        f.write("\n// changed\n")
+    assert new_cache.get_key(definition_path) != key
+    assert new_cache.load(new_cache.get_key(definition_path)) is None
+    assert new_cache.parse_network(definition_path) is not None
+    assert len(os.listdir(new_cache.directory)) == 2
+
+
+def test_unusable_entries(new_cache, definition_path, capsys):
+    """Test if damaged entries and files with errors are not loaded."""
+    key = new_cache.get_key(definition_path)
+    entry_path = new_cache.get_entry_path(key)
+    os.makedirs(new_cache.directory)
+    with open(entry_path, "wb") as f:
+        f.write(b"not a netlist")
+    assert new_cache.load(key) is None
+    assert new_cache.parse_network(definition_path) is not None
+    assert new_cache.load(key) is not None
+
+    with open(entry_path, "rb") as f:
+        data = f.read()
+    with open(entry_path, "wb") as f:
+        f.write(data[:-4])
+    capsys.readouterr()
+    assert new_cache.load(key) is None
+    assert "Error: could not read binary netlist" in capsys.readouterr().out
+    assert new_cache.parse_network(definition_path) is not None
+    assert new_cache.load(key) is not None
+
+    error_cache = NetlistCache(new_cache.directory + "2")
+    assert error_cache.parse_network(
+        "test_def_files/srbistablewrong.txt") is None
+    assert not os.path.exists(error_cache.directory)
+    assert NetlistCache().get_key("test_def_files/no_such_file.txt") is None
+
+
+def test_no_cache_directory(definition_path):
+    """Test if a cache without a directory parses every time."""
+    no_cache = NetlistCache()
+    assert no_cache.parse_network(definition_path) is not None
+    assert not no_cache.store(no_cache.get_key(definition_path),
+                              None, None, None, None)
+    assert no_cache.load(no_cache.get_key(definition_path)) is None
+
+
+def test_store_failures_are_cache_misses(monkeypatch, tmp_path, new_cache):
+    """Test if networks that cannot be stored are still returned, and leave
+    no files in the cache directory."""
+    definition_path = tmp_path / "clock.txt"
+    definition_path.write_text(
+        "START DEVICES;\nCK = CLOCK, cycles=" + str(10 ** 20) +
+        ";\nEND DEVICES;\n\nSTART CONNECTIONS;\nEND CONNECTIONS;\n\n"
+        "START MONITORS;\nCK;\nEND MONITORS;\n")
+    assert new_cache.parse_network(str(definition_path)) is not None
+    assert os.listdir(new_cache.directory) == []
+
+    def fail(binary_netlist, path):
+        with open(path, "wb") as f:
+            f.write(b"LOGSIMNL")
+        raise RuntimeError("write failed")
+    monkeypatch.setattr(BinaryNetlist, "write", fail)
+    assert new_cache.parse_network("test_def_files/sequential.txt") \
+        is not None
+    assert os.listdir(new_cache.directory) == []
@@ -0,0 +1,234 @@
+"""Test the checkpoint module."""
+import random
+import struct
+import zlib
+
+import pytest
+
+import checkpoint
+from cache import NetlistCache
+from checkpoint import Checkpoint, HEADER, MONITOR
+
+
+def parse_network(path, engine, trace_type):
+    """Parse the file with a seeded cold start-up, on the engine."""
+    random.seed(0)
+    names, devices, network, monitors = NetlistCache().parse_network(path)
+    network.set_engine(getattr(network, engine))
+    if trace_type == "RING_TRACE":
+        monitors.set_trace_type(monitors.RING_TRACE, 8)
+    else:
+        monitors.set_trace_type(getattr(monitors, trace_type))
+    monitors.reset_monitors()
+    return names, devices, network, monitors
+
+
+def run(parsed, cycles):
+    """Run the network, recording the signals, for the number of cycles."""
+    names, devices, network, monitors = parsed
+    for _ in range(cycles):
+        assert network.execute_network()
+        monitors.record_signals()
+
+
+def get_state(parsed):
+    """Return the dynamic state of the devices and the monitor traces."""
+    names, devices, network, monitors = parsed
+    return ([(dict(device.outputs), device.dtype_memory, device.clock_counter,
+              device.siggen_counter, device.switch_state)
+             for device in devices.devices_list],
+            {monitor: list(signal_list) for monitor, signal_list
+             in monitors.monitors_dictionary.items()})
+
+
+@pytest.mark.parametrize("path", ["main_def_files/sequential.txt",
+                                  "main_def_files/combinational.txt"])
+@pytest.mark.parametrize("engine", ["OBJECT_ENGINE", "EVENT_ENGINE"])
+@pytest.mark.parametrize("trace_type", ["ARRAY_TRACE", "CHANGE_TRACE",
+                                        "RING_TRACE"])
+def test_restore_continues_run(path, engine, trace_type):
+    """Test if a restored network carries on exactly as the saved one."""
+    parsed = parse_network(path, engine, trace_type)
+    names, devices, network, monitors = parsed
+    run(parsed, 15)
+    data = Checkpoint(devices, monitors).save(15)
+    switch_id = devices.find_devices(devices.SWITCH)[0]
+    devices.set_switch(switch_id, 1)
+    run(parsed, 15)
+
+    restored = parse_network(path, engine, trace_type)
+    restored_devices = restored[1]
+    assert Checkpoint(restored_devices, restored[3]).restore(data) == 15
+    restored_devices.set_switch(switch_id, 1)
+    run(restored, 15)
+    assert get_state(restored) == get_state(parsed)
+
+
+def test_restore_replaces_monitors():
+    """Test if restoring brings back the monitors of the checkpoint."""
+    parsed = parse_network("main_def_files/sequential.txt", "OBJECT_ENGINE",
+                           "ARRAY_TRACE")
+    names, devices, network, monitors = parsed
+    run(parsed, 5)
+    state = get_state(parsed)
+    checkpoint = Checkpoint(devices, monitors)
+    data = checkpoint.save(5)
+
+    run(parsed, 5)
+    for monitor in list(monitors.monitors_dictionary):
+        monitors.remove_monitor(*monitor)
+    assert checkpoint.restore(data) == 5
+    assert get_state(parsed) == state
+    run(parsed, 1)
+    assert all(len(signal_list) == 6 for signal_list
+               in monitors.monitors_dictionary.values())
+
+
+def test_write_and_load(tmp_path, capsys):
+    """Test if checkpoint files are written and loaded."""
+    parsed = parse_network("main_def_files/sequential.txt", "COMPILED_ENGINE",
+                           "ARRAY_TRACE")
+    names, devices, network, monitors = parsed
+    run(parsed, 10)
+    state = get_state(parsed)
+    checkpoint = Checkpoint(devices, monitors)
+    path = str(tmp_path / "state.ckpt")
+    assert checkpoint.write(path, 10)
+    assert not checkpoint.write(str(tmp_path / "missing" / "state.ckpt"), 10)
+
+    run(parsed, 10)
+    assert checkpoint.load(path) == 10
+    assert get_state(parsed) == state
+    assert checkpoint.load(str(tmp_path / "missing.ckpt")) is None
+    assert "Error: could not read checkpoint" in capsys.readouterr().out
+
+
+def test_restore_gives_errors(capsys):
+    """Test if invalid checkpoints are rejected without changing the state."""
+    parsed = parse_network("main_def_files/sequential.txt", "OBJECT_ENGINE",
+                           "ARRAY_TRACE")
+    names, devices, network, monitors = parsed
+    run(parsed, 5)
+    checkpoint = Checkpoint(devices, monitors)
+    data = checkpoint.save(5)
+    run(parsed, 5)
+    state = get_state(parsed)
+
+    other = parse_network("main_def_files/combinational.txt",
+                          "OBJECT_ENGINE", "ARRAY_TRACE")
+    assert Checkpoint(other[1], other[3]).restore(data) is None
+    assert "different network" in capsys.readouterr().out
+    assert checkpoint.restore(b"LOGSIMNL" + data[8:]) is None
+    assert checkpoint.restore(data[:-4]) is None
+    assert checkpoint.restore(data[:10]) is None
+    assert checkpoint.restore(data + b"\x00") is None
+    assert get_state(parsed) == state
+
+
+def test_rewired_network_is_rejected(tmp_path, capsys):
+    """Test if a network with the same devices, wired differently, is
+    rejected."""
+    parsed = parse_network("main_def_files/sequential.txt", "OBJECT_ENGINE",
+                           "ARRAY_TRACE")
+    run(parsed, 5)
+    data = Checkpoint(parsed[1], parsed[3]).save(5)
+
+    with open("main_def_files/sequential.txt") as f:
+        definition = f.read()
+    rewired_path = tmp_path / "rewired.txt"
+    rewired_path.write_text(definition.replace(
+        "SW1 -> D1.SET;\nSW2 -> D1.CLEAR;",
+        "SW2 -> D1.SET;\nSW1 -> D1.CLEAR;"))
+    rewired = parse_network(str(rewired_path), "OBJECT_ENGINE",
+                            "ARRAY_TRACE")
+    rewired_checkpoint = Checkpoint(rewired[1], rewired[3])
+    assert rewired_checkpoint.get_fingerprint() != \
+        Checkpoint(parsed[1], parsed[3]).get_fingerprint()
+    assert rewired_checkpoint.restore(data) is None
+    assert "different network" in capsys.readouterr().out
+
+
+def test_large_ring_capacity_is_rejected(monkeypatch, capsys):
+    """Test if a ring trace capacity larger than the checkpoint is rejected
+    before its buffer is allocated."""
+    parsed = parse_network("main_def_files/sequential.txt", "OBJECT_ENGINE",
+                           "RING_TRACE")
+    names, devices, network, monitors = parsed
+    run(parsed, 5)
+    data = Checkpoint(devices, monitors).save(5)
+    (device_id, output_id), signal_list = next(iter(
+        monitors.monitors_dictionary.items()))
+
+    body = zlib.decompress(data[HEADER.size:])
+    record = MONITOR.pack(device_id, output_id, monitors.RING_TRACE,
+                          signal_list.capacity, signal_list.total)
+    assert body.count(record) == 1
+    body = body.replace(record, MONITOR.pack(
+        device_id, output_id, monitors.RING_TRACE, 1 << 40,
+        signal_list.total))
+
+    def fail(capacity, blank=0):
+        raise AssertionError("ring buffer allocated")
+    monkeypatch.setattr(checkpoint, "RingTrace", fail)
+    assert Checkpoint(devices, monitors).restore(
+        data[:HEADER.size] + zlib.compress(body)) is None
+    assert "could not read checkpoint" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("trace_type", ["ARRAY_TRACE", "CHANGE_TRACE",
+                                        "RING_TRACE"])
+def test_invalid_traces_are_rejected(trace_type, capsys):
+    """Test if traces with invalid signals, or change traces with changes
+    out of order or out of range, are rejected."""
+    parsed = parse_network("main_def_files/combinational.txt",
+                           "OBJECT_ENGINE", trace_type)
+    names, devices, network, monitors = parsed
+    run(parsed, 20)
+    checkpoint = Checkpoint(devices, monitors)
+    data = checkpoint.save(20)
+    state = get_state(parsed)
+    body = zlib.decompress(data[HEADER.size:])
+
+    # The body ends with the signals of the last trace
+    damaged_bodies = [body[:-1] + bytes([len(devices.signal_types)])]
+    if trace_type == "CHANGE_TRACE":
+        (device_id, output_id), signal_list = next(
+            (monitor, signal_list) for monitor, signal_list
+            in monitors.monitors_dictionary.items()
+            if len(signal_list.change_cycles) >= 2)
+        count = len(signal_list.change_cycles)
+        record = MONITOR.pack(device_id,
+                              -1 if output_id is None else output_id,
+                              monitors.CHANGE_TRACE, 20, count)
+        assert body.count(record) == 1
+        # The cycles of the changes follow the record of the monitor
+        end = body.index(record) + MONITOR.size + 8 * count
+        for cycle in [signal_list.change_cycles[-2], 20]:
+            damaged_bodies.append(body[:end - 8] + struct.pack("<q", cycle) +
+                                  body[end:])
+    for damaged_body in damaged_bodies:
+        assert checkpoint.restore(data[:HEADER.size] +
+                                  zlib.compress(damaged_body)) is None
+        assert "could not read checkpoint" in capsys.readouterr().out
+    assert get_state(parsed) == state
+
+
+def test_large_clock_counter(tmp_path):
+    """Test if clock counters that do not fit in four bytes are saved."""
+    definition_path = tmp_path / "clock.txt"
+    definition_path.write_text(
+        "START DEVICES;\nCK = CLOCK, cycles=99999999999;\nEND DEVICES;\n\n"
+        "START CONNECTIONS;\nEND CONNECTIONS;\n\n"
+        "START MONITORS;\nCK;\nEND MONITORS;\n")
+    parsed = parse_network(str(definition_path), "OBJECT_ENGINE",
+                           "ARRAY_TRACE")
+    names, devices, network, monitors = parsed
+    [clock] = devices.devices_list
+    clock.clock_counter = 99999999000
+    run(parsed, 15)
+    state = get_state(parsed)
+    data = Checkpoint(devices, monitors).save(15)
+    run(parsed, 5)
+    assert Checkpoint(devices, monitors).restore(data) == 15
+    assert get_state(parsed) == state
+    assert clock.clock_counter > 1 << 32
@@ -52,6 +52,16 @@ def test_find_devices(devices_with_items):
     assert devices.find_devices(devices.XOR) == []
 
 
+def test_find_devices_returns_copy(devices_with_items):
+    """Test if changing the list from find_devices leaves the index intact."""
+    devices = devices_with_items
+    [AND1_ID] = devices.names.lookup(["And1"])
+
+    and_devices = devices.find_devices(devices.AND)
+    and_devices.append(AND1_ID)
+    assert devices.find_devices(devices.AND) == [AND1_ID]
+
+
 def test_make_device(new_devices):
     """Test if make_device correctly makes devices with their properties."""
     names = new_devices.names
@@ -178,3 +188,20 @@ def test_set_switch(new_devices):
     # Set switch Sw1 to LOW
     new_devices.set_switch(SW1_ID, new_devices.LOW)
     assert switch_object.switch_state == new_devices.LOW
+
+
+def test_make_device_cold_starts_only_itself(new_devices):
+    """Test if making a clock or D-type leaves other devices' state alone."""
+    names = new_devices.names
+    [D1_ID, D2_ID, CL_ID] = names.lookup(["D1", "D2", "Clock1"])
+    new_devices.make_device(D1_ID, new_devices.D_TYPE)
+    d_type = new_devices.get_device(D1_ID)
+    d_type.dtype_memory = new_devices.BLANK
+    new_devices.make_device(CL_ID, new_devices.CLOCK, 3)
+    clock = new_devices.get_device(CL_ID)
+    clock.clock_counter = 7
+    new_devices.make_device(D2_ID, new_devices.D_TYPE)
+    assert d_type.dtype_memory == new_devices.BLANK
+    assert clock.clock_counter == 7
+    assert new_devices.get_device(D2_ID).dtype_memory in [new_devices.LOW,
+                                                          new_devices.HIGH]
@@ -0,0 +1,61 @@
+"""Test the logsim module."""
+import random
+import subprocess
+import sys
+
+from logsim import run_batch
+
+
+def test_run_batch_writes_vcd(tmp_path, capsys):
+    """Test if a batch run writes the monitored signals to a VCD file."""
+    vcd_path = str(tmp_path / "traces.vcd")
+    assert run_batch("main_def_files/sequential.txt", "10", vcd_path)
+    with open(vcd_path) as f:
+        contents = f.read()
+    assert "$enddefinitions $end" in contents
+    assert contents.rstrip().endswith("#10")
+    # The GUI modules are not needed for a batch run
+    assert "wx" not in sys.modules
+
+
+def test_run_batch_displays_signals(capsys):
+    """Test if a batch run without a VCD file displays the signals."""
+    assert run_batch("main_def_files/sequential.txt", "10")
+    assert "D1.Q: " in capsys.readouterr().out
+    assert run_batch("main_def_files/sequential.txt", "10", statistics=True)
+    assert "Cycles: 10 (0 failed)" in capsys.readouterr().out
+
+
+def test_run_batch_from_checkpoint(tmp_path, capsys):
+    """Test if a batch run carries on from a checkpoint of an earlier one."""
+    path = "main_def_files/sequential.txt"
+    checkpoint_path = str(tmp_path / "state.ckpt")
+    random.seed(0)  # the same cold start-up for both runs
+    assert run_batch(path, "20")
+    expected = capsys.readouterr().out.splitlines()[-3:]
+    random.seed(0)
+    assert run_batch(path, "10", save_path=checkpoint_path)
+    random.seed(1)  # the cold start-up is replaced by the checkpoint
+    assert run_batch(path, "10", checkpoint_path=checkpoint_path)
+    assert capsys.readouterr().out.splitlines()[-3:] == expected
+    assert not run_batch(path, "10",
+                         checkpoint_path=str(tmp_path / "missing.ckpt"))
+
+
+def test_run_batch_gives_errors(tmp_path, capsys):
+    """Test if invalid batch runs fail."""
+    assert not run_batch("main_def_files/sequential.txt", None)
+    assert not run_batch("main_def_files/sequential.txt", "ten")
+    assert not run_batch("test_def_files/srbistablewrong.txt", "10")
+    assert not run_batch("main_def_files/sequential.txt", "10",
+                         str(tmp_path / "missing" / "traces.vcd"))
+
+
+def test_imports_without_gui_or_numpy():
+    """Test if logsim and the core modules import no GUI modules or NumPy."""
+    code = ("import sys, logsim, scenarios, sweep\n"
+            "print(sorted({'wx', 'OpenGL', 'gui', 'numpy'} & "
+            "set(sys.modules)))")
+    output = subprocess.run([sys.executable, "-c", code], check=True,
+                            stdout=subprocess.PIPE, text=True).stdout
+    assert output.strip() == "[]"
@@ -1,4 +1,6 @@
 """Test the monitors module."""
+import array
+
 import pytest
 
 from names import Names
@@ -7,6 +9,11 @@ from devices import Devices
 from monitors import Monitors
 
 
+def trace(*signals):
+    """Return a signal trace as stored by the monitors."""
+    return array.array("b", signals)
+
+
 @pytest.fixture
 def new_monitors():
     """Return a Monitors class instance with monitors set on three outputs."""
@@ -39,9 +46,9 @@ def test_make_monitor(new_monitors):
     names = new_monitors.names
     [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
 
-    assert new_monitors.monitors_dictionary == {(SW1_ID, None): [],
-                                                (SW2_ID, None): [],
-                                                (OR1_ID, None): []}
+    assert new_monitors.monitors_dictionary == {(SW1_ID, None): trace(),
+                                                (SW2_ID, None): trace(),
+                                                (OR1_ID, None): trace()}
 
 
 def test_make_monitor_gives_errors(new_monitors):
@@ -72,8 +79,8 @@ def test_remove_monitor(new_monitors):
     [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
 
     new_monitors.remove_monitor(SW1_ID, None)
-    assert new_monitors.monitors_dictionary == {(SW2_ID, None): [],
-                                                (OR1_ID, None): []}
+    assert new_monitors.monitors_dictionary == {(SW2_ID, None): trace(),
+                                                (OR1_ID, None): trace()}
 
 
 def test_get_signal_names(new_monitors):
@@ -115,9 +122,9 @@ def test_record_signals(new_monitors):
     new_monitors.record_signals()
 
     assert new_monitors.monitors_dictionary == {
-        (SW1_ID, None): [LOW, HIGH, HIGH],
-        (SW2_ID, None): [LOW, LOW, HIGH],
-        (OR1_ID, None): [LOW, HIGH, HIGH]}
+        (SW1_ID, None): trace(LOW, HIGH, HIGH),
+        (SW2_ID, None): trace(LOW, LOW, HIGH),
+        (OR1_ID, None): trace(LOW, HIGH, HIGH)}
 
 
 def test_get_margin(new_monitors):
@@ -145,13 +152,14 @@ def test_reset_monitors(new_monitors):
     LOW = devices.LOW
     new_monitors.record_signals()
     new_monitors.record_signals()
-    assert new_monitors.monitors_dictionary == {(SW1_ID, None): [LOW, LOW],
-                                                (SW2_ID, None): [LOW, LOW],
-                                                (OR1_ID, None): [LOW, LOW]}
+    assert new_monitors.monitors_dictionary == {
+        (SW1_ID, None): trace(LOW, LOW),
+        (SW2_ID, None): trace(LOW, LOW),
+        (OR1_ID, None): trace(LOW, LOW)}
     new_monitors.reset_monitors()
-    assert new_monitors.monitors_dictionary == {(SW1_ID, None): [],
-                                                (SW2_ID, None): [],
-                                                (OR1_ID, None): []}
+    assert new_monitors.monitors_dictionary == {(SW1_ID, None): trace(),
+                                                (SW2_ID, None): trace(),
+                                                (OR1_ID, None): trace()}
 
 
 def test_display_signals(capsys, new_monitors):
@@ -197,3 +205,99 @@ def test_display_signals(capsys, new_monitors):
             "Clock1: -__--__--__--__--__-" in traces)
 
     assert "" in traces  # additional empty line at the end
+
+
+def test_traces_are_compact(new_monitors):
+    """Test if traces are stored with one byte per simulation cycle."""
+    names = new_monitors.names
+    [SW1_ID] = names.lookup(["Sw1"])
+    for _ in range(1000):
+        new_monitors.record_signals()
+    signal_list = new_monitors.monitors_dictionary[(SW1_ID, None)]
+    assert signal_list.itemsize == 1
+    assert len(signal_list) == 1000
+    # Monitors made late are padded with BLANK signals
+    [D_ID, Q_ID] = names.lookup(["D1", "Q"])
+    new_monitors.devices.make_device(D_ID, new_monitors.devices.D_TYPE)
+    new_monitors.make_monitor(D_ID, Q_ID, 3)
+    assert new_monitors.monitors_dictionary[(D_ID, Q_ID)] == \
+        trace(*[new_monitors.devices.BLANK] * 3)
+
+
+def test_change_traces(new_monitors):
+    """Test if change traces record the same signals as array traces."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID, OR1_ID, CL_ID] = names.lookup(["Sw1", "Or1", "Clock1"])
+    assert not new_monitors.set_trace_type(5)
+    assert new_monitors.set_trace_type(new_monitors.CHANGE_TRACE)
+    devices.make_device(CL_ID, devices.CLOCK, 3)
+    new_monitors.make_monitor(CL_ID, None, 2)
+    new_monitors.reset_monitors()
+
+    expected = {key: [] for key in new_monitors.monitors_dictionary}
+    for cycle in range(30):
+        if cycle == 10:
+            devices.set_switch(SW1_ID, devices.HIGH)
+        network.execute_network()
+        new_monitors.record_signals()
+        for key in expected:
+            expected[key].append(network.get_output_signal(*key))
+
+    assert new_monitors.monitors_dictionary == expected
+    or_trace = new_monitors.monitors_dictionary[(OR1_ID, None)]
+    assert list(or_trace.changes()) == [(0, devices.LOW), (10, devices.HIGH)]
+
+
+def test_ring_traces(capsys, new_monitors):
+    """Test if ring traces keep and display only the last cycles."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID] = names.lookup(["Sw1"])
+    assert not new_monitors.set_trace_type(new_monitors.RING_TRACE)
+    assert not new_monitors.set_trace_type(new_monitors.ARRAY_TRACE, 5)
+    assert new_monitors.set_trace_type(new_monitors.RING_TRACE, 5)
+    new_monitors.reset_monitors()
+
+    for cycle in range(12):
+        if cycle == 9:
+            devices.set_switch(SW1_ID, devices.HIGH)
+        network.execute_network()
+        new_monitors.record_signals()
+
+    assert new_monitors.get_first_cycle() == 7
+    assert list(new_monitors.monitors_dictionary[(SW1_ID, None)]) == \
+        [devices.LOW, devices.LOW, devices.HIGH, devices.HIGH, devices.HIGH]
+    new_monitors.display_signals()
+    out, _ = capsys.readouterr()
+    assert out.split("\n") == ["   : cycle 7", "Sw1: __---", "Sw2: _____",
+                               "Or1: __---", ""]
+
+
+def test_record_after_monitors_change(new_monitors):
+    """Test if recording follows monitors being made, removed and reset."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+    LOW = devices.LOW
+    HIGH = devices.HIGH
+    new_monitors.record_signals()
+    new_monitors.remove_monitor(SW2_ID, None)
+    devices.set_switch(SW1_ID, HIGH)
+    new_monitors.network.execute_network()
+    new_monitors.record_signals()
+    assert new_monitors.get_monitor_signal(SW1_ID, None) == HIGH
+    assert new_monitors.get_monitor_signal(SW2_ID, None) is None
+    assert new_monitors.monitors_dictionary == {
+        (SW1_ID, None): trace(LOW, HIGH),
+        (OR1_ID, None): trace(LOW, HIGH)}
+
+    new_monitors.reset_monitors()
+    new_monitors.make_monitor(SW2_ID, None)
+    new_monitors.record_signals()
+    assert new_monitors.monitors_dictionary == {
+        (SW1_ID, None): trace(HIGH),
+        (OR1_ID, None): trace(HIGH),
+        (SW2_ID, None): trace(LOW)}
@@ -67,3 +67,11 @@ def test_query(used_names, new_names, expected_query_id_list, name_list_2):
     # Name is present
     for i in range(len(name_list_2)):
         assert used_names.query(name_list_2[i]) == expected_query_id_list[i]
+
+
+def test_lookup_many(used_names):
+    """Test if lookup_many accepts any iterable and keeps the ID numbering."""
+    names_generator = (name for name in ["Eve", "John", "Alice", "John"])
+    assert used_names.lookup_many(names_generator) == [2, 3, 0, 3]
+    assert used_names.query("John") == 3
+    assert used_names.get_name_string(3) == "John"
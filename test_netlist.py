@@ -0,0 +1,243 @@
+"""Test the netlist module."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+
+
+def run_definition_file(path, engine, cycles=40, seed=0):
+    """Parse the definition file and run it on the specified engine.
+
+    Switch SW1 is toggled half way through. Return the monitored traces.
+    """
+    random.seed(seed)
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner(path, names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    assert parser.parse_network()
+    network.set_engine(getattr(network, engine))
+
+    [SW1_ID] = names.lookup(["SW1"])
+    for cycle in range(cycles):
+        if cycle == cycles // 2:
+            switch_state = devices.get_device(SW1_ID).switch_state
+            devices.set_switch(SW1_ID, 1 - switch_state)
+        assert network.execute_network()
+        monitors.record_signals()
+    return dict(monitors.monitors_dictionary)
+
+
+@pytest.mark.parametrize("path", ["main_def_files/combinational.txt",
+                                  "main_def_files/sequential.txt"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("engine", ["COMPILED_ENGINE", "EVENT_ENGINE",
+                                    "VECTOR_ENGINE"])
+def test_engines_match_object_engine(path, seed, engine):
+    """Test if the netlist engines give the same traces as the object one."""
+    assert run_definition_file(path, engine, seed=seed) == \
+        run_definition_file(path, "OBJECT_ENGINE", seed=seed)
+
+
+def make_random_network(seed, engine):
+    """Return a random network of every device kind, with feedback loops."""
+    rng = random.Random(seed)
+    random.seed(seed)
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    outputs = []
+    for i in range(3):
+        [SW_ID] = names.lookup(["Sw" + str(i)])
+        devices.make_device(SW_ID, devices.SWITCH, rng.randrange(2))
+        outputs.append((SW_ID, None))
+    [CLK_ID, SG_ID] = names.lookup(["Clk", "Sig"])
+    devices.make_device(CLK_ID, devices.CLOCK, rng.randrange(1, 4))
+    devices.make_device(SG_ID, devices.SIGGEN, "0110")
+    outputs += [(CLK_ID, None), (SG_ID, None)]
+    dtype_ids = names.lookup(["D1", "D2", "D3"])
+    for D_ID in dtype_ids:
+        devices.make_device(D_ID, devices.D_TYPE)
+        outputs += [(D_ID, devices.Q_ID), (D_ID, devices.QBAR_ID)]
+    for i in range(20):
+        [GATE_ID] = names.lookup(["G" + str(i)])
+        kind = rng.choice(devices.gate_types)
+        if kind == devices.XOR:
+            no_of_inputs = 2
+            devices.make_device(GATE_ID, kind)
+        else:
+            no_of_inputs = rng.randrange(1, 4)
+            devices.make_device(GATE_ID, kind, no_of_inputs)
+        outputs.append((GATE_ID, None))
+        for input_id in names.lookup(["I" + str(j + 1)
+                                      for j in range(no_of_inputs)]):
+            network.make_connection(*rng.choice(outputs), GATE_ID, input_id)
+    for D_ID in dtype_ids:
+        for input_id in devices.dtype_input_ids:
+            network.make_connection(*rng.choice(outputs), D_ID, input_id)
+    network.set_engine(getattr(network, engine))
+    return network, rng
+
+
+def run_random_network(seed, engine, cycles=20):
+    """Run a random network, setting random switches between cycles.
+
+    Return the result of every cycle and the device states after it.
+    """
+    network, rng = make_random_network(seed, engine)
+    devices = network.devices
+    switch_ids = devices.find_devices(devices.SWITCH)
+    history = []
+    for _ in range(cycles):
+        if rng.random() < 0.3:
+            devices.set_switch(rng.choice(switch_ids), rng.randrange(2))
+        result = network.execute_network()
+        history.append((result, [(dict(device.outputs), device.dtype_memory)
+                                 for device in devices.devices_list]))
+    return repr(history)
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("engine", ["COMPILED_ENGINE", "EVENT_ENGINE",
+                                    "VECTOR_ENGINE"])
+def test_engines_match_on_random_networks(seed, engine):
+    """Test if the netlist engines match the object engine cycle by cycle."""
+    assert run_random_network(seed, engine) == \
+        run_random_network(seed, "OBJECT_ENGINE")
+
+
+def test_compile_network():
+    """Test if compile_network flattens devices and connections correctly."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    [SW1_ID, SW2_ID, AND1_ID, I1, I2] = names.lookup(["Sw1", "Sw2", "And1",
+                                                      "I1", "I2"])
+    devices.make_device(AND1_ID, devices.AND, 2)
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(SW2_ID, devices.SWITCH, 0)
+    network.make_connection(SW1_ID, None, AND1_ID, I1)
+    network.make_connection(SW2_ID, None, AND1_ID, I2)
+
+    netlist = network.compile_network()
+    assert netlist.device_ids == [SW1_ID, SW2_ID, AND1_ID]
+    assert netlist.device_kinds == [devices.SWITCH, devices.SWITCH,
+                                    devices.AND]
+    and_slot = netlist.slot_ids[(AND1_ID, None)]
+    assert netlist.input_slots[2] == (netlist.slot_ids[(SW1_ID, None)],
+                                      netlist.slot_ids[(SW2_ID, None)])
+    assert netlist.output_slots[2] == (and_slot,)
+    assert not netlist.is_stale()
+
+    # Adding a device makes the netlist out of date
+    [SW3_ID] = names.lookup(["Sw3"])
+    devices.make_device(SW3_ID, devices.SWITCH, 0)
+    assert netlist.is_stale()
+
+
+@pytest.mark.parametrize("engine", ["COMPILED_ENGINE", "EVENT_ENGINE",
+                                    "VECTOR_ENGINE"])
+def test_engine_follows_switches(engine):
+    """Test if the netlist engines see switches set between cycles."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    network.set_engine(getattr(network, engine))
+    [SW1_ID, SW2_ID, XOR1_ID, I1, I2] = names.lookup(["Sw1", "Sw2", "Xor1",
+                                                      "I1", "I2"])
+    devices.make_device(XOR1_ID, devices.XOR)
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(SW2_ID, devices.SWITCH, 0)
+    network.make_connection(SW1_ID, None, XOR1_ID, I1)
+    network.make_connection(SW2_ID, None, XOR1_ID, I2)
+
+    assert network.execute_network()
+    assert network.get_output_signal(XOR1_ID, None) == devices.LOW
+    devices.set_switch(SW1_ID, devices.HIGH)
+    assert network.execute_network()
+    assert network.get_output_signal(XOR1_ID, None) == devices.HIGH
+
+
+def test_load_switches():
+    """Test if load_switches copies only the switches that changed."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    [SW1_ID, SW2_ID] = names.lookup(["Sw1", "Sw2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(SW2_ID, devices.SWITCH, 1)
+    netlist = network.compile_network()
+    netlist.load_state()
+    state_version = devices.state_version
+
+    assert netlist.load_switches() == []
+    devices.set_switch(SW1_ID, devices.HIGH)
+    devices.set_switch(SW2_ID, devices.HIGH)  # unchanged
+    assert devices.state_version == state_version
+    assert netlist.load_switches() == [netlist.device_ids.index(SW1_ID)]
+    assert netlist.switch_targets[netlist.device_ids.index(SW1_ID)] == 1
+    assert netlist.load_switches() == []
+
+
+def test_events_after_set_switch():
+    """Test if only the devices reached by a set switch are re-evaluated."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    network.set_engine(network.EVENT_ENGINE)
+    [SW1_ID, SW2_ID, I1] = names.lookup(["Sw1", "Sw2", "I1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(SW2_ID, devices.SWITCH, 0)
+    # Sw1 drives a chain of AND gates and Sw2 a chain of OR gates
+    for switch_id, kind, prefix in [(SW1_ID, devices.AND, "And"),
+                                    (SW2_ID, devices.OR, "Or")]:
+        previous_id = switch_id
+        for gate_id in names.lookup([prefix + str(i) for i in range(5)]):
+            devices.make_device(gate_id, kind, 1)
+            network.make_connection(previous_id, None, gate_id, I1)
+            previous_id = gate_id
+    assert network.execute_network()
+    network.enable_stats()
+
+    devices.set_switch(SW1_ID, devices.HIGH)
+    assert network.execute_network()
+    [AND4_ID] = names.lookup(["And4"])
+    assert network.get_output_signal(AND4_ID, None) == devices.HIGH
+    evaluations = network.get_stats().get_summary()["evaluations"]
+    assert "OR" not in evaluations
+    assert evaluations["AND"] >= 5
+
+
+@pytest.mark.parametrize("engine", ["COMPILED_ENGINE", "EVENT_ENGINE",
+                                    "VECTOR_ENGINE"])
+def test_engine_oscillating_network(engine):
+    """Test if the netlist engines return False for oscillating networks."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    network.set_engine(getattr(network, engine))
+    [NOR1, I1] = names.lookup(["Nor1", "I1"])
+    devices.make_device(NOR1, devices.NOR, 1)
+    network.make_connection(NOR1, None, NOR1, I1)
+
+    assert not network.execute_network()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_switching_engines_between_cycles(seed):
+    """Test if each engine carries on from the state left by the others."""
+    network, rng = make_random_network(seed, "OBJECT_ENGINE")
+    expected, rng = make_random_network(seed, "OBJECT_ENGINE")
+    for cycle in range(20):
+        network.set_engine(network.engine_types[cycle % 4])
+        assert network.execute_network() == expected.execute_network()
+        assert [device.outputs for device in network.devices.devices_list] \
+            == [device.outputs for device in expected.devices.devices_list]
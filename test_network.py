@@ -348,3 +348,96 @@ def test_oscillating_network(new_network):
     network.make_connection(NOR1, None, NOR1, I1)
 
     assert not network.execute_network()
+    assert network.get_oscillation()[1] == [NOR1]
+
+
+@pytest.mark.parametrize("engine", ["OBJECT_ENGINE", "COMPILED_ENGINE",
+                                    "EVENT_ENGINE", "VECTOR_ENGINE"])
+def test_oscillation_stops_early(new_network, engine):
+    """Test if a ring oscillator is stopped as soon as its signals repeat."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+    network.set_engine(getattr(network, engine))
+    [I1] = names.lookup(["I1"])
+    gate_ids = names.lookup(["Ring0", "Ring1", "Ring2"])
+    for gate_id in gate_ids:
+        devices.make_device(gate_id, devices.NAND, 1)
+    for gate_id, driver_id in zip(gate_ids, gate_ids[-1:] + gate_ids[:-1]):
+        network.make_connection(driver_id, None, gate_id, I1)
+
+    assert network.set_iteration_limit(1000)
+    assert not network.execute_network()
+    loop_length, device_ids = network.get_oscillation()
+    # The state repeats once, then a second time to confirm the loop
+    assert network.iterations < 3 * loop_length
+    assert device_ids == gate_ids
+    assert "Ring0, Ring1, Ring2" in network.get_oscillation_message()
+
+    # A limit too low to see the signals repeat
+    assert network.set_iteration_limit(2)
+    assert not network.execute_network()
+    assert network.get_oscillation() is None
+    assert network.get_oscillation_message() == \
+        "Signals did not settle within 2 iterations."
+
+
+def make_reversed_chain(network, length):
+    """Make a chain of single-input AND gates, added output end first.
+
+    Gate G0 is the output end of the chain, and switch Sw1 drives its input
+    end. Return the gate IDs in the order they were added.
+    """
+    devices = network.devices
+    names = devices.names
+    [SW1_ID, I1] = names.lookup(["Sw1", "I1"])
+    gate_ids = names.lookup(["G" + str(i) for i in range(length)])
+    for gate_id in gate_ids:
+        devices.make_device(gate_id, devices.AND, 1)
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    for gate_id, driver_id in zip(gate_ids, gate_ids[1:] + [SW1_ID]):
+        network.make_connection(driver_id, None, gate_id, I1)
+    return gate_ids
+
+
+def test_levelize(new_network):
+    """Test if levelize sorts gates topologically and finds the depth."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+    gate_ids = make_reversed_chain(network, 5)
+    assert network.levelize() == (gate_ids[::-1], 5)
+
+    # A NOR gate connected to itself is a loop of one gate, after the chain
+    [NOR1, I1] = names.lookup(["Nor1", "I1"])
+    devices.make_device(NOR1, devices.NOR, 1)
+    network.make_connection(NOR1, None, NOR1, I1)
+    assert network.levelize() == (gate_ids[::-1] + [NOR1], 5)
+
+
+@pytest.mark.parametrize("engine", ["OBJECT_ENGINE", "COMPILED_ENGINE",
+                                    "EVENT_ENGINE", "VECTOR_ENGINE"])
+def test_deep_network_settles(new_network, engine):
+    """Test if a chain deeper than 20 gates is not reported as oscillating."""
+    network = new_network
+    devices = network.devices
+    network.set_engine(getattr(network, engine))
+    gate_ids = make_reversed_chain(network, 50)
+    [SW1_ID] = devices.names.lookup(["Sw1"])
+
+    devices.set_switch(SW1_ID, devices.HIGH)
+    assert network.get_iteration_limit() == 2 * (50 + 2)
+    assert network.execute_network()
+    assert network.get_output_signal(gate_ids[0], None) == devices.HIGH
+
+    # A falling edge passes straight through AND gates in topological order
+    devices.set_switch(SW1_ID, devices.LOW)
+    assert network.execute_network()
+    assert network.get_output_signal(gate_ids[0], None) == devices.LOW
+
+    # A rising edge needs a sweep per gate, so with a limit set too low the
+    # network does not settle in time
+    devices.set_switch(SW1_ID, devices.HIGH)
+    assert network.set_iteration_limit(20)
+    assert not network.execute_network()
+    assert not network.set_iteration_limit(0)
@@ -0,0 +1,40 @@
+"""Test the oscillation module."""
+import pytest
+
+import oscillation
+from oscillation import OscillationDetector
+
+
+def add_states(detector, states):
+    """Add the states in turn and return the number of the confirming one."""
+    for sweep, state in enumerate(states, 1):
+        if detector.add_state(state):
+            return sweep
+    return None
+
+
+def test_loop_is_confirmed():
+    """Test if a repeated loop of states is found with its devices."""
+    detector = OscillationDetector([1, 1, 2, 3])
+    states = [b"\0\0\0\0", b"\1\0\0\0", b"\1\0\1\0", b"\1\1\0\0"] * 3
+    # The state of sweep 1 repeats in sweep 5, and again in sweep 9
+    assert add_states(detector, states) == 9
+    assert detector.get_oscillation() == (4, [1, 2])
+
+
+def test_settling_states():
+    """Test if states that never repeat are not an oscillation."""
+    detector = OscillationDetector([1, 2])
+    assert add_states(detector, [b"\0\0", b"\1\0", b"\1\1"]) is None
+    assert detector.get_oscillation() is None
+
+
+@pytest.mark.parametrize("states, confirming_sweep", [
+    ([b"\0", b"\1", b"\2", b"\3"], None),
+    ([b"\0", b"\1", b"\1", b"\1"], 3),
+])
+def test_hash_collisions(monkeypatch, states, confirming_sweep):
+    """Test if colliding hashes only stop a loop of equal states."""
+    monkeypatch.setattr(oscillation, "hash", lambda state: 0, raising=False)
+    detector = OscillationDetector([1])
+    assert add_states(detector, states) == confirming_sweep
@@ -1,5 +1,8 @@
+import mmap
+
 import pytest
 
+import scanner
 from names import Names
 from scanner import Scanner
 
@@ -248,3 +251,75 @@ def test_print_error_end_semicolon(capfd, error_scanner):
     error_scanner.print_error(symbol, symbol)
     out, err = capfd.readouterr()
     assert out == "Error occured in line  3\nchrists college cambridge\n      ^\n"
+
+
+def test_get_symbol_many_comments(tmp_path):
+    '''Test that long runs of comments are skipped without recursion and
+    that line numbers are counted through them'''
+    path = tmp_path / "comments.txt"
+    path.write_text("/**/ " * 5000 + "/* " + "* " * 5000 + "*/\n" +
+                    "// line\n" * 5000 + "A")
+    my_scanner = Scanner(str(path), Names())
+    symbol = my_scanner.get_symbol()
+    assert symbol.type == my_scanner.NAME
+    assert symbol.value == "A"
+    assert (symbol.line, symbol.line_pos) == (5002, 0)
+    assert my_scanner.get_symbol().type == my_scanner.EOF
+
+
+@pytest.mark.parametrize("path", [
+    "test_def_files/for_get_symbol_type.txt",
+    "test_def_files/block_comment_invariant.txt",
+    "test_def_files/line_comment_invariant.txt",
+    "test_def_files/sequential.txt"
+])
+def test_get_symbol_mmap(path):
+    '''Test that a memory-mapped file gives the same symbols, with the same
+    positions, as the file read into a string'''
+    with open(path, "rb") as f:
+        definition_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    text_scanner = Scanner(path, Names())
+    map_scanner = Scanner(definition_map, Names())
+    while True:
+        symbol1 = text_scanner.get_symbol()
+        symbol2 = map_scanner.get_symbol()
+        assert vars(symbol1) == vars(symbol2)
+        if symbol1.type == text_scanner.EOF:
+            break
+
+
+@pytest.mark.parametrize("mmap_size", [None, 0])
+def test_get_symbol_non_ascii(tmp_path, monkeypatch, mmap_size):
+    '''Test that non-ASCII characters give the same symbols, with the same
+    positions, from a map, a large file and a small file'''
+    path = tmp_path / "non_ascii.txt"
+    path.write_bytes("DEVICES {\r\n  SW\u00e91 = SWITCH(0);\x1c\r\n"
+                     "  \u00c5 = CLOCK(2); \u0661}\r\n".encode())
+    with open(str(path), "rb") as f:
+        definition_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    text_scanner = Scanner(str(path), Names())
+    if mmap_size is not None:
+        monkeypatch.setattr(scanner, "MMAP_SIZE", mmap_size)
+        file_scanner = Scanner(str(path), Names())
+    else:
+        file_scanner = Scanner(definition_map, Names())
+    while True:
+        symbol1 = text_scanner.get_symbol()
+        symbol2 = file_scanner.get_symbol()
+        assert vars(symbol1) == vars(symbol2)
+        if symbol1.type == text_scanner.EOF:
+            break
+
+
+def test_print_error_mmap(capfd, monkeypatch):
+    '''Test that large files are memory-mapped and that print_error finds
+    the error line in the map'''
+    monkeypatch.setattr(scanner, "MMAP_SIZE", 0)
+    error_scanner = Scanner("test_def_files/for_print_error.txt", Names())
+    assert isinstance(error_scanner.text, mmap.mmap)
+    for i in range(16):
+        symbol = error_scanner.get_symbol()
+    error_scanner.print_error(symbol, symbol)
+    out, err = capfd.readouterr()
+    assert out == ("Error occured in line  3\nchrists college cambridge\n"
+                   "      ^\n")
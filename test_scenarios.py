@@ -0,0 +1,127 @@
+"""Test the scenarios module."""
+import array
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scenarios import Scenarios
+from test_netlist import make_random_network
+
+
+def monitor_all_outputs(network):
+    """Return a Monitors instance monitoring every output in the network."""
+    devices = network.devices
+    monitors = Monitors(network.names, devices, network)
+    for device in devices.devices_list:
+        for output_id in device.outputs:
+            monitors.make_monitor(device.device_id, output_id)
+    return monitors
+
+
+def run_one_scenario(seed, switch_states, cycles):
+    """Run a random network with the specified switch states.
+
+    Return whether all cycles succeeded and the monitored traces.
+    """
+    network, rng = make_random_network(seed, "OBJECT_ENGINE")
+    monitors = monitor_all_outputs(network)
+    for switch_id, signal in switch_states.items():
+        network.devices.set_switch(switch_id, signal)
+    for _ in range(cycles):
+        if not network.execute_network():
+            return False, None
+        monitors.record_signals()
+    return True, monitors.monitors_dictionary
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_scenarios_match_separate_runs(seed, cycles=12):
+    """Test if every scenario matches a separate run of the object engine."""
+    network, rng = make_random_network(seed, "OBJECT_ENGINE")
+    devices = network.devices
+    monitors = monitor_all_outputs(network)
+    scenarios = Scenarios(network.names, devices, network, monitors)
+    switch_ids = devices.find_devices(devices.SWITCH)
+    switch_states_list = []
+    for bits in range(2 ** len(switch_ids)):
+        switch_states = {}
+        for i, switch_id in enumerate(switch_ids):
+            switch_states[switch_id] = bits >> i & 1
+        switch_states_list.append(switch_states)
+        assert scenarios.add_scenario(switch_states) == bits
+
+    results = [run_one_scenario(seed, switch_states, cycles)
+               for switch_states in switch_states_list]
+    if all(success for success, traces in results):
+        assert scenarios.run_network(cycles)
+        for scenario, (success, traces) in enumerate(results):
+            assert scenarios.get_monitors(scenario).monitors_dictionary == \
+                traces
+    else:
+        # Only scenarios that fail on their own can oscillate
+        assert not scenarios.run_network(cycles)
+        assert scenarios.oscillating
+        for scenario in scenarios.oscillating:
+            assert not results[scenario][0]
+
+
+def test_scenarios_leave_devices_unchanged():
+    """Test if running scenarios does not change the devices."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1_ID, SW2_ID, AND1_ID, I1, I2] = names.lookup(["Sw1", "Sw2", "And1",
+                                                      "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(SW2_ID, devices.SWITCH, 0)
+    devices.make_device(AND1_ID, devices.AND, 2)
+    network.make_connection(SW1_ID, None, AND1_ID, I1)
+    network.make_connection(SW2_ID, None, AND1_ID, I2)
+    monitors.make_monitor(AND1_ID, None)
+    assert network.execute_network()
+
+    scenarios = Scenarios(names, devices, network, monitors)
+    assert scenarios.add_scenario({SW1_ID: 1}) == 0
+    assert scenarios.add_scenario({SW1_ID: 1, SW2_ID: 1}) == 1
+    assert scenarios.add_scenario({AND1_ID: 1}) is None
+    assert scenarios.add_scenario({SW1_ID: devices.RISING}) is None
+    assert scenarios.run_network(2)
+
+    [LOW, HIGH] = [devices.LOW, devices.HIGH]
+    assert scenarios.get_monitors(0).monitors_dictionary == \
+        {(AND1_ID, None): array.array("b", [LOW, LOW])}
+    assert scenarios.get_monitors(1).monitors_dictionary == \
+        {(AND1_ID, None): array.array("b", [HIGH, HIGH])}
+    assert devices.get_device(SW1_ID).switch_state == LOW
+    assert devices.get_device(AND1_ID).outputs[None] == LOW
+    assert monitors.monitors_dictionary == {(AND1_ID, None): array.array("b")}
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_add_scenario_while_running(seed, cycles=12):
+    """Test if adding a scenario leaves the running scenarios undisturbed."""
+    network, rng = make_random_network(seed, "OBJECT_ENGINE")
+    devices = network.devices
+    monitors = monitor_all_outputs(network)
+    SW_ID = devices.find_devices(devices.SWITCH)[0]
+    success, traces = run_one_scenario(seed, {SW_ID: 1}, cycles)
+    if not success:
+        return
+
+    scenarios = Scenarios(network.names, devices, network, monitors)
+    assert scenarios.add_scenario({SW_ID: 1}) == 0
+    assert scenarios.run_network(cycles // 2)
+    assert scenarios.add_scenario({SW_ID: 0}) == 1
+    if scenarios.run_network(cycles - cycles // 2):
+        assert scenarios.get_monitors(0).monitors_dictionary == traces
+        for signal_list in scenarios.get_monitors(1).monitors_dictionary \
+                .values():
+            assert len(signal_list) == cycles
+            assert list(signal_list[:cycles // 2]) == \
+                [devices.BLANK] * (cycles // 2)
+    else:
+        assert scenarios.oscillating == [1]
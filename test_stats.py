@@ -0,0 +1,98 @@
+"""Test the stats module."""
+import random
+
+import pytest
+
+from cache import NetlistCache
+
+
+def run_with_stats(path, engine_name, cycles=30):
+    """Run the file at path with statistics and return the network."""
+    random.seed(0)
+    names, devices, network, monitors = NetlistCache().parse_network(path)
+    network.set_engine(getattr(network, engine_name))
+    network.enable_stats()
+    for _ in range(cycles):
+        assert network.execute_network()
+    return network
+
+
+@pytest.mark.parametrize("path", ["main_def_files/sequential.txt",
+                                  "main_def_files/combinational.txt"])
+def test_engines_give_same_stats(path):
+    """Test if the object and compiled engines count the same events."""
+    summaries = [run_with_stats(path, engine_name).get_stats().get_summary()
+                 for engine_name in ["OBJECT_ENGINE", "COMPILED_ENGINE"]]
+    for summary in summaries:
+        del summary["phase_times"]
+    assert summaries[0] == summaries[1]
+    assert summaries[0]["cycles"] == 30
+    assert summaries[0]["failed_cycles"] == 0
+    assert sum(summaries[0]["iteration_counts"].values()) == 30
+    assert summaries[0]["max_iterations"] <= summaries[0]["iteration_limit"]
+
+
+def test_event_and_vector_stats():
+    """Test if the event and vector engines report their own counts."""
+    path = "main_def_files/sequential.txt"
+    compiled = run_with_stats(path, "COMPILED_ENGINE").get_stats()
+    event = run_with_stats(path, "EVENT_ENGINE").get_stats()
+    vector = run_with_stats(path, "VECTOR_ENGINE").get_stats()
+    # The event engine evaluates fewer devices for the same transitions
+    assert event.iteration_counts == compiled.iteration_counts
+    assert event.transitions == compiled.transitions
+    assert sum(event.evaluations.values()) < \
+        sum(compiled.evaluations.values())
+    assert vector.evaluations == compiled.evaluations
+    assert vector.get_summary()["transitions"] is None
+    assert "-" in vector.format_lines()[-1]
+
+
+@pytest.mark.parametrize("engine_name", ["OBJECT_ENGINE", "COMPILED_ENGINE",
+                                         "EVENT_ENGINE", "VECTOR_ENGINE"])
+def test_stats_leave_engines_unchanged(engine_name):
+    """Test if statistics leave the engines unchanged and can be disabled."""
+    network = run_with_stats("main_def_files/sequential.txt", engine_name, 3)
+    assert network.get_stats().phase_times["update_clocks"] > 0
+    executors = network.netlist.executors if network.netlist else None
+    for target in [network, network.netlist]:
+        if target is not None:
+            assert not {"execute_gate", "update_clocks",
+                        "update_siggens"} & set(vars(target))
+    if engine_name in ["COMPILED_ENGINE", "EVENT_ENGINE"]:
+        assert executors[0].__name__ != "counted_executor"
+    assert network.enable_stats(False) is None
+    assert network.execute_network()
+    assert network.get_stats() is None
+
+
+@pytest.mark.parametrize("engine_name", ["OBJECT_ENGINE", "EVENT_ENGINE"])
+def test_stats_after_exception(monkeypatch, engine_name):
+    """Test if a cycle that raises leaves the statistics and engine usable."""
+    network = run_with_stats("main_def_files/sequential.txt", engine_name, 3)
+    if engine_name == "OBJECT_ENGINE":
+        target = network
+    else:
+        target = network.netlist
+    stats = network.get_stats()
+
+    def fail():
+        raise RuntimeError("clock failure")
+    monkeypatch.setattr(target, "update_clocks", fail)
+    with pytest.raises(RuntimeError):
+        network.execute_network()
+    monkeypatch.undo()
+    assert network.get_stats() is stats
+    assert network.execute_network()
+    assert stats.cycles == 4
+
+
+def test_reset_and_format_lines():
+    """Test if statistics can be cleared and formatted."""
+    stats = run_with_stats("main_def_files/combinational.txt",
+                           "COMPILED_ENGINE").get_stats()
+    lines = stats.format_lines()
+    assert lines[0] == "Cycles: 30 (0 failed)"
+    assert any(line.startswith("SIGGEN") for line in lines)
+    stats.reset()
+    assert stats.format_lines() == ["No cycles have been run."]
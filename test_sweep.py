@@ -0,0 +1,206 @@
+"""Test the sweep module."""
+import os
+import random
+import shutil
+import sys
+
+import pytest
+
+from cache import NetlistCache
+from checkpoint import Checkpoint
+from sweep import Sweep
+
+
+@pytest.fixture
+def sequential_sweep():
+    """Return a sweep of the sequential definition file, run in-process."""
+    sweep = Sweep("main_def_files/sequential.txt", 12, processes=1)
+    assert sweep.load()
+    return sweep
+
+
+def test_enumerate_assignments(sequential_sweep):
+    """Test if every combination of switch states is enumerated once."""
+    assignments = list(sequential_sweep.enumerate_assignments(["SW1", "SW2"]))
+    assert assignments == [{"SW1": 0, "SW2": 0}, {"SW1": 0, "SW2": 1},
+                           {"SW1": 1, "SW2": 0}, {"SW1": 1, "SW2": 1}]
+    assert len(list(sequential_sweep.enumerate_assignments())) == 2 ** 6
+
+
+def test_runs_are_independent(sequential_sweep):
+    """Test if the result of a run does not depend on earlier runs."""
+    assignments = list(sequential_sweep.enumerate_assignments())
+    results = list(sequential_sweep.run(assignments))
+    reversed_results = list(sequential_sweep.run(assignments[::-1]))
+    assert results == reversed_results[::-1]
+    assert [assignment for assignment, traces in results] == assignments
+    for assignment, traces in results:
+        assert len(traces) == len(sequential_sweep.get_monitor_names())
+        assert all(len(trace) == 12 for trace in traces)
+
+
+@pytest.mark.parametrize("engine", ["COMPILED_ENGINE", "EVENT_ENGINE"])
+def test_netlist_engines_match(engine, sequential_sweep):
+    """Test if runs on the netlist engines match the object engine."""
+    assignments = list(sequential_sweep.enumerate_assignments())
+    engine_sweep = Sweep("main_def_files/sequential.txt", 12, processes=1)
+    assert engine_sweep.load()
+    engine_sweep.network.set_engine(getattr(engine_sweep.network, engine))
+    switch_version = engine_sweep.devices.switch_version
+    assert list(engine_sweep.run(assignments[::-1]))[::-1] == \
+        list(sequential_sweep.run(assignments))
+    # Switches are reset through set_switch, so the engines see them
+    assert engine_sweep.devices.switch_version > switch_version
+
+
+def test_process_pool_matches_single_process(sequential_sweep):
+    """Test if sharing the runs between processes gives the same traces."""
+    assignments = list(sequential_sweep.enumerate_assignments())
+    pool_sweep = Sweep("main_def_files/sequential.txt", 12, processes=2)
+    assert pool_sweep.load()
+    assert list(pool_sweep.run(assignments, chunk_size=5)) == \
+        list(sequential_sweep.run(assignments))
+
+
+def test_combinational_truth_table():
+    """Test if the sweep gives the traces of the combinational circuit."""
+    sweep = Sweep("main_def_files/combinational.txt", 5, processes=1)
+    assert sweep.load()
+    # OR1 is HIGH unless both SW2 and SIGGEN1 (00100) are HIGH
+    expected = {0: b"\x01\x01\x01\x01\x01", 1: b"\x01\x01\x00\x01\x01"}
+    for assignment, [trace] in sweep.run(sweep.enumerate_assignments()):
+        assert trace == expected[assignment["SW2"]]
+
+
+def test_invalid_assignments(sequential_sweep):
+    """Test if invalid switch assignments are rejected."""
+    assert sequential_sweep.read_assignment("SW1=1, SW2=0") == \
+        {"SW1": 1, "SW2": 0}
+    assert sequential_sweep.read_assignment("SW1=2") is None
+    assert sequential_sweep.read_assignment("SW1") is None
+    assert sequential_sweep.read_assignment("D1=1") is None
+    assert sequential_sweep.read_assignment("SW9=1") is None
+    results = sequential_sweep.run(iter([{"SW1": 1}, {"D1": 0}]))
+    assert next(results)[0] == {"SW1": 1}
+    with pytest.raises(ValueError):
+        next(results)
+
+
+def test_cached_sweep_matches(tmp_path, sequential_sweep):
+    """Test if workers loading the cached network give the same traces."""
+    assignments = list(sequential_sweep.enumerate_assignments())
+    cached_sweep = Sweep("main_def_files/sequential.txt", 12, processes=2,
+                         cache_directory=str(tmp_path))
+    assert cached_sweep.load()
+    assert len(list(tmp_path.iterdir())) == 1
+    assert list(cached_sweep.run(assignments)) == \
+        list(sequential_sweep.run(assignments))
+
+
+@pytest.fixture
+def warm_checkpoint(tmp_path):
+    """Return the path of a checkpoint of the sequential circuit.
+
+    The checkpoint is saved after 20 cycles with SW1 HIGH.
+    """
+    random.seed(0)
+    names, devices, network, monitors = NetlistCache().parse_network(
+        "main_def_files/sequential.txt")
+    [SW1_ID] = names.lookup(["SW1"])
+    devices.set_switch(SW1_ID, devices.HIGH)
+    for _ in range(20):
+        assert network.execute_network()
+        monitors.record_signals()
+    path = str(tmp_path / "warm.ckpt")
+    assert Checkpoint(devices, monitors).write(path, 20)
+    return path
+
+
+def test_runs_start_from_checkpoint(warm_checkpoint):
+    """Test if every run carries on from the warm state of the checkpoint."""
+    assignments = [{"SW1": 0}, {"SW1": 1}, {"SW2": 1}]
+    sweep = Sweep("main_def_files/sequential.txt", 12, processes=1,
+                  checkpoint_path=warm_checkpoint)
+    assert sweep.load()
+    results = list(sweep.run(assignments))
+
+    for assignment, traces in results:
+        names, devices, network, monitors = NetlistCache().parse_network(
+            "main_def_files/sequential.txt")
+        assert Checkpoint(devices, monitors).load(warm_checkpoint) == 20
+        monitors.reset_monitors()
+        for switch_name, switch_state in assignment.items():
+            devices.set_switch(names.query(switch_name), switch_state)
+        for _ in range(12):
+            assert network.execute_network()
+            monitors.record_signals()
+        assert traces == [bytes(signal_list) for signal_list
+                          in monitors.monitors_dictionary.values()]
+
+    pool_sweep = Sweep("main_def_files/sequential.txt", 12, processes=2,
+                       checkpoint_path=warm_checkpoint)
+    assert pool_sweep.load()
+    assert list(pool_sweep.run(assignments, chunk_size=1)) == results
+    assert not Sweep("main_def_files/sequential.txt", 12, processes=1,
+                     checkpoint_path=warm_checkpoint + ".missing").load()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"),
+                    reason="processes are only forked on Linux")
+def test_forked_workers_share_network(tmp_path, sequential_sweep):
+    """Test if forked workers use the network loaded by the parent."""
+    path = str(tmp_path / "sequential.txt")
+    shutil.copy("main_def_files/sequential.txt", path)
+    sweep = Sweep(path, 12, processes=2)
+    assert sweep.load()
+    os.remove(path)  # the workers cannot parse the file again
+    assignments = list(sweep.enumerate_assignments())
+    assert list(sweep.run(assignments)) == \
+        list(sequential_sweep.run(assignments))
+
+
+def test_workers_load_network_without_fork(monkeypatch, sequential_sweep):
+    """Test if workers load the network themselves on other platforms."""
+    monkeypatch.setattr(sys, "platform", "darwin")
+    sweep = Sweep("main_def_files/sequential.txt", 12, processes=2)
+    assert sweep.load()
+    assignments = list(sweep.enumerate_assignments())
+    assert list(sweep.run(assignments)) == \
+        list(sequential_sweep.run(assignments))
+
+
+def test_compare_results(sequential_sweep):
+    """Test if runs are compared with the first run that does not oscillate."""
+    results = [({"SW1": 0}, None),
+               ({"SW1": 1}, [b"\x00\x01\x01", b"\x01\x01\x01"]),
+               ({"SW1": 0}, [b"\x00\x01\x00", b"\x00\x01\x01"])]
+    assert list(sequential_sweep.compare_results(iter(results))) == [
+        ({"SW1": 0}, None), ({"SW1": 1}, [None, None]),
+        ({"SW1": 0}, [2, 0])]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_sweep_streams_results(capsys, processes):
+    """Test if a large sweep is displayed without taking every assignment
+    or holding every result at once."""
+    sweep = Sweep("main_def_files/sequential.txt", 4, processes=processes)
+    assert sweep.load()
+    capsys.readouterr()
+    taken = []
+
+    def assignments():
+        for assignment in sweep.enumerate_assignments():
+            taken.append(assignment)
+            yield assignment
+    results = sweep.run(assignments(), chunk_size=1)
+    next(results)
+    assert len(taken) <= 4 * processes
+
+    sweep.display_sweep(sweep.run(sweep.enumerate_assignments()))
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2 * (2 ** 6 + 1) + 2
+    assert lines[0] == "SW1 SW2 SW3 SW4 SW5 SW6 : D1.Q D2.Q D3.Q"
+    assert lines[2 ** 6 + 2] == \
+        "First cycle differing from the first run (= if none):"
+    assert lines[2 ** 6 + 3] == lines[0]
+    assert lines[2 ** 6 + 4] == "  0   0   0   0   0   0 :    =    =    ="
@@ -0,0 +1,87 @@
+"""Test the traces module."""
+import random
+
+import pytest
+
+from traces import ChangeTrace, RingTrace
+
+
+@pytest.fixture
+def signal_list():
+    """Return a long list of signal levels that rarely change."""
+    rng = random.Random(0)
+    signal_list = []
+    signal = 0
+    for _ in range(1000):
+        if rng.random() < 0.05:
+            signal = rng.randrange(5)
+        signal_list.append(signal)
+    return signal_list
+
+
+def test_change_trace_matches_list(signal_list):
+    """Test if a change trace reads back the signal levels appended."""
+    trace = ChangeTrace()
+    for signal in signal_list:
+        trace.append(signal)
+    assert len(trace) == len(signal_list)
+    assert list(trace) == signal_list
+    assert [trace[cycle] for cycle in range(len(signal_list))] == signal_list
+    assert trace[-1] == signal_list[-1]
+    assert trace == signal_list
+    assert trace != signal_list[:-1]
+    with pytest.raises(IndexError):
+        trace[len(signal_list)]
+
+
+def test_change_trace_stores_only_changes(signal_list):
+    """Test if a change trace stores one entry per change."""
+    trace = ChangeTrace(signal_list)
+    changes = [(cycle, signal) for cycle, signal in enumerate(signal_list)
+               if cycle == 0 or signal_list[cycle - 1] != signal]
+    assert list(trace.changes()) == changes
+    assert len(trace.change_cycles) == len(changes) < len(signal_list) // 10
+    assert sum(count for signal, count in trace.runs()) == len(signal_list)
+
+
+def test_change_trace_append_count():
+    """Test if append records a signal level for many cycles at once."""
+    trace = ChangeTrace()
+    trace.append(4, 3)
+    trace.append(1)
+    trace.append(1, 2)
+    trace.append(0, 0)
+    assert list(trace) == [4, 4, 4, 1, 1, 1]
+    assert list(trace.changes()) == [(0, 4), (3, 1)]
+    copy = ChangeTrace()
+    copy.extend(trace)
+    assert copy == trace
+
+
+def test_ring_trace_keeps_last_cycles(signal_list):
+    """Test if a ring trace retains only the last capacity signal levels."""
+    trace = RingTrace(64, blank=4)
+    buffer = trace.buffer
+    for cycle, signal in enumerate(signal_list):
+        trace.append(signal)
+        window = signal_list[max(0, cycle + 1 - 64):cycle + 1]
+        if cycle in [0, 10, 63, 64, 500, 999]:
+            assert list(trace) == window
+            assert [trace[i] for i in range(len(trace))] == window
+            assert trace.first_cycle == cycle + 1 - len(window)
+    assert trace == signal_list[-64:]
+    assert trace[-1] == signal_list[-1]
+    assert trace.buffer is buffer  # never reallocated
+    with pytest.raises(IndexError):
+        trace[64]
+
+
+def test_ring_trace_append_count():
+    """Test if append records a signal level for many cycles at once."""
+    trace = RingTrace(4)
+    trace.append(4, 2)
+    assert list(trace) == [4, 4] and trace.first_cycle == 0
+    trace.append(1, 3)
+    assert list(trace) == [4, 1, 1, 1] and trace.first_cycle == 1
+    trace.append(0, 10)
+    assert list(trace) == [0, 0, 0, 0] and trace.first_cycle == 11
@@ -0,0 +1,127 @@
+"""Test the vcd module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from vcd import VcdWriter, make_identifier_code
+
+
+@pytest.fixture
+def clocked_monitors():
+    """Return a Monitors instance monitoring a switch and a D-type."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1_ID, CL_ID, D1_ID] = names.lookup(["Sw1", "Clock1", "D1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(CL_ID, devices.CLOCK, 1)
+    devices.make_device(D1_ID, devices.D_TYPE)
+    for input_id, (device_id, output_id) in zip(
+            devices.dtype_input_ids,
+            [(SW1_ID, None), (SW1_ID, None), (SW1_ID, None), (CL_ID, None)]):
+        network.make_connection(device_id, output_id, D1_ID, input_id)
+    monitors.make_monitor(SW1_ID, None)
+    monitors.make_monitor(CL_ID, None)
+    monitors.make_monitor(D1_ID, devices.QBAR_ID)
+    return monitors
+
+
+def run_cycles(monitors, cycles):
+    """Run the network of the monitors, recording every cycle."""
+    for _ in range(cycles):
+        assert monitors.network.execute_network()
+        monitors.record_signals()
+
+
+def read_changes(path):
+    """Return the header lines and the {time: [changes]} of a VCD file."""
+    with open(path) as vcd_file:
+        lines = vcd_file.read().splitlines()
+    end = lines.index("$enddefinitions $end")
+    changes = {}
+    for line in lines[end + 1:]:
+        if line.startswith("#"):
+            time = int(line[1:])
+            changes[time] = []
+        else:
+            changes[time].append(line)
+    return lines[:end + 1], changes
+
+
+def test_vcd_matches_traces(clocked_monitors, tmp_path):
+    """Test if the VCD file holds exactly the changes of the traces."""
+    monitors = clocked_monitors
+    path = tmp_path / "trace.vcd"
+    assert monitors.start_vcd(str(path), flush_interval=3)
+    run_cycles(monitors, 10)
+    monitors.stop_vcd()
+
+    header, changes = read_changes(path)
+    assert header[3:] == ["$scope module logsim $end",
+                          "$var wire 1 ! Sw1 $end",
+                          '$var wire 1 " Clock1 $end',
+                          "$var wire 1 # D1_QBAR $end",
+                          "$upscope $end", "$enddefinitions $end"]
+    assert changes.pop(10) == []  # end time
+
+    values = {}
+    for cycle in range(10):
+        for line in changes.get(cycle, []):
+            values[line[1:]] = line[0]
+        for code, signal_list in zip(
+                "!\"#", monitors.monitors_dictionary.values()):
+            assert values[code] == str(signal_list[cycle])
+    # The clock changes every cycle, the switch never does
+    assert all(any(line.endswith('"') for line in changes[cycle])
+               for cycle in range(10))
+    assert not any(line.endswith("!") for cycle in range(1, 10)
+                   for line in changes.get(cycle, []))
+
+
+def test_only_value_changes_written(clocked_monitors, tmp_path):
+    """Test if signals that write the same value are not written again."""
+    devices = clocked_monitors.devices
+    path = tmp_path / "edges.vcd"
+    writer = VcdWriter(str(path), devices,
+                       list(clocked_monitors.monitors_dictionary)[:1])
+    for signal in [devices.LOW, devices.RISING, devices.HIGH,
+                   devices.FALLING, devices.LOW, devices.BLANK]:
+        writer.write_signals([signal])
+    writer.close()
+    assert read_changes(path)[1] == {0: ["0!"], 1: ["1!"], 3: ["0!"],
+                                     5: ["x!"], 6: []}
+
+
+def test_identifier_codes():
+    """Test if identifier codes are short, printable and all different."""
+    codes = [make_identifier_code(index) for index in range(20000)]
+    assert codes[:3] == ["!", '"', "#"]
+    assert codes[93] == "~"
+    assert codes[94] == "!!"
+    assert len(set(codes)) == len(codes)
+    assert all(len(code) <= 3 and
+               all("!" <= character <= "~" for character in code)
+               for code in codes)
+
+
+def test_vcd_flush_interval(clocked_monitors, tmp_path):
+    """Test if the VCD file is written every flush_interval cycles."""
+    monitors = clocked_monitors
+    path = tmp_path / "trace.vcd"
+    assert not monitors.start_vcd(str(path), flush_interval=0)
+    assert not monitors.start_vcd(str(tmp_path / "absent" / "trace.vcd"))
+    assert monitors.start_vcd(str(path), flush_interval=4, keep_traces=False)
+    run_cycles(monitors, 3)
+    assert max(read_changes(path)[1], default=None) is None
+    run_cycles(monitors, 1)
+    assert max(read_changes(path)[1]) == 3
+    # The traces are not kept in memory while streaming
+    assert all(len(signal_list) == 0
+               for signal_list in monitors.monitors_dictionary.values())
+    monitors.stop_vcd()
+    run_cycles(monitors, 1)
+    assert all(len(signal_list) == 1
+               for signal_list in monitors.monitors_dictionary.values())
@@ -0,0 +1,190 @@
+"""Store signal traces compactly.
+
+Used in the Logic Simulator project to record the signal levels of monitored
+outputs in less memory than one entry per simulation cycle.
+
+Classes
+-------
+ChangeTrace - stores a signal trace as the list of its changes.
+RingTrace - stores the most recent part of a signal trace.
+"""
+import array
+import bisect
+import itertools
+
+
+class ChangeTrace:
+
+    """Store a signal trace as the list of its changes.
+
+    Only the cycle at which the signal changes and its new level are stored,
+    so the memory used grows with the activity of the signal rather than the
+    length of the simulation. The trace can be used like a list of signal
+    levels, one per cycle: indexing finds the level at a cycle in O(log n)
+    time, where n is the number of changes.
+
+    Public methods
+    --------------
+    append(self, signal, count=1): Appends the signal level for the specified
+                                   number of cycles.
+
+    extend(self, signal_list): Appends every signal level in signal_list.
+
+    changes(self): Returns an iterator over the (cycle, signal) pairs of every
+                   change, in O(number of changes) time.
+
+    runs(self): Returns an iterator over the (signal, number of cycles) pairs
+                of every run of cycles at the same signal level.
+    """
+
+    def __init__(self, signal_list=()):
+        """Initialise an empty trace, then append signal_list."""
+        self.change_cycles = array.array("q")  # cycle of each change
+        self.change_signals = array.array("b")  # signal level after it
+        self.length = 0  # number of cycles recorded
+        self.extend(signal_list)
+
+    def append(self, signal, count=1):
+        """Append the signal level for the specified number of cycles."""
+        if count <= 0:
+            return
+        if not self.change_signals or self.change_signals[-1] != signal:
+            self.change_cycles.append(self.length)
+            self.change_signals.append(signal)
+        self.length += count
+
+    def extend(self, signal_list):
+        """Append every signal level in signal_list."""
+        if isinstance(signal_list, ChangeTrace):
+            for signal, count in signal_list.runs():
+                self.append(signal, count)
+        else:
+            for signal in signal_list:
+                self.append(signal)
+
+    def changes(self):
+        """Return an iterator over the (cycle, signal) pairs of each change."""
+        return zip(self.change_cycles, self.change_signals)
+
+    def runs(self):
+        """Return an iterator over the (signal, number of cycles) pairs."""
+        ends = itertools.chain(itertools.islice(self.change_cycles, 1, None),
+                               [self.length])
+        for cycle, end, signal in zip(self.change_cycles, ends,
+                                      self.change_signals):
+            yield signal, end - cycle
+
+    def __len__(self):
+        """Return the number of cycles recorded."""
+        return self.length
+
+    def __getitem__(self, cycle):
+        """Return the signal level at the specified cycle."""
+        if cycle < 0:
+            cycle += self.length
+        if not 0 <= cycle < self.length:
+            raise IndexError("cycle out of range")
+        position = bisect.bisect_right(self.change_cycles, cycle) - 1
+        return self.change_signals[position]
+
+    def __iter__(self):
+        """Return an iterator over the signal level of every cycle."""
+        for signal, count in self.runs():
+            yield from itertools.repeat(signal, count)
+
+    def __eq__(self, other):
+        """Return True if other holds the same signal level every cycle."""
+        if isinstance(other, ChangeTrace):
+            return (self.length == other.length and
+                    self.change_cycles == other.change_cycles and
+                    self.change_signals == other.change_signals)
+        try:
+            return len(self) == len(other) and all(
+                signal == other_signal
+                for signal, other_signal in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        """Return the trace as a list of changes."""
+        return "ChangeTrace(length={}, changes={})".format(
+            self.length, list(self.changes()))
+
+
+class RingTrace:
+
+    """Store the most recent part of a signal trace.
+
+    The trace keeps the signal levels of the last capacity cycles in a ring
+    buffer allocated once, when the trace is made, so appending takes O(1)
+    time and memory never grows however long the simulation runs. The trace
+    can be used like a list of the retained signal levels, oldest first;
+    first_cycle is the absolute cycle number of the oldest one.
+
+    Parameters
+    ----------
+    capacity: number of cycles retained.
+    blank: signal level the buffer is filled with before use.
+
+    Public methods
+    --------------
+    append(self, signal, count=1): Appends the signal level for the specified
+                                   number of cycles.
+
+    extend(self, signal_list): Appends every signal level in signal_list.
+    """
+
+    def __init__(self, capacity, blank=0):
+        """Allocate the ring buffer."""
+        self.capacity = capacity
+        self.buffer = array.array("b", [blank]) * capacity
+        self.total = 0  # number of cycles ever appended
+        self.first_cycle = 0  # absolute cycle of the oldest signal retained
+
+    def append(self, signal, count=1):
+        """Append the signal level for the specified number of cycles."""
+        for _ in range(min(count, self.capacity)):
+            self.buffer[self.total % self.capacity] = signal
+            self.total += 1
+        if count > self.capacity:
+            self.total += count - self.capacity
+        self.first_cycle = max(0, self.total - self.capacity)
+
+    def extend(self, signal_list):
+        """Append every signal level in signal_list."""
+        for signal in signal_list:
+            self.append(signal)
+
+    def __len__(self):
+        """Return the number of cycles retained."""
+        return self.total - self.first_cycle
+
+    def __getitem__(self, index):
+        """Return the signal level at the specified position in the window."""
+        length = self.total - self.first_cycle
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("index out of range")
+        return self.buffer[(self.first_cycle + index) % self.capacity]
+
+    def __iter__(self):
+        """Return an iterator over the retained signal levels, oldest first."""
+        start = self.first_cycle % self.capacity
+        if self.total <= self.capacity:
+            return iter(self.buffer[:self.total])
+        return itertools.chain(self.buffer[start:], self.buffer[:start])
+
+    def __eq__(self, other):
+        """Return True if other holds the same retained signal levels."""
+        try:
+            return len(self) == len(other) and all(
+                signal == other_signal
+                for signal, other_signal in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        """Return the retained signal levels and the first cycle."""
+        return "RingTrace(first_cycle={}, signals={})".format(
+            self.first_cycle, list(self))
@@ -7,6 +7,7 @@ Classes:
 --------
 UserInterface - reads and parses user commands.
 """
+from checkpoint import Checkpoint
 
 
 class UserInterface:
@@ -24,6 +25,9 @@ class UserInterface:
     devices: instance of the devices.Devices() class.
     network: instance of the network.Network() class.
     monitors: instance of the monitors.Monitors() class.
+    vcd_path: path of a VCD file to stream the monitored signals to, or None.
+    engine: engine to run the network on, or None to keep the network's
+            current engine.
 
     Public methods:
     ---------------
@@ -49,6 +53,8 @@ class UserInterface:
 
     read_number(self, lower_bound, upper_bound): Returns the current number.
 
+    read_path(self): Returns the rest of the user entry as a file path.
+
     help_command(self): Prints a list of valid commands.
 
     switch_command(self): Sets the specified switch to the specified signal
@@ -64,14 +70,27 @@ class UserInterface:
     run_command(self): Runs the simulation from scratch.
 
     continue_command(self): Continues a previously run simulation.
+
+    statistics_command(self): Shows the simulation statistics, or starts
+                              collecting them.
+
+    write_command(self): Saves the state of the simulation to a checkpoint
+                         file.
+
+    load_command(self): Restores the state of the simulation from a
+                        checkpoint file.
     """
 
-    def __init__(self, names, devices, network, monitors):
+    def __init__(self, names, devices, network, monitors, vcd_path=None,
+                 engine=None):
         """Initialise variables."""
         self.names = names
         self.devices = devices
         self.monitors = monitors
         self.network = network
+        if engine is not None:
+            network.set_engine(engine)
+        self.vcd_path = vcd_path
 
         self.cycles_completed = 0  # number of simulation cycles completed
 
@@ -98,10 +117,17 @@ class UserInterface:
                 self.run_command()
             elif command == "c":
                 self.continue_command()
+            elif command == "p":
+                self.statistics_command()
+            elif command == "w":
+                self.write_command()
+            elif command == "l":
+                self.load_command()
             else:
                 print("Invalid command. Enter 'h' for help.")
             self.get_line()  # get the user entry
             command = self.read_command()  # read the first character
+        self.monitors.stop_vcd()
 
     def get_line(self):
         """Print prompt for the user and update the user entry."""
@@ -199,6 +225,18 @@ class UserInterface:
 
         return number
 
+    def read_path(self):
+        """Return the rest of the user entry as a file path.
+
+        Return None if no path is provided.
+        """
+        path = self.line[self.cursor:].strip()
+        self.cursor = len(self.line)
+        if not path:
+            print("Error! Expected a file path.")
+            return None
+        return path
+
     def help_command(self):
         """Print a list of valid commands."""
         print("User commands:")
@@ -207,6 +245,9 @@ class UserInterface:
         print("s X N     - set switch X to N (0 or 1)")
         print("m X       - set a monitor on signal X")
         print("z X       - zap the monitor on signal X")
+        print("p         - show simulation statistics")
+        print("w F       - write a checkpoint of the simulation to file F")
+        print("l F       - load a checkpoint of the simulation from file F")
         print("h         - help (this command)")
         print("q         - quit the program")
 
@@ -253,7 +294,12 @@ class UserInterface:
                 self.monitors.record_signals()
             else:
                 print("Error! Network oscillating.")
+                message = self.network.get_oscillation_message()
+                if message is not None:
+                    print(message)
+                self.monitors.flush_vcd()
                 return False
+        self.monitors.flush_vcd()
         self.monitors.display_signals()
         return True
 
@@ -264,8 +310,13 @@ class UserInterface:
 
         if cycles is not None:  # if the number of cycles provided is valid
             self.monitors.reset_monitors()
+            if self.vcd_path is not None:  # start a new VCD file
+                if not self.monitors.start_vcd(self.vcd_path):
+                    print("Error! Could not write VCD file.")
             print("".join(["Running for ", str(cycles), " cycles"]))
             self.devices.cold_startup()
+            if self.network.get_stats() is not None:
+                self.network.get_stats().reset()
             if self.run_network(cycles):
                 self.cycles_completed += cycles
 
@@ -279,3 +330,35 @@ class UserInterface:
                 self.cycles_completed += cycles
                 print(" ".join(["Continuing for", str(cycles), "cycles.",
                                 "Total:", str(self.cycles_completed)]))
+
+    def statistics_command(self):
+        """Show the simulation statistics, or start collecting them."""
+        stats = self.network.get_stats()
+        if stats is None:
+            self.network.enable_stats()
+            print("Collecting simulation statistics from now on.")
+        else:
+            print("\n".join(stats.format_lines()))
+
+    def write_command(self):
+        """Save the state of the simulation to a checkpoint file."""
+        path = self.read_path()
+        if path is not None:
+            if Checkpoint(self.devices, self.monitors).write(
+                    path, self.cycles_completed):
+                print("Successfully wrote checkpoint.")
+            else:
+                print("Error! Could not write checkpoint.")
+
+    def load_command(self):
+        """Restore the state of the simulation from a checkpoint file."""
+        path = self.read_path()
+        if path is not None:
+            cycles_completed = Checkpoint(self.devices,
+                                          self.monitors).load(path)
+            if cycles_completed is None:
+                print("Error! Could not load checkpoint.")
+            else:
+                self.cycles_completed = cycles_completed
+                print(" ".join(["Successfully loaded checkpoint.", "Total:",
+                                str(self.cycles_completed)]))
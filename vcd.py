@@ -0,0 +1,129 @@
+"""Write signal traces to a Value Change Dump (VCD) file.
+
+Used in the Logic Simulator project to stream the monitored signals to an
+IEEE 1364 VCD file while the simulation runs, so that long traces can be
+viewed in standard waveform viewers without being held in memory.
+
+Classes
+-------
+VcdWriter - streams signal changes to a VCD file.
+"""
+import time
+
+# Identifier codes are made of the printable ASCII characters ! to ~
+FIRST_CODE_CHARACTER = 33
+CODE_CHARACTERS = 94
+
+
+def make_identifier_code(index):
+    """Return the short VCD identifier code of the signal at index.
+
+    Codes are "!", '"', ..., "~", then "!!", '"!' and so on, so every index
+    has a different code of printable ASCII characters.
+    """
+    characters = []
+    while True:
+        index, digit = divmod(index, CODE_CHARACTERS)
+        characters.append(chr(FIRST_CODE_CHARACTER + digit))
+        if index == 0:
+            return "".join(characters)
+        index -= 1
+
+
+class VcdWriter:
+
+    """Stream signal changes to a VCD file.
+
+    The header declares one 1-bit wire for each monitored output, with a
+    short identifier code from make_identifier_code() and a reference name
+    made from its signal name from Devices.get_signal_name(), with "." (as
+    in D1.Q) replaced by "_", since many viewers do not accept "." in
+    references. Each simulation cycle is one time step, and
+    only the signals that change in a cycle are written. HIGH and RISING are
+    written as 1, LOW and FALLING as 0, and BLANK as x. Lines are buffered in
+    memory and written to the file every flush_interval cycles.
+
+    Parameters
+    ----------
+    path: path of the VCD file to write.
+    devices: instance of the devices.Devices() class.
+    ports: list of the (device_id, output_id) pairs of the signals to write.
+    flush_interval: number of simulation cycles between writes to the file.
+
+    Public methods
+    --------------
+    write_signals(self, signal_list): Writes the signal levels of one
+                                      simulation cycle.
+
+    flush(self): Writes the buffered lines to the file.
+
+    close(self): Flushes the buffered lines and closes the file.
+    """
+
+    def __init__(self, path, devices, ports, flush_interval=1000):
+        """Open the VCD file and write its header."""
+        self.devices = devices
+        self.ports = list(ports)
+        self.flush_interval = flush_interval
+        self.cycle = 0  # time step of the next cycle written
+        # Value last written for each port, or None before the first cycle
+        self.last_values = [None] * len(self.ports)
+
+        d = devices
+        # Value written for each signal level
+        self.values = {d.LOW: "0", d.HIGH: "1", d.RISING: "1",
+                       d.FALLING: "0", d.BLANK: "x", None: "x"}
+        self.codes = [make_identifier_code(index)
+                      for index in range(len(self.ports))]
+        self.references = [
+            d.get_signal_name(device_id, output_id).replace(".", "_")
+            for device_id, output_id in self.ports]
+        # (outputs dictionary of the device, output_id) of each port
+        self.refs = [(d.get_device(device_id).outputs, output_id)
+                     for device_id, output_id in self.ports]
+
+        self.file = open(path, "w")
+        self.lines = ["$date " + time.asctime() + " $end",
+                      "$version Logic Simulator $end",
+                      "$timescale 1 ns $end",
+                      "$scope module logsim $end"]
+        for code, reference in zip(self.codes, self.references):
+            self.lines.append("$var wire 1 " + code + " " + reference +
+                              " $end")
+        self.lines += ["$upscope $end", "$enddefinitions $end"]
+        self.flush()
+
+    def write_signals(self, signal_list):
+        """Write the signal levels of one simulation cycle.
+
+        signal_list holds the signal level of each port, in order. Only the
+        values that differ from those written for the previous cycle are
+        written, so HIGH after RISING, for example, is not written again.
+        """
+        changes = []
+        values = self.values
+        last_values = self.last_values
+        for i, signal in enumerate(signal_list):
+            value = values.get(signal, "x")
+            if value != last_values[i]:
+                last_values[i] = value
+                changes.append(value + self.codes[i])
+        if changes:
+            self.lines.append("#" + str(self.cycle))
+            self.lines.extend(changes)
+        self.cycle += 1
+        if self.cycle % self.flush_interval == 0:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered lines to the file."""
+        if self.lines:
+            self.file.write("\n".join(self.lines) + "\n")
+            self.lines = []
+        self.file.flush()
+
+    def close(self):
+        """Flush the buffered lines, mark the end time and close the file."""
+        self.lines.append("#" + str(self.cycle))
+        self.flush()
+        self.file.close()
@@ -0,0 +1,316 @@
+"""Execute a compiled netlist with vectorised NumPy operations.
+
+Used in the Logic Simulator project to simulate very large networks, by
+evaluating whole groups of devices at once instead of one device at a time.
+
+Classes
+-------
+VectorNetlist - executes a compiled netlist with NumPy arrays.
+"""
+import numpy as np
+
+from oscillation import OscillationDetector
+
+
+class VectorNetlist:
+
+    """Execute a compiled netlist with NumPy arrays.
+
+    All output signals are held in one NumPy array, followed by two padding
+    slots that are always LOW and HIGH. Devices of the same kind are split
+    into batches whose members do not depend on each other within a sweep,
+    and each batch is evaluated with a few vectorised operations. Gate inputs
+    are gathered with padded index matrices: a gate with fewer inputs than the
+    widest gate of its batch has its spare columns pointed at the padding
+    slot whose signal cannot change its output.
+
+    Batches are ordered so that every device sees exactly the signals it
+    would see in a sweep of netlist.Netlist.execute(): a device reading an
+    output from earlier in the execution order is in a later batch, and one
+    reading an output from later in the order (in a loop) is in the same or
+    an earlier batch. The results are therefore identical, including the
+    number of sweeps needed to settle and the detection of oscillations and
+    unsuccessful signal updates.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    netlist: instance of the netlist.Netlist() class to execute.
+
+    Public methods
+    --------------
+    load_state(self): Copies the dynamic state of the devices into the arrays.
+
+    store_state(self): Copies the changed dynamic state in the arrays back
+                       into the devices.
+
+    execute(self): Executes all the devices in the netlist for one
+                   simulation cycle.
+    """
+
+    def __init__(self, devices, network, netlist):
+        """Split the devices of the netlist into batches of index arrays."""
+        self.devices = devices
+        self.network = network
+        self.netlist = netlist
+        self.state_version = None  # dynamic state has not been loaded yet
+
+        d = devices
+        no_of_slots = len(netlist.slot_ports)
+        self.LOW_SLOT = no_of_slots
+        self.HIGH_SLOT = no_of_slots + 1
+        self.signals = np.zeros(no_of_slots + 2, dtype=np.int8)
+        self.stored_signals = None  # signals as last stored in the devices
+
+        # UPDATE[signal, target] is the result of Network.update_signal() for
+        # target LOW (0) and HIGH (1), or -1 if the update is unsuccessful
+        self.UPDATE = np.array([update if update[0] is not None else (-1, -1)
+                                for update in netlist.UPDATE], dtype=np.int8)
+        self.NEXT_SIGNAL = np.full(len(d.signal_types), -1, dtype=np.int8)
+        for signal, next_signal in [(d.LOW, d.LOW), (d.HIGH, d.HIGH),
+                                    (d.RISING, d.HIGH),
+                                    (d.FALLING, d.LOW)]:
+            self.NEXT_SIGNAL[signal] = next_signal
+
+        self.switch_slots = self._output_array(netlist.switch_indices, 0)
+        self.switch_targets = None
+        self.generator_slots = self._output_array(netlist.generator_indices,
+                                                  0)
+        self.dtype_indices = np.array(netlist.dtype_indices, dtype=np.intp)
+        self.dtype_memories = None
+        self.dtype_batches = []
+        self.gate_batches = []
+        if netlist.unconnected:  # the netlist cannot be executed
+            return
+
+        for batch in self._split(netlist.dtype_indices):
+            # Positions of the batch members in dtype_indices
+            positions = np.searchsorted(self.dtype_indices, batch)
+            self.dtype_batches.append(
+                (positions,
+                 np.array([netlist.input_slots[index] for index in batch],
+                          dtype=np.intp).T,
+                 self._output_array(batch, 0), self._output_array(batch, 1)))
+
+        for batch in self._split(netlist.gate_indices):
+            rules = []
+            for index in batch:
+                if netlist.gate_rules[index] not in rules:
+                    rules.append(netlist.gate_rules[index])
+            for x, y in rules:
+                members = [index for index in batch
+                           if netlist.gate_rules[index] == (x, y)]
+                width = max(len(netlist.input_slots[index])
+                            for index in members)
+                pad_slot = self.HIGH_SLOT if x == d.HIGH else self.LOW_SLOT
+                inputs = np.full((len(members), width), pad_slot,
+                                 dtype=np.intp)
+                for row, index in enumerate(members):
+                    slots = netlist.input_slots[index]
+                    inputs[row, :len(slots)] = slots
+                self.gate_batches.append((x, y, inputs,
+                                          self._output_array(members, 0)))
+
+    def _output_array(self, indices, port):
+        """Return the array of the specified output slot of each device."""
+        return np.array([self.netlist.output_slots[index][port]
+                         for index in indices], dtype=np.intp)
+
+    def _split(self, indices):
+        """Split the device indices into batches that can execute together.
+
+        Return the list of batches, each in execution order.
+        """
+        netlist = self.netlist
+        position = {index: i for i, index in enumerate(indices)}
+        level = {}
+        # Least level of each device, so that it executes after the devices
+        # reading its output from earlier in the order
+        least_level = {}
+        for index in indices:
+            index_level = least_level.get(index, 0)
+            later_drivers = []
+            for slot in netlist.input_slots[index]:
+                driver = netlist.slot_indices[slot]
+                if driver not in position or driver == index:
+                    continue
+                if position[driver] < position[index]:
+                    index_level = max(index_level, level[driver] + 1)
+                else:
+                    later_drivers.append(driver)
+            level[index] = index_level
+            for driver in later_drivers:
+                least_level[driver] = max(least_level.get(driver, 0),
+                                          index_level)
+
+        batches = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for index in indices:
+            batches[level[index]].append(index)
+        return batches
+
+    def load_state(self):
+        """Copy the dynamic state of the devices into the arrays."""
+        d = self.devices
+        netlist = self.netlist
+        netlist.load_state()
+        self.signals[:self.LOW_SLOT] = netlist.signals
+        self.signals[self.LOW_SLOT] = d.LOW
+        self.signals[self.HIGH_SLOT] = d.HIGH
+        self.stored_signals = self.signals.copy()
+        self._copy_switch_targets()
+        self.dtype_memories = np.array(
+            [netlist.dtype_memories[index]
+             for index in netlist.dtype_indices], dtype=np.int8)
+        self.state_version = d.state_version
+
+    def _copy_switch_targets(self):
+        """Copy the switch targets of the netlist into an array."""
+        netlist = self.netlist
+        self.switch_targets = np.array(
+            [netlist.switch_targets[index]
+             for index in netlist.switch_indices], dtype=np.int8)
+
+    def store_state(self):
+        """Copy the changed dynamic state in the arrays back into the devices.
+
+        The netlist arrays are kept up to date too, so that the netlist
+        engines can carry on from the same state.
+        """
+        netlist = self.netlist
+        signals = self.signals
+        for slot in np.flatnonzero(signals != self.stored_signals).tolist():
+            outputs, output_id = netlist.slot_refs[slot]
+            outputs[output_id] = netlist.signals[slot] = int(signals[slot])
+        self.stored_signals[:] = signals
+        for index, memory in zip(netlist.dtype_indices,
+                                 self.dtype_memories.tolist()):
+            netlist.dtype_memories[index] = memory
+            netlist.device_refs[index].dtype_memory = memory
+        for index in netlist.clock_indices:
+            netlist.device_refs[index].clock_counter = netlist.counters[index]
+        for index in netlist.siggen_indices:
+            netlist.device_refs[index].siggen_counter = netlist.counters[index]
+        netlist.pending = None  # the event-driven engine must start afresh
+
+    def _update_generators(self):
+        """Set clock and siggen signals to RISING or FALLING, as needed."""
+        netlist = self.netlist
+        signals = self.signals
+        generator_slots = self.generator_slots.tolist()
+        for slot in generator_slots:
+            netlist.signals[slot] = int(signals[slot])
+        netlist.update_generators()
+        signals[self.generator_slots] = [netlist.signals[slot]
+                                         for slot in generator_slots]
+
+    def _sweep(self):
+        """Execute every batch once, in order.
+
+        Return True if any output signal changed, False if none did, or None
+        if a signal update was unsuccessful.
+        """
+        d = self.devices
+        signals = self.signals
+        UPDATE = self.UPDATE
+        changed = False
+
+        if len(self.switch_slots):
+            old_signals = signals[self.switch_slots]
+            new_signals = UPDATE[old_signals, self.switch_targets]
+            if (new_signals < 0).any():
+                return None
+            changed |= bool((new_signals != old_signals).any())
+            signals[self.switch_slots] = new_signals
+
+        # Execute D-type devices before clocks to catch the rising edge of the
+        # clock
+        memories = self.dtype_memories
+        for (positions, (clk_slots, set_slots, clear_slots, data_slots),
+             q_slots, qbar_slots) in self.dtype_batches:
+            memory = memories[positions]
+            rising = signals[clk_slots] == d.RISING
+            data = signals[data_slots]
+            memory[rising & ((data == d.HIGH) | (data == d.FALLING))] = d.HIGH
+            memory[rising & ((data == d.LOW) | (data == d.RISING))] = d.LOW
+            memory[signals[set_slots] == d.HIGH] = d.HIGH
+            memory[signals[clear_slots] == d.HIGH] = d.LOW
+            memories[positions] = memory
+
+            for slots, targets in [(q_slots, memory != d.LOW),
+                                   (qbar_slots, memory == d.LOW)]:
+                old_signals = signals[slots]
+                new_signals = UPDATE[old_signals, targets.view(np.int8)]
+                if (new_signals < 0).any():
+                    return None
+                changed |= bool((new_signals != old_signals).any())
+                signals[slots] = new_signals
+
+        # Complete clock and signal generator transitions
+        if len(self.generator_slots):
+            old_signals = signals[self.generator_slots]
+            new_signals = self.NEXT_SIGNAL[old_signals]
+            if (new_signals < 0).any():
+                return None
+            changed |= bool((new_signals != old_signals).any())
+            signals[self.generator_slots] = new_signals
+
+        for x, y, inputs, output_slots in self.gate_batches:
+            input_signals = signals[inputs]
+            if x is None:  # XOR: output is high only if both inputs differ
+                targets = input_signals[:, 0] != input_signals[:, 1]
+            else:  # if all inputs are x, output is y, else the inverse of y
+                targets = (input_signals == x).all(axis=1)
+                if y == d.LOW:
+                    targets = ~targets
+            old_signals = signals[output_slots]
+            new_signals = UPDATE[old_signals, targets.view(np.int8)]
+            if (new_signals < 0).any():
+                return None
+            changed |= bool((new_signals != old_signals).any())
+            signals[output_slots] = new_signals
+
+        return changed
+
+    def execute(self):
+        """Execute all the devices in the netlist for one simulation cycle.
+
+        Return True if successful and the network does not oscillate.
+        """
+        if self.netlist.unconnected:
+            return False
+        if self.state_version != self.devices.state_version:
+            self.load_state()
+        elif self.netlist.load_switches():
+            self._copy_switch_targets()
+
+        self._update_generators()
+
+        # Number of iterations to wait for the signals to settle before
+        # declaring the network unstable
+        iteration_limit = self.network.get_iteration_limit()
+        # The states have the same layout as netlist.Netlist.get_state()
+        detector = OscillationDetector(self.netlist.state_devices)
+
+        steady_state = False
+        iterations = 0
+        while iterations < iteration_limit:
+            iterations += 1
+            changed = self._sweep()
+            if changed is None:  # a signal update was unsuccessful
+                break
+            if not changed:
+                steady_state = True
+                break
+            if detector.add_state(self.signals[:self.LOW_SLOT].tobytes() +
+                                  self.dtype_memories.tobytes()):
+                break
+
+        stats = self.network.stats
+        if stats is not None:
+            stats.count_sweeps(self.netlist.device_kinds, iterations)
+        self.store_state()
+        self.network.steady_state = steady_state
+        self.network.iterations = iterations
+        self.network.oscillation = detector.get_oscillation()
+        return steady_state